@@ -5,6 +5,7 @@ from pathlib import Path
 from fastapi import APIRouter, FastAPI
 from dotenv import load_dotenv
 import importlib
+from contextvars import ContextVar, Token
 from typing import Any, overload
 import threading
 
@@ -13,6 +14,42 @@ traceroot_logger = traceroot.get_logger("env")
 # Thread-local storage for user-specific environment
 _thread_local = threading.local()
 
+class RuntimeConfig:
+    """
+    Settings of one project (save path, browser port, model keys, search keys, ...).
+    Activated with use_runtime_config for the request that runs the project, so
+    env() resolves them per project instead of through the process-wide os.environ.
+    """
+
+    def __init__(self, values: dict[str, str] | None = None, env_path: str | None = None):
+        self.values = values if values is not None else {}
+        self.env_path = env_path if env_path and os.path.exists(env_path) else None
+
+
+# Runtime config of the project being executed in the current context
+_runtime_config: ContextVar[RuntimeConfig | None] = ContextVar("runtime_config", default=None)
+
+
+def use_runtime_config(config: RuntimeConfig | None) -> Token:
+    """
+    Activate a project's runtime config for the current context and the tasks
+    created from it. Returns the token to restore the previous config.
+    """
+    return _runtime_config.set(config)
+
+
+def reset_runtime_config(token: Token):
+    _runtime_config.reset(token)
+
+
+def get_runtime_config() -> RuntimeConfig | None:
+    return _runtime_config.get()
+
+
+# Parsed env files: path -> ((mtime_ns, size), values), shared by all threads
+_env_file_cache: dict[str, tuple[tuple[int, int], dict[str, str | None]]] = {}
+_env_file_cache_lock = threading.Lock()
+
 # Default global environment path
 default_env_path = os.path.join(os.path.expanduser("~"), ".eigent", ".env")
 load_dotenv(dotenv_path=default_env_path)
@@ -62,23 +99,44 @@ def env(key: str, default: Any) -> Any: ...
 def env(key: str, default=None):
     """
     Get environment variable.
-    First checks thread-local user-specific environment,
-    then falls back to global environment.
-    """
-    # If we have a user-specific environment path, try to reload it to get latest values
-    if hasattr(_thread_local, 'env_path') and os.path.exists(_thread_local.env_path):
-        # Temporarily load user-specific env to get the latest value
-        from dotenv import dotenv_values
-        user_env_values = dotenv_values(_thread_local.env_path)
-        if key in user_env_values:
-            value = user_env_values[key] or default
-            traceroot_logger.debug("Environment variable retrieved from user-specific config", extra={"key": key, "env_path": _thread_local.env_path, "has_value": value is not None})
-            return value
+    First checks the runtime config of the current project, then the
+    user-specific environment, then falls back to global environment.
+    """
+    config = _runtime_config.get()
+    if config is not None and key in config.values:
+        return config.values[key]
+
+    # User-specific values come from the parsed file cache, which picks up edits to the file
+    env_path = config.env_path if config is not None and config.env_path else getattr(_thread_local, 'env_path', None)
+    if env_path is not None:
+        user_env_values = _read_env_file(env_path)
+        if user_env_values is not None and key in user_env_values:
+            return user_env_values[key] or default
 
     # Fall back to global environment
-    value = os.getenv(key, default)
-    traceroot_logger.debug("Environment variable retrieved from global config", extra={"key": key, "has_value": value is not None, "using_default": value == default})
-    return value
+    return os.getenv(key, default)
+
+
+def _read_env_file(env_path: str) -> dict[str, str | None] | None:
+    """
+    Parsed values of an env file, re-parsed only when its mtime or size changed.
+    Returns None if the file does not exist.
+    """
+    try:
+        stat = os.stat(env_path)
+    except OSError:
+        return None
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _env_file_cache.get(env_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    from dotenv import dotenv_values
+    values = dict(dotenv_values(env_path))
+    with _env_file_cache_lock:
+        _env_file_cache[env_path] = (version, values)
+    traceroot_logger.debug("Environment file parsed", extra={"env_path": env_path, "keys": len(values)})
+    return values
 
 
 def env_or_fail(key: str):
@@ -1,5 +1,4 @@
 import asyncio
-import os
 import re
 import time
 from pathlib import Path
@@ -11,6 +10,7 @@ from app.component import code
 from app.exception.exception import UserException
 from app.model.chat import Chat, HumanReply, McpServers, Status, SupplementChat, AddTaskRequest, sse_json
 from app.service.chat_service import step_solve
+from app.service.project_stream import ProjectStream
 from app.service.task import (
     Action,
     ActionImproveData,
@@ -22,11 +22,12 @@ from app.service.task import (
     ActionSkipTaskData,
     get_or_create_task_lock,
     get_task_lock,
+    get_task_lock_if_exists,
     set_current_task_id,
     delete_task_lock,
     task_locks,
 )
-from app.component.environment import set_user_env_path
+from app.component.environment import RuntimeConfig, set_user_env_path, use_runtime_config
 from app.utils.workforce import Workforce
 from camel.tasks.task import Task
 
@@ -112,9 +113,23 @@ async def timeout_stream_wrapper(stream_generator, timeout_seconds: int = SSE_TI
         raise
 
 
+def _last_event_id(value: str | None) -> int | None:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
 @router.post("/chat", name="start chat")
 @traceroot.trace()
 async def post(data: Chat, request: Request):
+    # fetch-event-source retries a dropped stream with the same request and its Last-Event-ID
+    last_event_id = _last_event_id(request.headers.get("last-event-id"))
+    existing = get_task_lock_if_exists(data.project_id)
+    if last_event_id is not None and existing is not None and existing.stream is not None and not existing.stream.done:
+        chat_logger.info("Resuming chat stream", extra={"project_id": data.project_id, "last_event_id": last_event_id})
+        return StreamingResponse(existing.stream.subscribe(last_event_id), media_type="text/event-stream")
+
     chat_logger.info(
         "Starting new chat session",
         extra={"project_id": data.project_id, "task_id": data.task_id, "user": data.email}
@@ -126,17 +141,21 @@ async def post(data: Chat, request: Request):
     set_user_env_path(data.env_path)
     load_dotenv(dotenv_path=data.env_path)
 
-    os.environ["file_save_path"] = data.file_save_path()
-    os.environ["browser_port"] = str(data.browser_port)
-    os.environ["OPENAI_API_KEY"] = data.api_key
-    os.environ["OPENAI_API_BASE_URL"] = data.api_url or "https://api.openai.com/v1"
-    os.environ["CAMEL_MODEL_LOG_ENABLED"] = "true"
+    # Project settings are scoped to this request instead of written to os.environ,
+    # which is shared by every project running in this process
+    config = {
+        "file_save_path": data.file_save_path(),
+        "browser_port": str(data.browser_port),
+        "OPENAI_API_KEY": data.api_key,
+        "OPENAI_API_BASE_URL": data.api_url or "https://api.openai.com/v1",
+        "CAMEL_MODEL_LOG_ENABLED": "true",
+    }
 
     # Set user-specific search engine configuration if provided
     if data.search_config:
         for key, value in data.search_config.items():
             if value:
-                os.environ[key] = value
+                config[key] = value
                 chat_logger.debug(f"Set search config: {key}", extra={"project_id": data.project_id})
 
     email_sanitized = re.sub(r'[\\/*?:"<>|\s]', "_", data.email.split("@")[0]).strip(".")
@@ -150,10 +169,15 @@ async def post(data: Chat, request: Request):
     )
     camel_log.mkdir(parents=True, exist_ok=True)
 
-    os.environ["CAMEL_LOG_DIR"] = str(camel_log)
+    config["CAMEL_LOG_DIR"] = str(camel_log)
 
     if data.is_cloud():
-        os.environ["cloud_api_key"] = data.api_key
+        config["cloud_api_key"] = data.api_key
+
+    # The streaming response runs in a copy of this context, so the project's
+    # agents, toolkits and model backends all resolve env() against this config
+    task_lock.runtime_config = RuntimeConfig(config, data.env_path)
+    use_runtime_config(task_lock.runtime_config)
 
     # Set the initial current_task_id in task_lock
     set_current_task_id(data.project_id, data.task_id)
@@ -165,9 +189,28 @@ async def post(data: Chat, request: Request):
         "Chat session initialized",
         extra={"project_id": data.project_id, "task_id": data.task_id, "log_dir": str(camel_log)},
     )
-    return StreamingResponse(
-        timeout_stream_wrapper(step_solve(data, request, task_lock), task_lock=task_lock), media_type="text/event-stream"
-    )
+    # The stream outlives the connection: a dropped client can reconnect within the grace
+    # period, after which step_solve sees the stream as disconnected and stops the project
+    async def abandon():
+        await task_lock.put_queue(ActionStopData(action=Action.stop))
+
+    stream = ProjectStream(data.project_id, on_abandoned=abandon)
+    stream.start(timeout_stream_wrapper(step_solve(data, stream, task_lock), task_lock=task_lock))
+    task_lock.stream = stream
+    return StreamingResponse(stream.subscribe(), media_type="text/event-stream")
+
+
+@router.get("/chat/{id}/stream", name="resume chat stream")
+@traceroot.trace()
+async def resume(id: str, request: Request, last_event_id: int | None = None):
+    r"""Reconnect to a project's stream, replaying the events after ``Last-Event-ID``."""
+    task_lock = get_task_lock(id)
+    if task_lock.stream is None or task_lock.stream.done:
+        raise UserException(code.error, "No active stream for this project")
+    if last_event_id is None:
+        last_event_id = _last_event_id(request.headers.get("last-event-id")) or 0
+    chat_logger.info("Resuming chat stream", extra={"project_id": id, "last_event_id": last_event_id})
+    return StreamingResponse(task_lock.stream.subscribe(last_event_id), media_type="text/event-stream")
 
 
 @router.post("/chat/{id}", name="improve chat")
@@ -201,7 +244,7 @@ def improve(id: str, data: SupplementChat):
             current_email = None
 
             # Extract email from current file_save_path if available
-            current_file_save_path = os.environ.get("file_save_path", "")
+            current_file_save_path = task_lock.runtime_config.values.get("file_save_path", "")
             if current_file_save_path:
                 path_parts = Path(current_file_save_path).parts
                 if len(path_parts) >= 3 and "eigent" in path_parts:
@@ -214,7 +257,7 @@ def improve(id: str, data: SupplementChat):
                 # Create new path using the existing pattern: email/project_{project_id}/task_{task_id}
                 new_folder_path = Path.home() / "eigent" / current_email / f"project_{id}" / f"task_{data.task_id}"
                 new_folder_path.mkdir(parents=True, exist_ok=True)
-                os.environ["file_save_path"] = str(new_folder_path)
+                task_lock.runtime_config.values["file_save_path"] = str(new_folder_path)
                 chat_logger.info(f"Updated file_save_path to: {new_folder_path}")
 
                 # Store the new folder path in task_lock for potential cleanup and persistence
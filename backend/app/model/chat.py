@@ -2,7 +2,7 @@ from enum import Enum
 import json
 from pathlib import Path
 import re
-from typing import Literal
+from typing import Any, Literal
 from pydantic import BaseModel, Field, field_validator
 from camel.types import ModelType, RoleType
 from utils import traceroot_wrapper as traceroot
@@ -143,6 +143,22 @@ class AddTaskRequest(BaseModel):
 class RemoveTaskRequest(BaseModel):
     task_id: str
 
-def sse_json(step: str, data):
+class SseFrame(str):
+    r"""SSE text that also keeps the ``(step, data)`` events it was rendered
+    from, so consumers such as ``sync_step`` don't have to parse it back."""
+
+    events: list[tuple[str, Any]]
+
+    def __new__(cls, text: str, events: list[tuple[str, Any]]):
+        frame = super().__new__(cls, text)
+        frame.events = events
+        return frame
+
+    @classmethod
+    def join(cls, frames: "list[SseFrame]") -> "SseFrame":
+        return cls("".join(frames), [event for frame in frames for event in frame.events])
+
+
+def sse_json(step: str, data) -> SseFrame:
     res_format = {"step": step, "data": data}
-    return f"data: {json.dumps(res_format, ensure_ascii=False)}\n\n"
+    return SseFrame(f"data: {json.dumps(res_format, ensure_ascii=False)}\n\n", [(step, data)])
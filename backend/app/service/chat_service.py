@@ -43,62 +43,25 @@ from app.utils.agent import (
     set_main_event_loop,
 )
 from app.service.task import Action, Agents
+from app.service.event_pipeline import EventPipeline
+from app.service.file_index import WorkingDirectoryIndex
+from app.service.task_registry import TaskRegistry
+from app.utils.agent_pool import agent_pool
 from app.utils.server.sync_step import sync_step
 from camel.types import ModelPlatformType
 from camel.models import ModelProcessingError
 from utils import traceroot_wrapper as traceroot
-import os
 
 logger = traceroot.get_logger("chat_service")
 
 
-def format_task_context(task_data: dict, seen_files: set | None = None, skip_files: bool = False) -> str:
-    """Format structured task data into a readable context string.
-
-    Args:
-        task_data: Dictionary containing task content, result, and working directory
-        seen_files: Optional set to track already-listed files and avoid duplicates (deprecated, use skip_files instead)
-        skip_files: If True, skip the file listing entirely
-    """
-    context_parts = []
-
-    if task_data.get('task_content'):
-        context_parts.append(f"Previous Task: {task_data['task_content']}")
-
-    if task_data.get('task_result'):
-        context_parts.append(f"Previous Task Result: {task_data['task_result']}")
-
-    # Skip file listing if requested
-    if not skip_files:
-        working_directory = task_data.get('working_directory')
-        if working_directory:
-            try:
-                if os.path.exists(working_directory):
-                    generated_files = []
-                    for root, dirs, files in os.walk(working_directory):
-                        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
-                        for file in files:
-                            if not file.startswith('.') and not file.endswith(('.pyc', '.tmp')):
-                                file_path = os.path.join(root, file)
-                                absolute_path = os.path.abspath(file_path)
-
-                                # Only add if not seen before (or if we're not tracking seen files)
-                                if seen_files is None or absolute_path not in seen_files:
-                                    generated_files.append(absolute_path)
-                                    if seen_files is not None:
-                                        seen_files.add(absolute_path)
-
-                    if generated_files:
-                        context_parts.append("Generated Files from Previous Task:")
-                        for file_path in sorted(generated_files):
-                            context_parts.append(f"  - {file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to collect generated files: {e}")
-
-    return "\n".join(context_parts)
-
-
-def collect_previous_task_context(working_directory: str, previous_task_content: str, previous_task_result: str, previous_summary: str = "") -> str:
+def collect_previous_task_context(
+    working_directory: str,
+    previous_task_content: str,
+    previous_task_result: str,
+    previous_summary: str = "",
+    file_index: WorkingDirectoryIndex | None = None,
+) -> str:
     """
     Collect context from previous task including content, result, summary, and generated files.
 
@@ -107,6 +70,7 @@ def collect_previous_task_context(working_directory: str, previous_task_content:
         previous_task_content: The content of the previous task
         previous_task_result: The result/output of the previous task
         previous_summary: The summary of the previous task
+        file_index: Index used to list the generated files, a fresh one (full scan) if not given
 
     Returns:
         Formatted context string to prepend to new task
@@ -130,55 +94,24 @@ def collect_previous_task_context(working_directory: str, previous_task_content:
         context_parts.append(f"Previous Task Result:\n{previous_task_result}\n")
 
     # Collect generated files from working directory
-    try:
-        if os.path.exists(working_directory):
-            generated_files = []
-            for root, dirs, files in os.walk(working_directory):
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
-                for file in files:
-                    if not file.startswith('.') and not file.endswith(('.pyc', '.tmp')):
-                        file_path = os.path.join(root, file)
-                        absolute_path = os.path.abspath(file_path)
-                        generated_files.append(absolute_path)
-
-            if generated_files:
-                context_parts.append("Generated Files from Previous Task:")
-                for file_path in sorted(generated_files):
-                    context_parts.append(f"  - {file_path}")
-                context_parts.append("")
-    except Exception as e:
-        logger.warning(f"Failed to collect generated files: {e}")
+    file_index = file_index or WorkingDirectoryIndex()
+    file_lines = file_index.render(file_index.files([working_directory]), "Generated Files from Previous Task")
+    if file_lines:
+        context_parts.extend(file_lines)
+        context_parts.append("")
 
     context_parts.append("=== END OF PREVIOUS TASK CONTEXT ===\n")
 
     return "\n".join(context_parts)
 
 
-def check_conversation_history_length(task_lock: TaskLock, max_length: int = 200000) -> tuple[bool, int]:
-    """
-    Check if conversation history exceeds maximum length
-
-    Returns:
-        tuple: (is_exceeded, total_length)
-    """
-    if not hasattr(task_lock, 'conversation_history') or not task_lock.conversation_history:
-        return False, 0
-
-    total_length = 0
-    for entry in task_lock.conversation_history:
-        total_length += len(entry.get('content', ''))
-
-    is_exceeded = total_length > max_length
-
-    if is_exceeded:
-        logger.warning(f"Conversation history length {total_length} exceeds maximum {max_length}")
-
-    return is_exceeded, total_length
-
-
 def build_conversation_context(task_lock: TaskLock, header: str = "=== CONVERSATION HISTORY ===") -> str:
     """Build conversation context from task_lock history with files listed only once at the end.
 
+    Entries are rendered incrementally by the task lock's ConversationContext
+    and windowed to the most recent ones when the history exceeds the context
+    budget.
+
     Args:
         task_lock: TaskLock containing conversation history
         header: Header text for the context section
@@ -187,49 +120,31 @@ def build_conversation_context(task_lock: TaskLock, header: str = "=== CONVERSAT
         Formatted context string with task history and files listed once at the end
     """
     context = ""
-    working_directories = set()  # Collect all unique working directories
 
     if task_lock.conversation_history:
-        context = f"{header}\n"
-
-        for entry in task_lock.conversation_history:
-            if entry['role'] == 'task_result':
-                if isinstance(entry['content'], dict):
-                    formatted_context = format_task_context(entry['content'], skip_files=True)
-                    context += formatted_context + "\n\n"
-                    if entry['content'].get('working_directory'):
-                        working_directories.add(entry['content']['working_directory'])
-                else:
-                    context += entry['content'] + "\n"
-            elif entry['role'] == 'assistant':
-                context += f"Assistant: {entry['content']}\n\n"
+        conversation = task_lock.conversation
+        context = f"{header}\n" + conversation.render()
 
+        working_directories = conversation.working_directories
         if working_directories:
-            all_generated_files = set()  # Use set to avoid duplicates
-            for working_directory in working_directories:
-                try:
-                    if os.path.exists(working_directory):
-                        for root, dirs, files in os.walk(working_directory):
-                            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
-                            for file in files:
-                                if not file.startswith('.') and not file.endswith(('.pyc', '.tmp')):
-                                    file_path = os.path.join(root, file)
-                                    absolute_path = os.path.abspath(file_path)
-                                    all_generated_files.add(absolute_path)
-                except Exception as e:
-                    logger.warning(f"Failed to collect generated files from {working_directory}: {e}")
-
-            if all_generated_files:
-                context += "Generated Files from Previous Tasks:\n"
-                for file_path in sorted(all_generated_files):
-                    context += f"  - {file_path}\n"
-                context += "\n"
+            # Files are listed once for all tasks, kept up to date incrementally
+            file_index = task_lock.file_index
+            file_lines = file_index.render(file_index.files(working_directories), "Generated Files from Previous Tasks")
+            if file_lines:
+                context += "\n".join(file_lines) + "\n\n"
 
         context += "\n"
 
     return context
 
 
+def get_question_agent(task_lock: TaskLock, options: Chat) -> ListenChatAgent:
+    """The project's persistent question agent, created on first use."""
+    if task_lock.question_agent is None:
+        task_lock.question_agent = question_confirm_agent(options)
+    return task_lock.question_agent
+
+
 def build_context_for_workforce(task_lock: TaskLock, options: Chat) -> str:
     """Build context information for workforce."""
     return build_conversation_context(task_lock, header="=== CONVERSATION HISTORY ===")
@@ -251,12 +166,9 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
         task_lock.summary_generated = False
 
     # Create or reuse persistent question_agent
-    if task_lock.question_agent is None:
-        task_lock.question_agent = question_confirm_agent(options)
-    else:
+    if task_lock.question_agent is not None:
         logger.debug(f"Reusing existing question_agent with {len(task_lock.conversation_history)} history entries")
-
-    question_agent = task_lock.question_agent
+    question_agent = get_question_agent(task_lock, options)
 
     # Other variables
     camel_task = None
@@ -266,6 +178,7 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
     summary_task_content = ""  # Track task summary
     loop_iteration = 0
     event_loop = asyncio.get_running_loop()
+    event_pipeline = EventPipeline()
     sub_tasks: list[Task] = []
 
     logger.info("=" * 80)
@@ -298,12 +211,18 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
             logger.info(f"[LIFECYCLE] Breaking out of step_solve loop due to client disconnect")
             break
         try:
-            item = await task_lock.get_queue()
+            frame, item = await event_pipeline.next(task_lock)
         except Exception as e:
             logger.error("Error getting item from queue", extra={"project_id": options.project_id, "task_id": options.task_id, "error": str(e)}, exc_info=True)
             # Continue waiting instead of breaking on queue error
             continue
 
+        # Coalesced high-frequency events (terminal, toolkit, decompose text) are flushed as one frame
+        if frame:
+            yield frame
+        if item is None:
+            continue
+
         try:
             if item.action == Action.improve or start_event_loop:
                 logger.info("=" * 80)
@@ -315,6 +234,9 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
 
                 # tracer = VizTracer()
                 # tracer.start()
+
+                # The question agent is dropped while the project is hibernated
+                question_agent = get_question_agent(task_lock, options)
                 if start_event_loop is True:
                     question = options.question
                     logger.info(f"[NEW-QUESTION] Initial question from options.question: '{question[:100]}...'")
@@ -324,16 +246,6 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
                     question = item.data
                     logger.info(f"[NEW-QUESTION] Follow-up question from ActionImproveData: '{question[:100]}...'")
 
-                is_exceeded, total_length = check_conversation_history_length(task_lock)
-                if is_exceeded:
-                    logger.error("Conversation history too long", extra={"project_id": options.project_id, "current_length": total_length, "max_length": 100000})
-                    yield sse_json("context_too_long", {
-                        "message": "The conversation history is too long. Please create a new project to continue.",
-                        "current_length": total_length,
-                        "max_length": 100000
-                    })
-                    continue
-
                 # Determine task complexity: attachments mean workforce, otherwise let agent decide
                 is_complex_task: bool
                 if len(options.attaches) > 0:
@@ -516,11 +428,11 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
                 # Use stored decomposition results if available
                 if not sub_tasks:
                     sub_tasks = getattr(task_lock, "decompose_sub_tasks", [])
-                sub_tasks = update_sub_tasks(sub_tasks, update_tasks)
+                sub_tasks = update_sub_tasks(sub_tasks, update_tasks, registry=task_lock.task_registry)
                 # Also update camel_task.subtasks to remove deleted tasks (used by to_sub_tasks)
-                update_sub_tasks(camel_task.subtasks, update_tasks)
+                update_sub_tasks(camel_task.subtasks, update_tasks, registry=task_lock.task_registry)
                 # Add new tasks (with empty id) to both camel_task and sub_tasks
-                new_tasks = add_sub_tasks(camel_task, item.data.task)
+                new_tasks = add_sub_tasks(camel_task, item.data.task, registry=task_lock.task_registry)
                 # Also add new tasks to sub_tasks so workforce.eigent_start uses correct list
                 sub_tasks.extend(new_tasks)
                 # Save updated sub_tasks back to task_lock so Action.start uses the correct list
@@ -625,17 +537,6 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
 
                 # Continue loop to accept new questions (don't break, don't delete task_lock)
             elif item.action == Action.start:
-                # Check conversation history length before starting task
-                is_exceeded, total_length = check_conversation_history_length(task_lock)
-                if is_exceeded:
-                    logger.error(f"Cannot start task: conversation history too long ({total_length} chars) for project {options.project_id}")
-                    yield sse_json("context_too_long", {
-                        "message": "The conversation history is too long. Please create a new project to continue.",
-                        "current_length": total_length,
-                        "max_length": 100000
-                    })
-                    continue
-
                 if workforce is not None:
                     if workforce._state.name == 'PAUSED':
                         # Resume paused workforce - subtasks should already be loaded
@@ -715,6 +616,7 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
                     logger.info(f"[LIFECYCLE] Multi-turn: workforce paused, state={workforce._state.name}")
 
                     try:
+                        question_agent = get_question_agent(task_lock, options)
                         logger.info(f"[LIFECYCLE] Multi-turn: calling question_confirm for new task")
                         is_multi_turn_complex = await question_confirm(question_agent, new_task_content, task_lock)
                         logger.info(f"[LIFECYCLE] Multi-turn: question_confirm result: is_complex={is_multi_turn_complex}")
@@ -859,6 +761,7 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
             elif item.action == Action.deactivate_toolkit:
                 yield sse_json("deactivate_toolkit", item.data)
             elif item.action == Action.write_file:
+                task_lock.file_index.record_write(item.data)
                 yield sse_json(
                     "write_file",
                     {"file_path": item.data, "process_task_id": item.process_task_id},
@@ -982,8 +885,8 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
                 camel_task = None
                 logger.info(f"[LIFECYCLE] camel_task set to None")
 
-                if question_agent is not None:
-                    question_agent.reset()
+                if task_lock.question_agent is not None:
+                    task_lock.question_agent.reset()
                     logger.info(f"[LIFECYCLE] question_agent reset for project {options.project_id}")
             elif item.action == Action.supplement:
 
@@ -994,12 +897,12 @@ async def step_solve(options: Chat, request: Request, task_lock: TaskLock):
                     continue
                 else:
                     task_lock.status = Status.processing
-                    camel_task.add_subtask(
-                        Task(
-                            content=item.data.question,
-                            id=f"{camel_task.id}.{len(camel_task.subtasks)}",
-                        )
+                    supplement_task = Task(
+                        content=item.data.question,
+                        id=f"{camel_task.id}.{len(camel_task.subtasks)}",
                     )
+                    camel_task.add_subtask(supplement_task)
+                    task_lock.task_registry.add(supplement_task, camel_task)
                     if workforce is not None:
                         task = asyncio.create_task(workforce.eigent_start(camel_task.subtasks))
                         task_lock.add_background_task(task)
@@ -1053,7 +956,7 @@ async def install_mcp(
 ):
     logger.info(f"Installing MCP tools: {list(install_mcp.data.get('mcpServers', {}).keys())}")
     try:
-        mcp.add_tools(await get_mcp_tools(install_mcp.data))
+        mcp.add_tools(await get_mcp_tools(install_mcp.data, mcp.api_task_id, mcp.agent_name))
         logger.info("MCP tools installed successfully")
     except Exception as e:
         logger.error(f"Error installing MCP tools: {e}", exc_info=True)
@@ -1092,7 +995,12 @@ def tree_sub_tasks(sub_tasks: list[Task], depth: int = 0):
     )
 
 
-def update_sub_tasks(sub_tasks: list[Task], update_tasks: dict[str, TaskContent], depth: int = 0):
+def update_sub_tasks(
+    sub_tasks: list[Task],
+    update_tasks: dict[str, TaskContent],
+    depth: int = 0,
+    registry: TaskRegistry | None = None,
+):
     if depth > 5:  # limit the depth of the recursion
         return []
 
@@ -1101,14 +1009,18 @@ def update_sub_tasks(sub_tasks: list[Task], update_tasks: dict[str, TaskContent]
         item = sub_tasks[i]
         if item.id in update_tasks:
             item.content = update_tasks[item.id].content
-            update_sub_tasks(item.subtasks, update_tasks, depth + 1)
+            update_sub_tasks(item.subtasks, update_tasks, depth + 1, registry)
             i += 1
         else:
             sub_tasks.pop(i)
+            if registry is not None:
+                registry.remove(item.id)
     return sub_tasks
 
 
-def add_sub_tasks(camel_task: Task, update_tasks: list[TaskContent]) -> list[Task]:
+def add_sub_tasks(
+    camel_task: Task, update_tasks: list[TaskContent], registry: TaskRegistry | None = None
+) -> list[Task]:
     """Add new tasks (with empty id) to camel_task and return the list of added tasks."""
     added_tasks = []
     for item in update_tasks:
@@ -1118,6 +1030,8 @@ def add_sub_tasks(camel_task: Task, update_tasks: list[TaskContent]) -> list[Tas
                 id=f"{camel_task.id}.{len(camel_task.subtasks) + 1}",
             )
             camel_task.add_subtask(new_task)
+            if registry is not None:
+                registry.add(new_task, camel_task)
             added_tasks.append(new_task)
     return added_tasks
 
@@ -1293,17 +1207,20 @@ async def construct_workforce(options: Chat) -> tuple[Workforce, ListenChatAgent
     def _create_coordinator_and_task_agents() -> list[ListenChatAgent]:
         """Create coordinator and task agents (sync, runs in thread pool)."""
         return [
-            agent_model(
-                key,
-                prompt,
-                options,
-                [
-                    *(
-                        ToolkitMessageIntegration(
-                            message_handler=HumanToolkit(options.project_id, key).send_message_to_user
-                        ).register_toolkits(NoteTakingToolkit(options.project_id, working_directory=working_directory))
-                    ).get_tools()
-                ],
+            agent_pool.get_or_build(
+                agent_pool.key(options, key),
+                lambda key=key, prompt=prompt: agent_model(
+                    key,
+                    prompt,
+                    options,
+                    [
+                        *(
+                            ToolkitMessageIntegration(
+                                message_handler=HumanToolkit(options.project_id, key).send_message_to_user
+                            ).register_toolkits(NoteTakingToolkit(options.project_id, working_directory=working_directory))
+                        ).get_tools()
+                    ],
+                ),
             )
             for key, prompt in {
                 Agents.coordinator_agent: f"""
@@ -1323,6 +1240,11 @@ The current date is {datetime.date.today()}. For any date-related tasks, you MUS
 
     def _create_new_worker_agent() -> ListenChatAgent:
         """Create new worker agent (sync, runs in thread pool)."""
+        return agent_pool.get_or_build(
+            agent_pool.key(options, Agents.new_worker_agent), _build_new_worker_agent
+        )
+
+    def _build_new_worker_agent() -> ListenChatAgent:
         return agent_model(
             Agents.new_worker_agent,
             f"""
@@ -1349,13 +1271,21 @@ The current date is {datetime.date.today()}. For any date-related tasks, you MUS
     try:
         # asyncio.gather runs all coroutines concurrently
         # asyncio.to_thread runs sync functions in thread pool without blocking event loop
+        # Built-in agents come from the warm pool, the MCP agent depends on live MCP connections
+        pool_stats = agent_pool.stats()
         results = await asyncio.gather(
             asyncio.to_thread(_create_coordinator_and_task_agents),
             asyncio.to_thread(_create_new_worker_agent),
-            asyncio.to_thread(browser_agent, options),
-            developer_agent(options),
-            document_agent(options),
-            asyncio.to_thread(multi_modal_agent, options),
+            asyncio.to_thread(
+                agent_pool.get_or_build, agent_pool.key(options, Agents.browser_agent), lambda: browser_agent(options)
+            ),
+            agent_pool.aget_or_build(agent_pool.key(options, Agents.developer_agent), lambda: developer_agent(options)),
+            agent_pool.aget_or_build(agent_pool.key(options, Agents.document_agent), lambda: document_agent(options)),
+            asyncio.to_thread(
+                agent_pool.get_or_build,
+                agent_pool.key(options, Agents.multi_modal_agent),
+                lambda: multi_modal_agent(options),
+            ),
             mcp_agent(options),
         )
     except Exception as e:
@@ -1379,6 +1309,17 @@ The current date is {datetime.date.today()}. For any date-related tasks, you MUS
 
     coordinator_agent, task_agent = coord_task_agents
 
+    current_stats = agent_pool.stats()
+    logger.info(
+        "Workforce agents constructed",
+        extra={
+            "project_id": options.project_id,
+            "pool_hits": current_stats["hits"] - pool_stats["hits"],
+            "pool_misses": current_stats["misses"] - pool_stats["misses"],
+            "seconds_saved": round(current_stats["seconds_saved"] - pool_stats["seconds_saved"], 3),
+        },
+    )
+
     # ========================================================================
     # Create Workforce instance and add workers (must be sequential)
     # ========================================================================
@@ -1468,7 +1409,7 @@ async def new_agent_model(data: NewAgent | ActionNewAgent, options: Chat):
     for item in data.tools:
         tool_names.append(titleize(item))
     if data.mcp_tools is not None:
-        tools = [*tools, *await get_mcp_tools(data.mcp_tools)]
+        tools = [*tools, *await get_mcp_tools(data.mcp_tools, options.project_id, data.name)]
         for item in data.mcp_tools["mcpServers"].keys():
             tool_names.append(titleize(item))
     for item in tools:
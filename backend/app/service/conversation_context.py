@@ -0,0 +1,166 @@
+from datetime import datetime
+from typing import Any
+from app.component.environment import env
+from app.service.file_index import WorkingDirectoryIndex
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("conversation_context")
+
+# Rough chars-per-token ratio used to budget the prompt without a model specific tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_task_context(
+    task_data: dict,
+    seen_files: set | None = None,
+    skip_files: bool = False,
+    file_index: WorkingDirectoryIndex | None = None,
+) -> str:
+    """Format structured task data into a readable context string.
+
+    Args:
+        task_data: Dictionary containing task content, result, and working directory
+        seen_files: Optional set to track already-listed files and avoid duplicates (deprecated, use skip_files instead)
+        skip_files: If True, skip the file listing entirely
+        file_index: Index used to list the generated files, a fresh one (full scan) if not given
+    """
+    context_parts = []
+
+    if task_data.get('task_content'):
+        context_parts.append(f"Previous Task: {task_data['task_content']}")
+
+    if task_data.get('task_result'):
+        context_parts.append(f"Previous Task Result: {task_data['task_result']}")
+
+    # Skip file listing if requested
+    if not skip_files:
+        working_directory = task_data.get('working_directory')
+        if working_directory:
+            file_index = file_index or WorkingDirectoryIndex()
+            generated_files = file_index.files([working_directory])
+            if seen_files is not None:
+                generated_files = {path: mtime for path, mtime in generated_files.items() if path not in seen_files}
+                seen_files.update(generated_files)
+            context_parts.extend(file_index.render(generated_files, "Generated Files from Previous Task"))
+
+    return "\n".join(context_parts)
+
+
+def render_entry(entry: dict) -> str:
+    """Render one conversation history entry the way it appears in prompts."""
+    if entry['role'] == 'task_result':
+        if isinstance(entry['content'], dict):
+            return format_task_context(entry['content'], skip_files=True) + "\n\n"
+        return entry['content'] + "\n"
+    if entry['role'] == 'assistant':
+        return f"Assistant: {entry['content']}\n\n"
+    return ""
+
+
+class ConversationContext:
+    r"""Conversation history that renders itself incrementally.
+
+    Every entry is rendered once, when it is first seen, and its length and
+    estimated token count are added to running totals, so checking the
+    history size is O(1) and building a prompt only renders new entries. The
+    joined text is cached until the history grows.
+
+    ``render`` keeps the prompt within ``max_tokens`` (``context_max_tokens``
+    setting) by sending only the most recent entries that fit, preceded by a
+    note about what was left out, instead of refusing to continue.
+
+    ``entries`` may be appended to directly; replacing or shrinking it makes
+    the next access rebuild the cache.
+    """
+
+    def __init__(self, entries: list[dict[str, Any]] | None = None, max_tokens: int | None = None) -> None:
+        self.entries: list[dict[str, Any]] = entries if entries is not None else []
+        self.max_tokens = max_tokens if max_tokens is not None else int(env("context_max_tokens", "50000"))
+        self._reset()
+
+    def _reset(self) -> None:
+        self._chunks: list[str] = []
+        self._tokens: list[int] = []
+        self._total_length = 0
+        self._total_tokens = 0
+        self._working_directories: dict[str, None] = {}
+        self._cache: tuple[tuple[int, int, int | None], str] | None = None
+
+    def append(self, role: str, content: str | dict) -> None:
+        self.entries.append({
+            'role': role,
+            'content': content,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def _sync(self) -> None:
+        if len(self.entries) < len(self._chunks):
+            self._reset()
+        for entry in self.entries[len(self._chunks):]:
+            chunk = render_entry(entry)
+            tokens = estimate_tokens(chunk)
+            self._chunks.append(chunk)
+            self._tokens.append(tokens)
+            self._total_length += len(chunk)
+            self._total_tokens += tokens
+            if entry['role'] == 'task_result' and isinstance(entry['content'], dict):
+                working_directory = entry['content'].get('working_directory')
+                if working_directory:
+                    self._working_directories[working_directory] = None
+
+    @property
+    def total_length(self) -> int:
+        """Characters of the fully rendered history."""
+        self._sync()
+        return self._total_length
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated tokens of the fully rendered history."""
+        self._sync()
+        return self._total_tokens
+
+    @property
+    def working_directories(self) -> list[str]:
+        """Working directories of all task results, in order of first appearance."""
+        self._sync()
+        return list(self._working_directories)
+
+    def render(self, max_tokens: int | None = None) -> str:
+        """Render the history, windowed to the most recent entries within ``max_tokens``."""
+        self._sync()
+        budget = max_tokens if max_tokens is not None else self.max_tokens
+
+        start = 0
+        truncate_to = None
+        if budget > 0 and self._total_tokens > budget:
+            used = 0
+            start = len(self._chunks)
+            while start > 0 and used + self._tokens[start - 1] <= budget:
+                start -= 1
+                used += self._tokens[start]
+            if start == len(self._chunks):
+                # The newest entry alone is over budget, keep what fits of it rather than nothing
+                start -= 1
+                truncate_to = budget * CHARS_PER_TOKEN
+
+        key = (len(self._chunks), start, truncate_to)
+        if self._cache is not None and self._cache[0] == key:
+            return self._cache[1]
+
+        if truncate_to is not None:
+            text = self._chunks[start][:truncate_to] + "\n[entry truncated to fit the context window]\n\n"
+        else:
+            text = "".join(self._chunks[start:])
+        if start:
+            logger.info(
+                "Conversation history windowed to fit the context budget",
+                extra={"omitted_entries": start, "total_tokens": self._total_tokens, "max_tokens": budget},
+            )
+            text = f"[{start} earlier conversation entries omitted to fit the context window]\n\n" + text
+        self._cache = (key, text)
+        return text
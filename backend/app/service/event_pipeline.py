@@ -0,0 +1,137 @@
+import asyncio
+from typing import Iterable
+from app.component.environment import env
+from app.model.chat import SseFrame, sse_json
+from app.service.task import Action, ActionData, TaskLock
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("event_pipeline")
+
+# High-frequency actions that are buffered and written as one SSE frame per flush.
+# Anything else (ask, end, task_state, ...) is handed back to step_solve immediately.
+COALESCE_ACTIONS = frozenset(
+    {
+        Action.terminal,
+        Action.decompose_text,
+        Action.activate_toolkit,
+        Action.deactivate_toolkit,
+    }
+)
+
+
+def _parse_actions(value: str | None) -> set[Action]:
+    actions = set()
+    for name in (value or "").split(","):
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            actions.add(Action(name))
+        except ValueError:
+            logger.warning(f"Unknown action in SSE pipeline config: {name}")
+    return actions
+
+
+class EventPipeline:
+    r"""Coalesce high-frequency TaskLock events into time/size bounded SSE frames.
+
+    The first coalescible event opens a batch that is flushed when
+    ``flush_interval`` elapses, ``max_events`` / ``max_bytes`` are reached, or a
+    non-coalescible event arrives. Consecutive terminal chunks of the same
+    ``process_task_id`` and consecutive decompose_text deltas of the same task
+    are merged into a single event. The batch is rendered as one string
+    (several ``data:`` events) so it reaches the client in one socket write.
+
+    Defaults can be tuned with the ``sse_flush_interval`` (seconds),
+    ``sse_flush_max_events``, ``sse_flush_max_bytes`` and
+    ``sse_passthrough_actions`` (comma separated action names that must never be
+    buffered) environment settings.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float | None = None,
+        max_events: int | None = None,
+        max_bytes: int | None = None,
+        passthrough_actions: Iterable[Action] | None = None,
+    ) -> None:
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(env("sse_flush_interval", "0.05"))
+        )
+        self.max_events = max_events if max_events is not None else int(env("sse_flush_max_events", "64"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(env("sse_flush_max_bytes", "65536"))
+        if passthrough_actions is None:
+            passthrough_actions = _parse_actions(env("sse_passthrough_actions"))
+        self.coalesce_actions = COALESCE_ACTIONS - set(passthrough_actions)
+
+    async def next(self, task_lock: TaskLock) -> tuple[str, ActionData | None]:
+        r"""Wait for the next queue event(s).
+
+        Returns:
+            tuple: ``(frame, item)`` where ``frame`` is the rendered SSE text of
+            the coalesced batch (empty if nothing was buffered) and ``item`` is
+            the non-coalescible action that must be handled by the caller, or
+            ``None`` if the batch was flushed on time/size.
+        """
+        item = await task_lock.get_queue()
+        if self.flush_interval <= 0 or item.action not in self.coalesce_actions:
+            return "", item
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        batch = [item]
+        size = payload_size(item)
+        trailing = None
+        while len(batch) < self.max_events and size < self.max_bytes:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(task_lock.get_queue(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if item.action not in self.coalesce_actions:
+                trailing = item
+                break
+            batch.append(item)
+            size += payload_size(item)
+
+        return self.render(batch), trailing
+
+    def render(self, batch: list[ActionData]) -> SseFrame:
+        r"""Merge adjacent mergeable events and render the batch as SSE text."""
+        events: list[tuple[str, dict]] = []
+        for item in batch:
+            if item.action == Action.terminal:
+                last = events[-1] if events else None
+                if last and last[0] == "terminal" and last[1]["process_task_id"] == item.process_task_id:
+                    last[1]["output"] += item.data
+                else:
+                    events.append(("terminal", {"output": item.data, "process_task_id": item.process_task_id}))
+            elif item.action == Action.decompose_text:
+                last = events[-1] if events else None
+                if (
+                    last
+                    and last[0] == "decompose_text"
+                    and last[1].get("task_id") == item.data.get("task_id")
+                    and last[1].get("project_id") == item.data.get("project_id")
+                ):
+                    last[1]["content"] += item.data.get("content", "")
+                else:
+                    events.append(("decompose_text", dict(item.data)))
+            else:
+                events.append((item.action.value, item.data))
+
+        if len(events) < len(batch):
+            logger.debug("Coalesced SSE events", extra={"events_in": len(batch), "events_out": len(events)})
+        return SseFrame.join([sse_json(step, data) for step, data in events])
+
+
+def payload_size(item: ActionData) -> int:
+    """Approximate size in characters of the payload an event carries."""
+    data = getattr(item, "data", "")
+    if isinstance(data, str):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(len(str(v)) for v in data.values())
+    return 0
@@ -0,0 +1,78 @@
+import asyncio
+from collections import deque
+from typing import Any, Iterator
+
+
+class EventQueue:
+    r"""Unbounded FIFO queue of the events a project streams to its client.
+
+    Works like ``asyncio.Queue`` for a single consumer, but the queued events
+    can be iterated and removed, which the overflow policies of a bounded
+    ``TaskLock`` rely on, and producers may put from another event loop or
+    thread than the one consuming. The bound itself is enforced by
+    ``TaskLock``.
+    """
+
+    def __init__(self) -> None:
+        self._items: deque[Any] = deque()
+        self._getters: deque[asyncio.Future] = deque()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[Any]:
+        return reversed(self._items)
+
+    def remove(self, item: Any) -> None:
+        r"""Remove a queued item, compared by identity."""
+        for index, queued in enumerate(self._items):
+            if queued is item:
+                del self._items[index]
+                return
+        raise ValueError("item is not queued")
+
+    def put_nowait(self, item: Any) -> None:
+        self._items.append(item)
+        self._wakeup_getter()
+
+    async def put(self, item: Any) -> None:
+        self.put_nowait(item)
+
+    def get_nowait(self) -> Any:
+        if not self._items:
+            raise asyncio.QueueEmpty
+        return self._items.popleft()
+
+    async def get(self) -> Any:
+        while not self._items:
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                if getter in self._getters:
+                    self._getters.remove(getter)
+                # Hand a wakeup this getter won't use to the next one
+                if self._items:
+                    self._wakeup_getter()
+                raise
+        return self._items.popleft()
+
+    def _wakeup_getter(self) -> None:
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                # The consumer may wait on another loop than the producer's
+                getter.get_loop().call_soon_threadsafe(_resolve, getter)
+                return
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
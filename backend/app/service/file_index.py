@@ -0,0 +1,164 @@
+import os
+import time
+from typing import Iterable
+from app.component.environment import env
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("file_index")
+
+IGNORED_DIRS = frozenset({"node_modules", "__pycache__", "venv"})
+IGNORED_SUFFIXES = (".pyc", ".tmp")
+
+
+def is_listed_dir(name: str) -> bool:
+    return not name.startswith(".") and name not in IGNORED_DIRS
+
+
+def is_listed_file(name: str) -> bool:
+    return not name.startswith(".") and not name.endswith(IGNORED_SUFFIXES)
+
+
+class _Root:
+    def __init__(self) -> None:
+        # directory -> mtime_ns when it was last listed
+        self.dir_mtimes: dict[str, int] = {}
+        # directory -> files directly inside it, with their mtime
+        self.dir_files: dict[str, dict[str, float]] = {}
+        # directory -> listed subdirectories directly inside it
+        self.subdirs: dict[str, set[str]] = {}
+
+
+class WorkingDirectoryIndex:
+    r"""Incrementally maintained list of the files generated in working directories.
+
+    The first lookup of a directory walks it once. Later lookups only stat the
+    known directories and re-list those whose mtime changed, and files reported
+    by FileToolkit write events are added directly, so keeping the listing up
+    to date costs O(directories + changes) instead of a full ``os.walk``.
+
+    Listings larger than ``max_files`` (``context_file_list_max`` setting) are
+    rendered in summary mode: file counts per directory plus the
+    ``recent_files`` (``context_file_list_recent`` setting) most recently
+    modified files.
+    """
+
+    def __init__(self, max_files: int | None = None, recent_files: int | None = None) -> None:
+        self.max_files = max_files if max_files is not None else int(env("context_file_list_max", "200"))
+        self.recent_files = recent_files if recent_files is not None else int(env("context_file_list_recent", "50"))
+        self._roots: dict[str, _Root] = {}
+
+    def record_write(self, file_path: str) -> None:
+        r"""Add a file reported by a write event without touching the disk."""
+        file_path = os.path.abspath(file_path)
+        for root_path, root in self._roots.items():
+            if not file_path.startswith(root_path + os.sep):
+                continue
+            relative_dirs = os.path.relpath(os.path.dirname(file_path), root_path).split(os.sep)
+            if any(d != "." and not is_listed_dir(d) for d in relative_dirs):
+                return
+            if is_listed_file(os.path.basename(file_path)):
+                root.dir_files.setdefault(os.path.dirname(file_path), {})[file_path] = time.time()
+            return
+
+    def files(self, working_directories: Iterable[str]) -> dict[str, float]:
+        r"""Return ``{absolute_path: mtime}`` of the listed files in the directories."""
+        result: dict[str, float] = {}
+        for working_directory in working_directories:
+            try:
+                for dir_files in self._refresh(os.path.abspath(working_directory)).dir_files.values():
+                    result.update(dir_files)
+            except Exception as e:
+                logger.warning(f"Failed to collect generated files from {working_directory}: {e}")
+        return result
+
+    def render(self, files: dict[str, float], title: str) -> list[str]:
+        r"""Render ``files`` as context lines, summarized when there are too many."""
+        if not files:
+            return []
+        if len(files) <= self.max_files:
+            return [f"{title}:"] + [f"  - {file_path}" for file_path in sorted(files)]
+
+        per_dir: dict[str, int] = {}
+        for file_path in files:
+            directory = os.path.dirname(file_path)
+            per_dir[directory] = per_dir.get(directory, 0) + 1
+        recent = sorted(files, key=files.get, reverse=True)[: self.recent_files]
+
+        lines = [f"{title} ({len(files)} files in {len(per_dir)} directories, {len(recent)} most recent shown):"]
+        lines += [f"  - {file_path}" for file_path in recent]
+        lines.append("Files per directory:")
+        busiest = sorted(per_dir.items(), key=lambda item: (-item[1], item[0]))
+        lines += [f"  - {directory}: {count} files" for directory, count in busiest[: self.max_files]]
+        if len(busiest) > self.max_files:
+            lines.append(f"  - ... {len(busiest) - self.max_files} more directories")
+        return lines
+
+    def _refresh(self, root_path: str) -> _Root:
+        root = self._roots.get(root_path)
+        if root is None:
+            root = _Root()
+            if os.path.isdir(root_path):
+                self._list_tree(root, root_path)
+                self._roots[root_path] = root
+            return root
+
+        for directory, mtime in list(root.dir_mtimes.items()):
+            if directory not in root.dir_mtimes:
+                # Dropped together with a removed parent earlier in this pass
+                continue
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                self._drop_tree(root, directory)
+                continue
+            if current != mtime:
+                for new_dir in self._list_dir(root, directory):
+                    self._list_tree(root, new_dir)
+        return root
+
+    def _list_tree(self, root: _Root, directory: str) -> None:
+        pending = [directory]
+        while pending:
+            pending.extend(self._list_dir(root, pending.pop()))
+
+    def _list_dir(self, root: _Root, directory: str) -> list[str]:
+        r"""(Re)list one directory, returning subdirectories that are new to the index."""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            self._drop_tree(root, directory)
+            return []
+
+        files: dict[str, float] = {}
+        subdirs = set()
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    # Like os.walk, symlinked directories are not descended into
+                    if is_listed_dir(entry.name) and not entry.is_symlink():
+                        subdirs.add(entry.path)
+                elif is_listed_file(entry.name):
+                    files[entry.path] = entry.stat().st_mtime
+            except OSError:
+                continue
+
+        known = root.subdirs.get(directory, set())
+        for removed in known - subdirs:
+            self._drop_tree(root, removed)
+        root.dir_mtimes[directory] = mtime
+        root.dir_files[directory] = files
+        root.subdirs[directory] = subdirs
+        return sorted(subdirs - known)
+
+    def _drop_tree(self, root: _Root, directory: str) -> None:
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            pending.extend(root.subdirs.pop(current, ()))
+            root.dir_mtimes.pop(current, None)
+            root.dir_files.pop(current, None)
+        # Files recorded from write events in directories that were never listed
+        prefix = directory + os.sep
+        for orphan in [d for d in root.dir_files if d.startswith(prefix)]:
+            root.dir_files.pop(orphan)
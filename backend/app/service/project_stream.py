@@ -0,0 +1,125 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable
+from app.component.environment import env
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("project_stream")
+
+
+def with_event_id(event_id: int, text: str) -> str:
+    r"""Tag every SSE event in ``text`` with ``event_id``."""
+    return "".join(f"id: {event_id}\n{block}\n\n" for block in text.split("\n\n") if block)
+
+
+class ProjectStream:
+    r"""A project's SSE stream, decoupled from the HTTP connection reading it.
+
+    The source generator (``step_solve``) runs in its own task. Every chunk
+    it yields gets the next id and is kept in a replay buffer of the last
+    ``sse_replay_buffer_size`` chunks. Connections ``subscribe`` from a
+    ``Last-Event-ID`` and get the buffered chunks after it, then the live
+    ones. When the last connection drops, the source keeps running for
+    ``sse_reconnect_grace`` seconds; if nobody reconnects in time the stream
+    is abandoned, ``is_disconnected`` turns True and ``on_abandoned`` is
+    awaited so the source can tear the project down.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        on_abandoned: Callable[[], Awaitable[None]] | None = None,
+        buffer_size: int | None = None,
+        grace: float | None = None,
+    ) -> None:
+        self.project_id = project_id
+        self.on_abandoned = on_abandoned
+        self.grace = grace if grace is not None else float(env("sse_reconnect_grace", "60"))
+        self.events: deque[tuple[int, str]] = deque(
+            maxlen=buffer_size if buffer_size is not None else int(env("sse_replay_buffer_size", "2000"))
+        )
+        self.last_id = 0
+        self.done = False
+        self.abandoned = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._grace_task: asyncio.Task | None = None
+
+    @property
+    def buffered_size(self) -> int:
+        return sum(len(text) for _, text in self.events)
+
+    def start(self, source: AsyncIterator[str]) -> None:
+        self._task = asyncio.create_task(self._pump(source), name=f"sse-{self.project_id}")
+        # Also covers a client that is gone before the response starts
+        self._start_grace()
+
+    async def is_disconnected(self) -> bool:
+        return self.abandoned
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for value in source:
+                self.last_id += 1
+                self.events.append((self.last_id, with_event_id(self.last_id, value)))
+                self._notify()
+        except Exception as e:
+            logger.error(f"Project stream failed: {e}", extra={"project_id": self.project_id}, exc_info=True)
+        finally:
+            self.done = True
+            if self._grace_task is not None:
+                self._grace_task.cancel()
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self, last_event_id: int = 0) -> AsyncIterator[str]:
+        r"""Chunks after ``last_event_id``, then live ones until the source ends."""
+        self.subscribers += 1
+        if self._grace_task is not None:
+            self._grace_task.cancel()
+            self._grace_task = None
+        cursor = last_event_id
+        try:
+            if self.events and cursor and self.events[0][0] > cursor + 1:
+                logger.warning(
+                    "Replay buffer no longer holds all missed events",
+                    extra={"project_id": self.project_id, "last_event_id": cursor, "first_buffered": self.events[0][0]},
+                )
+                yield f": events {cursor + 1} to {self.events[0][0] - 1} are no longer available\n\n"
+            while True:
+                changed = self._changed
+                pending = [text for event_id, text in self.events if event_id > cursor]
+                if pending:
+                    cursor = self.last_id
+                    yield "".join(pending)
+                    continue
+                if self.done:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self._start_grace()
+
+    def _start_grace(self) -> None:
+        if self.subscribers == 0 and (self._grace_task is None or self._grace_task.done()):
+            self._grace_task = asyncio.create_task(self._expire())
+
+    async def _expire(self) -> None:
+        await asyncio.sleep(self.grace)
+        if self.subscribers or self.done:
+            return
+        logger.warning(
+            "No client reconnected within the grace period, abandoning the stream",
+            extra={"project_id": self.project_id, "grace": self.grace},
+        )
+        self.abandoned = True
+        if self.on_abandoned is not None:
+            try:
+                await self.on_abandoned()
+            except Exception as e:
+                logger.error(f"Tearing down the abandoned stream failed: {e}", extra={"project_id": self.project_id})
@@ -1,14 +1,24 @@
 from typing_extensions import Any, Literal, TypedDict
 from typing import List, Dict, Optional
 from pydantic import BaseModel
+from app.component.environment import RuntimeConfig, env
 from app.exception.exception import ProgramException
 from app.model.chat import McpServers, Status, SupplementChat, Chat, UpdateData
+from app.service.conversation_context import ConversationContext
+from app.service.event_queue import EventQueue
+from app.service.file_index import WorkingDirectoryIndex
+from app.service.project_stream import ProjectStream
+from app.service.task_registry import TaskRegistry
 import asyncio
+import json
+import os
+from collections import deque
 from enum import Enum
 from camel.tasks import Task
 from contextlib import contextmanager
 from contextvars import ContextVar
 from datetime import datetime, timedelta
+from pathlib import Path
 import weakref
 from utils import traceroot_wrapper as traceroot
 
@@ -264,12 +274,46 @@ class Agents(str, Enum):
     mcp_agent = "mcp_agent"
 
 
+class QueuePolicy(str, Enum):
+    """What a bounded TaskLock queue does with an action once it is full"""
+
+    block = "block"  # wait in line for the consumer to make room, asyncio.QueueFull on timeout
+    drop_oldest = "drop_oldest"  # evict the oldest droppable event
+    merge = "merge"  # merge into a previous event of the same stream, else drop oldest
+    never_drop = "never_drop"  # never waits, may exceed the bound but stays behind waiting events
+
+
+QUEUE_POLICIES: dict[Action, QueuePolicy] = {
+    Action.terminal: QueuePolicy.merge,
+    Action.decompose_text: QueuePolicy.merge,
+    Action.activate_toolkit: QueuePolicy.drop_oldest,
+    Action.deactivate_toolkit: QueuePolicy.drop_oldest,
+    Action.improve: QueuePolicy.never_drop,
+    Action.update_task: QueuePolicy.never_drop,
+    Action.start: QueuePolicy.never_drop,
+    Action.ask: QueuePolicy.never_drop,
+    Action.end: QueuePolicy.never_drop,
+    Action.stop: QueuePolicy.never_drop,
+    Action.supplement: QueuePolicy.never_drop,
+    Action.pause: QueuePolicy.never_drop,
+    Action.resume: QueuePolicy.never_drop,
+    Action.new_agent: QueuePolicy.never_drop,
+    Action.add_task: QueuePolicy.never_drop,
+    Action.remove_task: QueuePolicy.never_drop,
+    Action.skip_task: QueuePolicy.never_drop,
+    Action.install_mcp: QueuePolicy.never_drop,
+    Action.budget_not_enough: QueuePolicy.never_drop,
+    Action.timeout: QueuePolicy.never_drop,
+}
+"""Per-action overflow policy, actions not listed use QueuePolicy.block"""
+
+
 class TaskLock:
     id: str
     status: Status = Status.confirming
     active_agent: str = ""
     mcp: list[str]
-    queue: asyncio.Queue[ActionData]
+    queue: EventQueue
     """Queue monitoring for SSE response"""
     human_input: dict[str, asyncio.Queue[str]]
     """After receiving user's reply, put the reply into the corresponding agent's queue"""
@@ -281,8 +325,6 @@ class TaskLock:
     """Track toolkits for cleanup (e.g., TerminalToolkit venvs)"""
 
     # Context management fields
-    conversation_history: List[Dict[str, Any]]
-    """Store conversation history for context"""
     last_task_result: str
     """Store the last task execution result"""
     question_agent: Optional[Any]
@@ -291,34 +333,223 @@ class TaskLock:
     """Track if summary has been generated for this project"""
     current_task_id: Optional[str]
     """Current task ID to be used in SSE responses"""
-
-    def __init__(self, id: str, queue: asyncio.Queue, human_input: dict) -> None:
+    file_index: WorkingDirectoryIndex
+    """Incremental index of generated files in the working directories"""
+    task_registry: TaskRegistry
+    """Index of the project's camel tasks by id, see get_camel_task"""
+    waiting: bool
+    """Whether the project's stream is parked on the queue waiting for the next event"""
+    hibernated_path: Path | None
+    """File holding the conversation history while the project is hibernated"""
+    stream: ProjectStream | None
+    """The project's SSE stream with its replay buffer, set by chat_controller.post"""
+
+    # Bounded queue fields
+    max_queue_size: int
+    """Soft bound of the SSE queue, 0 means unbounded"""
+    queue_block_timeout: float
+    """Seconds a `block` producer waits for room before failing with asyncio.QueueFull"""
+    dropped_events: dict[str, int]
+    """Number of events dropped per action because the queue was full"""
+    merged_events: dict[str, int]
+    """Number of events merged into a previous queued event per action"""
+    blocked_events: int
+    """Number of producers that had to wait for room"""
+    _blocked: deque[tuple[ActionData, asyncio.Future | None]]
+    """Events waiting for room in arrival order, with the future of their waiting producer"""
+    loop: asyncio.AbstractEventLoop | None
+    """Event loop that consumes the queue, target of put_queue_threadsafe"""
+
+    def __init__(
+        self,
+        id: str,
+        queue: EventQueue,
+        human_input: dict,
+        max_queue_size: int = 0,
+        queue_block_timeout: float = 5.0,
+    ) -> None:
         self.id = id
         self.queue = queue
         self.human_input = human_input
+        self.max_queue_size = max_queue_size
+        self.queue_block_timeout = queue_block_timeout
+        self.dropped_events = {}
+        self.merged_events = {}
+        self.blocked_events = 0
+        self._blocked = deque()
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
         self.created_at = datetime.now()
         self.last_accessed = datetime.now()
         self.background_tasks = set()
         self.registered_toolkits = []
 
         # Initialize context management fields
-        self.conversation_history = []
+        self.hibernated_path = None
+        self.conversation = ConversationContext()
         self.last_task_result = ""
         self.last_task_summary = ""
         self.question_agent = None
         self.current_task_id = None
+        self.file_index = WorkingDirectoryIndex()
+        self.task_registry = TaskRegistry()
+        self.waiting = False
+        self.stream = None
+        # Per-project settings, activated for the project's stream in chat_controller.post
+        self.runtime_config = RuntimeConfig()
 
         logger.info("Task lock initialized", extra={"task_id": id, "created_at": self.created_at.isoformat()})
 
     async def put_queue(self, data: ActionData):
         self.last_accessed = datetime.now()
         logger.debug("Adding item to task queue", extra={"task_id": self.id, "action": data.action})
-        await self.queue.put(data)
+        if self._offer(data):
+            return
+        self.blocked_events += 1
+        entry = (data, asyncio.get_running_loop().create_future())
+        self._blocked.append(entry)
+        try:
+            await asyncio.wait_for(entry[1], timeout=self.queue_block_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if not self._remove_blocked(entry):
+                # Admitted by the consumer while timing out
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                return
+            # Events that never wait may have queued up behind this one
+            self._admit_blocked()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.dropped_events[data.action] = self.dropped_events.get(data.action, 0) + 1
+            logger.warning("Task queue still full, rejecting blocked event", extra={"task_id": self.id, "action": data.action, "queue_size": self.queue.qsize()})
+            raise asyncio.QueueFull(f"Task queue of {self.id} is full") from None
+
+    def put_queue_nowait(self, data: ActionData) -> None:
+        """Put without waiting, raises asyncio.QueueFull if a `block` event finds no room"""
+        self.last_accessed = datetime.now()
+        if not self._offer(data):
+            self.dropped_events[data.action] = self.dropped_events.get(data.action, 0) + 1
+            raise asyncio.QueueFull(f"Task queue of {self.id} is full")
+
+    def put_queue_threadsafe(self, data: ActionData) -> None:
+        """Hand an event to the loop consuming the queue, from any thread.
+
+        Never blocks the caller and never creates tasks, threads or event
+        loops: the put runs on the owning loop with `call_soon_threadsafe`.
+        Callers can't wait for room, so a `block` event that finds the queue
+        full is rejected, counted in `dropped_events` and logged.
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        loop = self.loop
+        if loop is None or not loop.is_running() or loop is running:
+            # On the consuming loop, or no loop is consuming the queue yet
+            self._put_handed_off(data)
+        else:
+            loop.call_soon_threadsafe(self._put_handed_off, data)
+
+    def _put_handed_off(self, data: ActionData) -> None:
+        try:
+            self.put_queue_nowait(data)
+        except asyncio.QueueFull:
+            logger.warning("Task queue full, rejecting event", extra={"task_id": self.id, "action": data.action, "queue_size": self.queue.qsize()})
 
     async def get_queue(self):
         self.last_accessed = datetime.now()
+        self.loop = asyncio.get_running_loop()
         logger.debug("Getting item from task queue", extra={"task_id": self.id})
-        return await self.queue.get()
+        self.waiting = True
+        try:
+            item = await self.queue.get()
+        finally:
+            self.waiting = False
+        self._admit_blocked()
+        return item
+
+    def queue_stats(self) -> dict[str, Any]:
+        """Snapshot of the queue size and overflow counters"""
+        return {
+            "size": self.queue.qsize(),
+            "max_size": self.max_queue_size,
+            "waiting": len(self._blocked),
+            "dropped": sum(self.dropped_events.values()),
+            "merged": sum(self.merged_events.values()),
+            "blocked": self.blocked_events,
+            "dropped_by_action": dict(self.dropped_events),
+            "merged_by_action": dict(self.merged_events),
+        }
+
+    def _has_room(self) -> bool:
+        # Nobody may overtake the events already waiting for room
+        return not self._blocked and (self.max_queue_size <= 0 or self.queue.qsize() < self.max_queue_size)
+
+    def _offer(self, data: ActionData) -> bool:
+        """Enqueue, merge or drop `data` by its policy, False when it has to wait for room"""
+        if self._has_room():
+            self.queue.put_nowait(data)
+            return True
+        policy = QUEUE_POLICIES.get(data.action, QueuePolicy.block)
+        if policy == QueuePolicy.merge and self._merge_into_previous(data):
+            self.merged_events[data.action] = self.merged_events.get(data.action, 0) + 1
+            return True
+        if policy in (QueuePolicy.merge, QueuePolicy.drop_oldest):
+            if self._blocked or not self._drop_oldest():
+                # Nothing droppable is queued, or events are waiting ahead: the new event is the one that goes
+                self.dropped_events[data.action] = self.dropped_events.get(data.action, 0) + 1
+                return True
+            self.queue.put_nowait(data)
+            return True
+        if policy == QueuePolicy.never_drop:
+            if self._blocked:
+                self._blocked.append((data, None))
+            else:
+                self.queue.put_nowait(data)
+            return True
+        return False
+
+    def _merge_into_previous(self, data: ActionData) -> bool:
+        for queued in reversed(self.queue):
+            if queued.action != data.action:
+                continue
+            if data.action == Action.terminal and queued.process_task_id == data.process_task_id:
+                queued.data += data.data
+                return True
+            if data.action == Action.decompose_text and queued.data.get("task_id") == data.data.get("task_id"):
+                queued.data["content"] = queued.data.get("content", "") + data.data.get("content", "")
+                return True
+        return False
+
+    def _drop_oldest(self) -> bool:
+        for queued in self.queue:
+            if QUEUE_POLICIES.get(queued.action) in (QueuePolicy.drop_oldest, QueuePolicy.merge):
+                self.queue.remove(queued)
+                self.dropped_events[queued.action] = self.dropped_events.get(queued.action, 0) + 1
+                return True
+        return False
+
+    def _remove_blocked(self, entry: tuple[ActionData, asyncio.Future | None]) -> bool:
+        for index, blocked in enumerate(self._blocked):
+            if blocked is entry:
+                del self._blocked[index]
+                return True
+        return False
+
+    def _admit_blocked(self):
+        # Waiting producers get room in arrival order, events that never wait follow right behind them
+        while self._blocked:
+            data, waiter = self._blocked[0]
+            if waiter is not None and 0 < self.max_queue_size <= self.queue.qsize():
+                return
+            self._blocked.popleft()
+            self.queue.put_nowait(data)
+            if waiter is not None:
+                # Producers may wait on another loop (e.g. controllers using asyncio.run)
+                waiter.get_loop().call_soon_threadsafe(_resolve_waiter, waiter)
 
     async def put_human_input(self, agent: str, data: Any = None):
         logger.debug("Adding human input", extra={"task_id": self.id, "agent": agent, "has_data": data is not None})
@@ -349,7 +580,15 @@ class TaskLock:
                 except asyncio.CancelledError:
                     pass
         self.background_tasks.clear()
-        
+        self._release_resources()
+        self.task_registry.clear()
+        if self.hibernated_path is not None:
+            self.hibernated_path.unlink(missing_ok=True)
+            self.hibernated_path = None
+
+        logger.info("Task lock cleanup completed", extra={"task_id": self.id})
+
+    def _release_resources(self) -> None:
         # Clean up registered toolkits (e.g., remove TerminalToolkit venvs)
         for toolkit in self.registered_toolkits:
             try:
@@ -359,8 +598,59 @@ class TaskLock:
             except Exception as e:
                 logger.warning(f"Failed to cleanup toolkit: {e}", extra={"task_id": self.id, "toolkit": type(toolkit).__name__})
         self.registered_toolkits.clear()
-        
-        logger.info("Task lock cleanup completed", extra={"task_id": self.id})
+
+        # Pooled agent templates share the toolkits cleaned up above
+        from app.utils.agent_pool import agent_pool
+        agent_pool.evict_project(self.id)
+
+        # MCP servers stay connected for other projects, or until their idle TTL
+        from app.utils.mcp_manager import mcp_manager
+        mcp_manager.release(self.id)
+
+    @property
+    def hibernated(self) -> bool:
+        return self.hibernated_path is not None
+
+    def hibernate(self, path: Path) -> None:
+        r"""Drop the in-memory state of an idle project.
+
+        The conversation history is spilled to ``path`` and loaded back the
+        first time it is accessed, the question agent is recreated by the
+        next question. Toolkits, pooled agents and MCP servers are only
+        released when the project is done, a confirming project may still
+        have a paused workforce using them.
+        """
+        if self.hibernated:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._conversation.entries, f, default=str)
+        os.replace(tmp_path, path)
+        self._conversation = None
+        self.hibernated_path = path
+        self.question_agent = None
+        self.file_index = WorkingDirectoryIndex()
+        if self.status == Status.done:
+            self._release_resources()
+        logger.info("Task lock hibernated", extra={"task_id": self.id, "path": str(path)})
+
+    def _wake(self) -> None:
+        path = self.hibernated_path
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            # Stay hibernated rather than carry on with an empty history
+            logger.error(
+                f"Failed to restore hibernated conversation history: {e}",
+                extra={"task_id": self.id, "path": str(path)},
+            )
+            raise
+        self._conversation = ConversationContext(entries)
+        self.hibernated_path = None
+        path.unlink(missing_ok=True)
+        logger.info("Task lock resumed from hibernation", extra={"task_id": self.id, "entries": len(entries)})
 
     def register_toolkit(self, toolkit: Any) -> None:
         """Register a toolkit for cleanup when task ends.
@@ -385,25 +675,48 @@ class TaskLock:
             "total_registered": len(self.registered_toolkits)
         })
 
+    @property
+    def conversation(self) -> ConversationContext:
+        """Conversation history for context, rendered incrementally"""
+        if self.hibernated:
+            self._wake()
+        return self._conversation
+
+    @conversation.setter
+    def conversation(self, conversation: ConversationContext):
+        if self.hibernated:
+            self.hibernated_path.unlink(missing_ok=True)
+            self.hibernated_path = None
+        self._conversation = conversation
+
+    @property
+    def conversation_history(self) -> List[Dict[str, Any]]:
+        """Store conversation history for context"""
+        return self.conversation.entries
+
+    @conversation_history.setter
+    def conversation_history(self, entries: List[Dict[str, Any]]):
+        self.conversation = ConversationContext(entries if entries is not None else [])
+
     def add_conversation(self, role: str, content: str | dict):
         """Add a conversation entry to history"""
         logger.debug("Adding conversation entry", extra={"task_id": self.id, "role": role, "content_length": len(str(content))})
-        self.conversation_history.append({
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now().isoformat()
-        })
+        self.conversation.append(role, content)
 
     def get_recent_context(self, max_entries: int = None) -> str:
         """Get recent conversation context as a formatted string"""
         if not self.conversation_history:
             return ""
 
-        context = "=== Recent Conversation ===\n"
         history_to_use = self.conversation_history if max_entries is None else self.conversation_history[-max_entries:]
-        for entry in history_to_use:
-            context += f"{entry['role']}: {entry['content']}\n"
-        return context
+        return "=== Recent Conversation ===\n" + "".join(
+            f"{entry['role']}: {entry['content']}\n" for entry in history_to_use
+        )
+
+
+def _resolve_waiter(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
 
 
 task_locks = dict[str, TaskLock]()
@@ -438,7 +751,13 @@ def create_task_lock(id: str) -> TaskLock:
         raise ProgramException("Task already exists")
 
     logger.info("Creating new task lock", extra={"task_id": id})
-    task_locks[id] = TaskLock(id=id, queue=asyncio.Queue(), human_input={})
+    task_locks[id] = TaskLock(
+        id=id,
+        queue=EventQueue(),
+        human_input={},
+        max_queue_size=int(env("task_queue_max_size", "2000")),
+        queue_block_timeout=float(env("task_queue_block_timeout", "5")),
+    )
 
     # Start cleanup task if not running
     # global _cleanup_task
@@ -472,7 +791,22 @@ async def delete_task_lock(id: str):
     logger.info("Task lock deleted successfully", extra={"task_id": id, "remaining_task_locks": len(task_locks)})
 
 
-def get_camel_task(id: str, tasks: list[Task]) -> None | Task:
+def get_camel_task(id: str, tasks: list[Task], registry: TaskRegistry | None = None) -> None | Task:
+    r"""Find a task by id in ``tasks`` and their subtasks.
+
+    With the project's ``registry`` this is a dict lookup; a task the registry
+    doesn't know yet (e.g. created by camel's own replanning) is searched in
+    ``tasks`` once and registered. Without a registry the global weakref
+    index is used.
+    """
+    if registry is not None:
+        task = registry.get(id)
+        if task is None:
+            task = _find_camel_task(id, tasks)
+            if task is not None:
+                registry.add(task)
+        return task
+
     if id in task_index:
         task_ref = task_index[id]
         task = task_ref()
@@ -496,6 +830,16 @@ def get_camel_task(id: str, tasks: list[Task]) -> None | Task:
     return None
 
 
+def _find_camel_task(id: str, tasks: list[Task]) -> None | Task:
+    stack = list(reversed(tasks))
+    while stack:
+        item = stack.pop()
+        if item.id == id:
+            return item
+        stack.extend(reversed(item.subtasks))
+    return None
+
+
 async def _periodic_cleanup():
     r"""Periodically clean up stale task locks"""
     while True:
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from app.component.environment import env
+from app.model.chat import Status
+from app.service.event_pipeline import payload_size
+from app.service.task import TaskLock, task_locks
+from app.utils.shard_router import shard_index
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("task_eviction")
+
+
+def _agent_memory_size(agent: Any) -> int:
+    # Characters of the messages in an agent's in-memory chat history
+    try:
+        records = agent.memory._chat_history_block.storage.memory_list
+    except AttributeError:
+        return 0
+    return sum(len(str(record.get("message", {}).get("content", ""))) for record in records)
+
+
+def estimate_memory(task_lock: TaskLock) -> int:
+    r"""Approximate size of a project's in-memory state, in characters.
+
+    Counts the rendered conversation history, the question agent's chat
+    memory, the last task result, the events waiting in the queue and the
+    SSE replay buffer.
+    """
+    size = len(task_lock.last_task_result or "")
+    if not task_lock.hibernated:
+        size += task_lock.conversation.total_length
+    if task_lock.question_agent is not None:
+        size += _agent_memory_size(task_lock.question_agent)
+    size += sum(payload_size(item) for item in task_lock.queue)
+    if task_lock.stream is not None:
+        size += task_lock.stream.buffered_size
+    return size
+
+
+class TaskLockEvictor:
+    r"""Hibernates idle projects to bound the memory of long sessions.
+
+    A project is idle when its stream is parked on the queue with nothing
+    queued, it is not processing a task and it wasn't accessed for
+    ``task_hibernate_min_idle`` seconds. Every ``task_eviction_interval``
+    seconds, idle projects unused for ``task_idle_ttl`` seconds are
+    hibernated (see ``TaskLock.hibernate``), then more idle projects, least
+    recently used first, until the estimated memory of all projects is within
+    ``task_memory_budget_mb``. Hibernated histories are spilled to a
+    directory of this process under ``task_hibernate_dir`` and loaded back
+    when the project is used again, e.g. by the next ``POST /chat/{id}``.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int | None = None,
+        idle_ttl: float | None = None,
+        min_idle: float | None = None,
+        interval: float | None = None,
+        spill_dir: str | Path | None = None,
+    ) -> None:
+        self.memory_budget = (
+            memory_budget if memory_budget is not None else int(float(env("task_memory_budget_mb", "256")) * 1024 * 1024)
+        )
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(env("task_idle_ttl", "900"))
+        self.min_idle = min_idle if min_idle is not None else float(env("task_hibernate_min_idle", "60"))
+        self.interval = interval if interval is not None else float(env("task_eviction_interval", "60"))
+        if spill_dir is None:
+            # Shard workers share the base directory, each one only touches its own
+            index = shard_index()
+            spill_dir = Path(env("task_hibernate_dir", os.path.expanduser("~/.eigent/cache/hibernated"))) / (
+                f"shard-{index}" if index is not None else f"pid-{os.getpid()}"
+            )
+        self.spill_dir = Path(spill_dir)
+        self._task: asyncio.Task | None = None
+
+    def spill_path(self, project_id: str) -> Path:
+        return self.spill_dir / f"{hashlib.sha256(project_id.encode()).hexdigest()}.json"
+
+    def is_idle(self, task_lock: TaskLock, now: datetime | None = None) -> bool:
+        now = now or datetime.now()
+        return (
+            task_lock.waiting
+            and task_lock.queue.empty()
+            and task_lock.status in (Status.done, Status.confirming)
+            and (now - task_lock.last_accessed).total_seconds() >= self.min_idle
+        )
+
+    def check(self, now: datetime | None = None) -> list[str]:
+        r"""Hibernate idle projects past the TTL or over the budget, returns their ids."""
+        now = now or datetime.now()
+        sizes = {id: estimate_memory(task_lock) for id, task_lock in list(task_locks.items())}
+        total = sum(sizes.values())
+        candidates = sorted(
+            (task_lock for task_lock in list(task_locks.values()) if not task_lock.hibernated and self.is_idle(task_lock, now)),
+            key=lambda task_lock: task_lock.last_accessed,
+        )
+        hibernated = []
+        for task_lock in candidates:
+            expired = (now - task_lock.last_accessed).total_seconds() >= self.idle_ttl
+            if not expired and total <= self.memory_budget:
+                break
+            try:
+                task_lock.hibernate(self.spill_path(task_lock.id))
+            except Exception as e:
+                logger.error(f"Failed to hibernate task lock: {e}", extra={"task_id": task_lock.id}, exc_info=True)
+                continue
+            total -= sizes.get(task_lock.id, 0)
+            hibernated.append(task_lock.id)
+        if hibernated:
+            logger.info(
+                "Idle projects hibernated",
+                extra={"count": len(hibernated), "estimated_memory": total, "memory_budget": self.memory_budget},
+            )
+        return hibernated
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        # Projects don't survive a restart, neither do their spilled histories
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Task lock eviction failed: {e}", exc_info=True)
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+task_lock_evictor = TaskLockEvictor()
@@ -0,0 +1,65 @@
+from camel.tasks import Task
+
+
+class TaskRegistry:
+    r"""Index of a project's camel tasks by id.
+
+    Maintained where tasks enter or leave the tree (decomposition, added and
+    edited subtasks, removed tasks) so lookups don't have to walk the tree.
+    Adding a task registers its whole subtree; removing one drops its
+    subtree. The registry holds the tasks for the lifetime of the project
+    and is cleared with its TaskLock.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, Task] = {}
+        self._parents: dict[str, str] = {}
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def add(self, task: Task, parent: Task | None = None) -> None:
+        parent = parent if parent is not None else task.parent
+        stack = [(task, parent)]
+        while stack:
+            item, item_parent = stack.pop()
+            self._tasks[item.id] = item
+            if item_parent is not None:
+                self._parents[item.id] = item_parent.id
+            else:
+                self._parents.pop(item.id, None)
+            stack.extend((subtask, item) for subtask in item.subtasks)
+
+    def add_all(self, tasks: list[Task], parent: Task | None = None) -> None:
+        for task in tasks:
+            self.add(task, parent)
+
+    def remove(self, id: str) -> None:
+        task = self._tasks.get(id)
+        if task is None:
+            return
+        stack = [task]
+        while stack:
+            item = stack.pop()
+            if self._tasks.get(item.id) is item:
+                del self._tasks[item.id]
+                self._parents.pop(item.id, None)
+            stack.extend(item.subtasks)
+
+    def get(self, id: str) -> Task | None:
+        return self._tasks.get(id)
+
+    def parent(self, id: str) -> Task | None:
+        parent_id = self._parents.get(id)
+        return self._tasks.get(parent_id) if parent_id is not None else None
+
+    def children(self, id: str) -> list[Task]:
+        task = self._tasks.get(id)
+        return list(task.subtasks) if task is not None else []
+
+    def clear(self) -> None:
+        self._tasks.clear()
+        self._parents.clear()
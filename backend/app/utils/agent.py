@@ -1,5 +1,6 @@
 import asyncio
 import contextvars
+import functools
 import json
 import os
 import platform
@@ -69,7 +70,6 @@ from camel.memories import AgentMemory
 from camel.messages import BaseMessage
 from camel.models import (
     BaseModelBackend,
-    ModelFactory,
     ModelManager,
     OpenAIAudioModels,
     ModelProcessingError,
@@ -80,6 +80,8 @@ from camel.toolkits import FunctionTool, RegisteredAgentToolkit
 from camel.types.agents import ToolCallingRecord
 from app.component.environment import env
 from app.utils.file_utils import get_working_directory
+from app.utils.mcp_manager import mcp_manager
+from app.utils.model_cache import model_backend_cache
 from app.utils.toolkit.abstract_toolkit import AbstractToolkit
 from app.utils.toolkit.hybrid_browser_toolkit import HybridBrowserToolkit
 from app.utils.toolkit.excel_toolkit import ExcelToolkit
@@ -110,7 +112,7 @@ from app.utils.toolkit.reddit_toolkit import RedditToolkit
 from app.utils.toolkit.slack_toolkit import SlackToolkit
 from app.utils.toolkit.lark_toolkit import LarkToolkit
 from camel.types import ModelPlatformType, ModelType
-from camel.toolkits import MCPToolkit, ToolkitMessageIntegration
+from camel.toolkits import ToolkitMessageIntegration
 import datetime
 from pydantic import BaseModel
 from app.model.chat import Chat, McpServers
@@ -125,8 +127,11 @@ from app.service.task import (
     ActionCreateAgentData,
     ActionDeactivateAgentData,
     ActionDeactivateToolkitData,
+    ActionNoticeData,
     Agents,
     get_task_lock,
+    get_task_lock_if_exists,
+    process_task,
 )
 from app.service.task import set_process_task
 
@@ -201,6 +206,8 @@ class ListenChatAgent(ChatAgent):
         )
         self.api_task_id = api_task_id
         self.agent_name = agent_name
+        self.tool_names: list[str] = []
+        """Tool names announced to the frontend in the create_agent event"""
 
     process_task_id: str = ""
 
@@ -704,6 +711,7 @@ class ListenChatAgent(ChatAgent):
         )
 
         new_agent.process_task_id = self.process_task_id
+        new_agent.tool_names = list(self.tool_names)
 
         # Copy memory if requested
         if with_memory:
@@ -799,7 +807,7 @@ def agent_model(
             )
             model_platform_enum = None
 
-    model = ModelFactory.create(
+    model = model_backend_cache.create(
         model_platform=options.model_platform,
         model_type=options.model_type,
         api_key=options.api_key,
@@ -809,7 +817,7 @@ def agent_model(
         **init_params,
     )
 
-    return ListenChatAgent(
+    agent = ListenChatAgent(
         options.project_id,
         agent_name,
         system_message,
@@ -821,6 +829,8 @@ def agent_model(
         enable_snapshot_clean=enable_snapshot_clean,
         stream_accumulate=False,
     )
+    agent.tool_names = tool_names or []
+    return agent
 
 
 @traceroot.trace()
@@ -1804,7 +1814,7 @@ async def mcp_agent(options: Chat):
     ]
     if len(options.installed_mcp["mcpServers"]) > 0:
         try:
-            mcp_tools = await get_mcp_tools(options.installed_mcp)
+            mcp_tools = await get_mcp_tools(options.installed_mcp, options.project_id)
             traceroot_logger.info(
                 f"Retrieved {len(mcp_tools)} MCP tools for task {options.project_id}"
             )
@@ -1844,7 +1854,7 @@ async def mcp_agent(options: Chat):
         options.project_id,
         Agents.mcp_agent,
         system_message="You are a helpful assistant that can help users search mcp servers. The found mcp services will be returned to the user, and you will ask the user via ask_human_via_gui whether they want to install these mcp services.",
-        model=ModelFactory.create(
+        model=model_backend_cache.create(
             model_platform=options.model_platform,
             model_type=options.model_type,
             api_key=options.api_key,
@@ -1915,8 +1925,47 @@ async def get_toolkits(tools: list[str], agent_name: str, api_task_id: str):
     return res
 
 
+def notify_mcp_failures(project_id: str, failed: dict[str, str]):
+    task_lock = get_task_lock_if_exists(project_id)
+    if task_lock is None:
+        return
+    details = "; ".join(f"{name}: {reason}" for name, reason in failed.items())
+    task_lock.put_queue_threadsafe(
+        ActionNoticeData(
+            process_task_id=process_task.get(project_id),
+            data=f"Some MCP servers could not be connected and were skipped ({details})",
+        )
+    )
+
+
+def notify_mcp_connecting(project_id: str, agent_name: str, server_name: str, tool_name: str):
+    task_lock = get_task_lock_if_exists(project_id)
+    if task_lock is None:
+        return
+    task_lock.put_queue_threadsafe(
+        ActionActivateToolkitData(
+            data={
+                "agent_name": agent_name,
+                "process_task_id": process_task.get(project_id),
+                "toolkit_name": server_name,
+                "method_name": tool_name,
+                "message": "connecting",
+            },
+        )
+    )
+
+
 @traceroot.trace()
-async def get_mcp_tools(mcp_server: McpServers):
+async def get_mcp_tools(
+    mcp_server: McpServers, owner: str | None = None, agent_name: str = Agents.mcp_agent
+):
+    r"""Borrow the tools of the given MCP servers from the shared connection manager.
+
+    ``owner`` (the project id) holds the servers until it is released in
+    ``TaskLock.cleanup``. Servers that fail or time out are left out and
+    reported to the owner's task as a notice. Servers connected lazily show
+    up as a "connecting" toolkit activation of ``agent_name`` on first use.
+    """
     traceroot_logger.info(
         f"Getting MCP tools for {len(mcp_server['mcpServers'])} servers"
     )
@@ -1934,15 +1983,18 @@ async def get_mcp_tools(mcp_server: McpServers):
                 "MCP_REMOTE_CONFIG_DIR", os.path.expanduser("~/.mcp-auth")
             )
 
-    mcp_toolkit = None
     try:
-        mcp_toolkit = MCPToolkit(config_dict=config_dict, timeout=180)
-        await mcp_toolkit.connect()
+        on_activate = None
+        if owner is not None:
+            on_activate = functools.partial(notify_mcp_connecting, owner, agent_name)
+        tools, failed = await mcp_manager.acquire(config_dict, owner, on_activate)
 
         traceroot_logger.info(
-            f"Successfully connected to MCP toolkit with {len(mcp_server['mcpServers'])} servers"
+            f"Borrowed MCP tools of {len(mcp_server['mcpServers']) - len(failed)} servers",
+            extra={**mcp_manager.stats(), "failed": list(failed)},
         )
-        tools = mcp_toolkit.get_tools()
+        if failed and owner is not None:
+            notify_mcp_failures(owner, failed)
         if tools:
             tool_names = [
                 (
@@ -0,0 +1,164 @@
+import datetime
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from app.component.environment import env
+from app.model.chat import Chat
+from app.service.task import ActionCreateAgentData, get_task_lock_if_exists
+from app.utils.agent import ListenChatAgent
+from app.utils.file_utils import get_working_directory
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("agent_pool")
+
+# Chat fields that change how agents, their model backend or their toolkits are built
+_CONFIG_FIELDS = {
+    "model_platform",
+    "model_type",
+    "api_key",
+    "api_url",
+    "extra_params",
+    "language",
+    "browser_port",
+    "max_retries",
+    "allow_local_system",
+    "bun_mirror",
+    "uvx_mirror",
+    "env_path",
+    "search_config",
+}
+
+
+class _Template:
+    def __init__(self, agent: ListenChatAgent, build_seconds: float) -> None:
+        self.agent = agent
+        self.build_seconds = build_seconds
+        self.created_at = time.monotonic()
+
+
+class AgentPool:
+    r"""Warm pool of workforce agent templates, cloned on demand.
+
+    Building a workforce agent creates its model backend and toolkits (and for
+    the developer agent a terminal venv). The first build for a key hands out
+    the new agent and keeps a pristine clone of it as template; later requests
+    clone the template, which reuses the model backend and only re-creates the
+    stateful toolkits.
+
+    Templates are keyed by project, agent name (which fixes the toolkit set),
+    working directory, date (both part of the system prompts) and a
+    fingerprint of the model and toolkit settings. They expire after
+    ``agent_pool_ttl`` seconds and at most ``agent_pool_max_templates`` are
+    kept (least recently used evicted first).
+    """
+
+    def __init__(self, ttl: float | None = None, max_templates: int | None = None) -> None:
+        self.ttl = ttl if ttl is not None else float(env("agent_pool_ttl", "1800"))
+        self.max_templates = (
+            max_templates if max_templates is not None else int(env("agent_pool_max_templates", "64"))
+        )
+        self._templates: OrderedDict[tuple, _Template] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    def key(self, options: Chat, agent_name: str) -> tuple:
+        config = json.dumps(options.model_dump(include=_CONFIG_FIELDS), sort_keys=True, default=str)
+        return (
+            options.project_id,
+            agent_name,
+            get_working_directory(options),
+            datetime.date.today().isoformat(),
+            hashlib.sha256(config.encode()).hexdigest(),
+        )
+
+    def get_or_build(self, key: tuple, build: Callable[[], ListenChatAgent]) -> ListenChatAgent:
+        agent = self._checkout(key)
+        if agent is not None:
+            return agent
+        started = time.perf_counter()
+        agent = build()
+        self._store(key, agent, time.perf_counter() - started)
+        return agent
+
+    async def aget_or_build(
+        self, key: tuple, build: Callable[[], Awaitable[ListenChatAgent]]
+    ) -> ListenChatAgent:
+        agent = self._checkout(key)
+        if agent is not None:
+            return agent
+        started = time.perf_counter()
+        agent = await build()
+        self._store(key, agent, time.perf_counter() - started)
+        return agent
+
+    def evict_project(self, project_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._templates if key[0] == project_id]:
+                del self._templates[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "hits": self.hits,
+                "misses": self.misses,
+                "seconds_saved": round(self.seconds_saved, 3),
+            }
+
+    def _checkout(self, key: tuple) -> ListenChatAgent | None:
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None and time.monotonic() - template.created_at > self.ttl:
+                del self._templates[key]
+                template = None
+            if template is None:
+                self.misses += 1
+                return None
+            self._templates.move_to_end(key)
+            self.hits += 1
+
+        started = time.perf_counter()
+        agent = template.agent.clone(with_memory=False)
+        clone_seconds = time.perf_counter() - started
+        with self._lock:
+            self.seconds_saved += max(template.build_seconds - clone_seconds, 0.0)
+        logger.debug(
+            "Agent cloned from warm pool",
+            extra={"agent_name": agent.agent_name, "build_seconds": template.build_seconds, "clone_seconds": clone_seconds},
+        )
+
+        # A fresh agent announces itself from agent_model, clones have to do it here
+        task_lock = get_task_lock_if_exists(agent.api_task_id)
+        if task_lock is not None:
+            task_lock.put_queue_threadsafe(
+                ActionCreateAgentData(
+                    data={
+                        "agent_name": agent.agent_name,
+                        "agent_id": agent.agent_id or str(uuid.uuid4()),
+                        "tools": agent.tool_names,
+                    }
+                )
+            )
+        return agent
+
+    def _store(self, key: tuple, agent: ListenChatAgent, build_seconds: float) -> None:
+        try:
+            # Cloned before first use so the template never carries memory or task state
+            template = _Template(agent.clone(with_memory=False), build_seconds)
+        except Exception as e:
+            logger.warning(f"Agent {agent.agent_name} can not be cloned, not pooling it: {e}")
+            return
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+
+
+agent_pool = AgentPool()
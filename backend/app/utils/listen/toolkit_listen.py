@@ -3,8 +3,6 @@ from functools import wraps
 from inspect import iscoroutinefunction, getmembers, ismethod, signature
 import json
 from typing import Any, Callable, Type, TypeVar
-import threading
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from app.service.task import (
@@ -19,63 +17,6 @@ from utils import traceroot_wrapper as traceroot
 logger = traceroot.get_logger("toolkit_listen")
 
 
-def _safe_put_queue(task_lock, data):
-    """Safely put data to the queue, handling both sync and async contexts"""
-    try:
-        # Try to get current event loop
-        loop = asyncio.get_running_loop()
-
-        # We're in an async context, create a task
-        task = asyncio.create_task(task_lock.put_queue(data))
-
-        if hasattr(task_lock, "add_background_task"):
-            task_lock.add_background_task(task)
-
-        # Add done callback to handle any exceptions
-        def handle_task_result(t):
-            try:
-                t.result()
-            except Exception as e:
-                logger.error(f"[SAFE_PUT_QUEUE] Background task failed: {e}")
-        task.add_done_callback(handle_task_result)
-
-    except RuntimeError:
-        # No running event loop, run in a separate thread
-        try:
-            import queue
-            result_queue = queue.Queue()
-
-            def run_in_thread():
-                try:
-                    new_loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(new_loop)
-                    try:
-                        new_loop.run_until_complete(task_lock.put_queue(data))
-                        result_queue.put(("success", None))
-                    except Exception as e:
-                        logger.error(f"[SAFE_PUT_QUEUE] put_queue failed: {e}")
-                        result_queue.put(("error", e))
-                    finally:
-                        new_loop.close()
-                except Exception as e:
-                    logger.error(f"[SAFE_PUT_QUEUE] Thread failed: {e}")
-                    result_queue.put(("error", e))
-
-            thread = threading.Thread(target=run_in_thread, daemon=False)
-            thread.start()
-
-            # Wait briefly for completion
-            try:
-                status, error = result_queue.get(timeout=1.0)
-                if status == "error":
-                    logger.error(f"[SAFE_PUT_QUEUE] Thread execution failed: {error}")
-            except queue.Empty:
-                logger.warning(f"[SAFE_PUT_QUEUE] Thread timeout after 1s for {data.__class__.__name__}")
-
-        except Exception as e:
-            logger.error(f"[SAFE_PUT_QUEUE] Failed to send data to queue: {e}")
-
-
 def listen_toolkit(
     wrap_method: Callable[..., Any] | None = None,
     inputs: Callable[..., str] | None = None,
@@ -241,7 +182,7 @@ def listen_toolkit(
                             "message": args_str,
                         },
                     )
-                    _safe_put_queue(task_lock, activate_data)
+                    task_lock.put_queue_threadsafe(activate_data)
 
                 error = None
                 res = None
@@ -287,7 +228,7 @@ def listen_toolkit(
                             "message": res_msg,
                         },
                     )
-                    _safe_put_queue(task_lock, deactivate_data)
+                    task_lock.put_queue_threadsafe(deactivate_data)
 
                 if error is not None:
                     raise error
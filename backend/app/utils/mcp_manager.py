@@ -0,0 +1,343 @@
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from typing import Callable
+from camel.toolkits import FunctionTool, MCPToolkit
+from app.component.environment import env
+from app.utils.mcp_schema_cache import McpSchemaCache
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("mcp_manager")
+
+
+def config_key(server_config: dict) -> str:
+    r"""Stable hash of one MCP server config, the server name is not part of it."""
+    return hashlib.sha256(json.dumps(server_config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class _Connection:
+    def __init__(self, key: str, name: str, server_config: dict, timeout: float) -> None:
+        self.key = key
+        self.name = name
+        self.timeout = timeout
+        # One toolkit per server; its tools look up the client session on every call,
+        # so tools handed out earlier keep working after a restart
+        self.toolkit = MCPToolkit(config_dict={"mcpServers": {name: copy.deepcopy(server_config)}}, timeout=timeout)
+        self.owners: set[str] = set()
+        self.last_used = time.monotonic()
+        self.ready = asyncio.Event()
+        self.closing = asyncio.Event()
+        self.error: BaseException | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.task is not None
+            and not self.task.done()
+            and self.ready.is_set()
+            and self.error is None
+            and self.toolkit.is_connected
+        )
+
+    def start(self) -> None:
+        self.ready = asyncio.Event()
+        self.closing = asyncio.Event()
+        self.error = None
+        self.task = asyncio.create_task(self._own(), name=f"mcp-{self.name}")
+
+    async def _own(self) -> None:
+        # The stdio/http transports are anyio contexts, which must be entered and
+        # exited by the same task, so this task holds the connection until closed
+        try:
+            await self.toolkit.connect()
+        except BaseException as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        try:
+            await self.closing.wait()
+        finally:
+            await self.toolkit.disconnect()
+
+    async def close(self) -> None:
+        if self.task is None:
+            return
+        self.closing.set()
+        try:
+            await self.task
+        except (asyncio.CancelledError, Exception) as e:
+            logger.debug(f"MCP server {self.name} closed with {e!r}")
+
+    async def ping(self) -> bool:
+        for client in self.toolkit.clients:
+            session = client.session
+            if session is None:
+                return False
+            await asyncio.wait_for(session.send_ping(), timeout=float(env("mcp_health_timeout", "10")))
+        return True
+
+
+class McpConnectionManager:
+    r"""Process-wide pool of connected MCP servers shared across tasks.
+
+    Servers are keyed by the hash of their config, so the same npx/uvx server
+    installed in several projects is spawned and handshaken once. Each server
+    gets at most ``mcp_connect_timeout`` seconds to come up. Each task
+    borrows the tools with ``acquire(mcp_servers, owner)`` and gives them back
+    with ``release(owner)``. A background loop pings borrowed servers every
+    ``mcp_health_interval`` seconds and restarts dead ones, and closes servers
+    nobody borrowed for ``mcp_idle_ttl`` seconds. The tool schemas of every
+    connected server are kept in an on-disk ``McpSchemaCache``.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float | None = None,
+        health_interval: float | None = None,
+        connect_timeout: float | None = None,
+        lazy: bool | None = None,
+        schema_cache: McpSchemaCache | None = None,
+    ) -> None:
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(env("mcp_idle_ttl", "600"))
+        self.health_interval = (
+            health_interval if health_interval is not None else float(env("mcp_health_interval", "60"))
+        )
+        self.connect_timeout = (
+            connect_timeout if connect_timeout is not None else float(env("mcp_connect_timeout", "60"))
+        )
+        self.lazy = lazy if lazy is not None else env("mcp_lazy_connect", "true").lower() == "true"
+        self.schemas = schema_cache if schema_cache is not None else McpSchemaCache()
+        self._connections: dict[str, _Connection] = {}
+        self._background: set[asyncio.Task] = set()
+        # When each config was last revalidated, retried once revalidate_after has passed
+        self._revalidated: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._maintenance: asyncio.Task | None = None
+
+    async def acquire(
+        self,
+        mcp_servers: dict,
+        owner: str | None = None,
+        on_activate: Callable[[str, str], None] | None = None,
+    ) -> tuple[list[FunctionTool], dict[str, str]]:
+        r"""Borrow the tools of all servers in ``mcp_servers`` for ``owner``.
+
+        Servers are connected concurrently, each bounded by its own connect
+        timeout, so one slow or broken server doesn't hold back the others.
+        Returns the tools of the servers that came up and the error of each
+        server that didn't, by server name. Without an owner the servers are
+        not held and close after the idle TTL like released ones.
+
+        With ``mcp_lazy_connect`` enabled, servers whose tool schemas are
+        already known and that are not connected are not started here; their
+        tools connect the server on first call, announced through
+        ``on_activate(server_name, tool_name)``.
+        """
+        names: list[str] = []
+        deferred: dict[str, list[dict]] = {}
+        for name, server_config in mcp_servers["mcpServers"].items():
+            connection = self._connections.get(config_key(server_config))
+            schemas = self.schemas.get(server_config) if self.lazy else None
+            if schemas is not None and not (connection is not None and connection.alive):
+                deferred[name] = schemas
+                if self.schemas.is_stale(server_config):
+                    self._revalidate(name, server_config)
+            else:
+                names.append(name)
+
+        results = await asyncio.gather(
+            *(self._connect(name, mcp_servers["mcpServers"][name]) for name in names),
+            return_exceptions=True,
+        )
+        borrowed: list[_Connection] = []
+        failed: dict[str, str] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                failed[name] = str(result) or type(result).__name__
+                logger.warning(f"MCP server {name} is not available: {result!r}")
+                continue
+            self._borrow(result, owner)
+            borrowed.append(result)
+
+        tools: list[FunctionTool] = []
+        seen: set[str] = set()
+
+        def add(tool: FunctionTool, server: str) -> None:
+            tool_name = tool.get_function_name()
+            if tool_name in seen:
+                logger.warning(f"Duplicate MCP tool {tool_name} from {server} skipped")
+                return
+            seen.add(tool_name)
+            tools.append(tool)
+
+        for connection in borrowed:
+            for tool in connection.toolkit.get_tools():
+                add(tool, connection.name)
+        for name, schemas in deferred.items():
+            for schema in schemas:
+                add(self._lazy_tool(name, mcp_servers["mcpServers"][name], schema, owner, on_activate), name)
+        if deferred:
+            logger.info("MCP servers deferred until first tool call", extra={"servers": list(deferred)})
+        return tools, failed
+
+    def _borrow(self, connection: _Connection, owner: str | None) -> None:
+        if owner is not None:
+            connection.owners.add(owner)
+        connection.last_used = time.monotonic()
+        self._ensure_maintenance()
+
+    def _lazy_tool(
+        self,
+        name: str,
+        server_config: dict,
+        schema: dict,
+        owner: str | None,
+        on_activate: Callable[[str, str], None] | None,
+    ) -> FunctionTool:
+        tool_name = schema["function"]["name"]
+        # Connections belong to this loop; tools may be called from worker threads
+        loop = asyncio.get_running_loop()
+
+        async def invoke(**kwargs):
+            connection = self._connections.get(config_key(server_config))
+            if on_activate is not None and not (connection is not None and connection.alive):
+                on_activate(name, tool_name)
+            connection = await self._connect(name, server_config)
+            self._borrow(connection, owner)
+            for tool in connection.toolkit.get_tools():
+                if tool.get_function_name() == tool_name:
+                    call = getattr(tool.func, "async_call", None)
+                    return await call(**kwargs) if call is not None else await tool.async_call(**kwargs)
+            raise RuntimeError(f"MCP server {name} no longer provides the tool {tool_name}")
+
+        async def lazy_mcp_call(**kwargs):
+            if asyncio.get_running_loop() is loop:
+                return await invoke(**kwargs)
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(invoke(**kwargs), loop))
+
+        lazy_mcp_call.__name__ = tool_name
+        lazy_mcp_call.__doc__ = schema["function"].get("description")
+        return FunctionTool(lazy_mcp_call, openai_tool_schema=schema)
+
+    def release(self, owner: str) -> None:
+        now = time.monotonic()
+        for connection in self._connections.values():
+            if owner in connection.owners:
+                connection.owners.discard(owner)
+                connection.last_used = now
+
+    async def check(self) -> None:
+        r"""Restart dead borrowed servers and close idle ones."""
+        now = time.monotonic()
+        for connection in list(self._connections.values()):
+            if not connection.owners:
+                if now - connection.last_used >= self.idle_ttl or not connection.alive:
+                    await self._drop(connection)
+                    logger.info("Closed idle MCP server", extra={"server": connection.name})
+                continue
+            healthy = connection.alive
+            if healthy:
+                try:
+                    healthy = await connection.ping()
+                except (asyncio.TimeoutError, Exception) as e:
+                    logger.warning(f"MCP server {connection.name} failed its health check: {e!r}")
+                    healthy = False
+            if not healthy:
+                await self._restart(connection)
+
+    def stats(self) -> dict:
+        return {
+            "servers": len(self._connections),
+            "borrowed": sum(1 for c in self._connections.values() if c.owners),
+        }
+
+    async def close(self) -> None:
+        for task in list(self._background):
+            task.cancel()
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            try:
+                await self._maintenance
+            except asyncio.CancelledError:
+                pass
+            self._maintenance = None
+        for connection in list(self._connections.values()):
+            await self._drop(connection)
+
+    async def _connect(self, name: str, server_config: dict) -> _Connection:
+        key = config_key(server_config)
+        async with self._lock:
+            connection = self._connections.get(key)
+            if connection is None:
+                connection = _Connection(key, name, server_config, self.connect_timeout)
+                self._connections[key] = connection
+                connection.start()
+            elif connection.ready.is_set() and not connection.alive:
+                logger.info("Restarting dead MCP server", extra={"server": connection.name})
+                await connection.close()
+                connection.start()
+        await connection.ready.wait()
+        if connection.error is not None:
+            async with self._lock:
+                if self._connections.get(key) is connection and not connection.owners:
+                    del self._connections[key]
+            raise connection.error
+        self.schemas.put(server_config, [tool.get_openai_tool_schema() for tool in connection.toolkit.get_tools()])
+        return connection
+
+    def _revalidate(self, name: str, server_config: dict) -> None:
+        # Connect in the background so a changed tool set replaces the cached one;
+        # the server then stays up for the idle TTL, ready for the first tool call
+        key = config_key(server_config)
+        now = time.monotonic()
+        last = self._revalidated.get(key)
+        if last is not None and now - last < self.schemas.revalidate_after:
+            return
+        self._revalidated[key] = now
+
+        async def revalidate():
+            try:
+                connection = await self._connect(name, server_config)
+                self._borrow(connection, None)
+            except Exception as e:
+                logger.warning(f"Revalidating the tools of MCP server {name} failed: {e!r}")
+
+        task = asyncio.create_task(revalidate())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _restart(self, connection: _Connection) -> None:
+        logger.info("Restarting MCP server", extra={"server": connection.name})
+        async with self._lock:
+            await connection.close()
+            connection.start()
+        await connection.ready.wait()
+        if connection.error is not None:
+            logger.error(f"MCP server {connection.name} could not be restarted: {connection.error!r}")
+
+    async def _drop(self, connection: _Connection) -> None:
+        async with self._lock:
+            if self._connections.get(connection.key) is connection:
+                del self._connections[connection.key]
+        await connection.close()
+
+    def _ensure_maintenance(self) -> None:
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.create_task(self._maintain())
+
+    async def _maintain(self) -> None:
+        while self._connections:
+            await asyncio.sleep(max(min(self.health_interval, self.idle_ttl), 1))
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"MCP maintenance failed: {e}", exc_info=True)
+
+
+mcp_manager = McpConnectionManager()
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from app.component.environment import env
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("mcp_schema_cache")
+
+
+def schema_key(server_config: dict) -> str:
+    r"""Cache key of an MCP server's tool list.
+
+    Built from the command, its args (which carry the package and, when
+    pinned, its version), the url of remote servers, an explicit ``version``
+    field and a hash of the env, so credentials are never written to disk.
+    """
+    env_hash = hashlib.sha256(
+        json.dumps(server_config.get("env") or {}, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    parts = {
+        "command": server_config.get("command"),
+        "args": server_config.get("args") or [],
+        "url": server_config.get("url"),
+        "version": server_config.get("version"),
+        "env": env_hash,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class McpSchemaCache:
+    r"""On-disk cache of the tool schemas each MCP server config exposes.
+
+    One JSON file per server config under ``mcp_schema_cache_dir``, holding
+    the OpenAI tool schemas and when the server last confirmed them. Entries
+    older than ``mcp_schema_revalidate_after`` seconds are reported stale so
+    callers can revalidate them in the background.
+    """
+
+    def __init__(self, path: str | Path | None = None, revalidate_after: float | None = None) -> None:
+        self.path = Path(
+            path or env("mcp_schema_cache_dir", os.path.expanduser("~/.eigent/cache/mcp_schemas"))
+        )
+        self.revalidate_after = (
+            revalidate_after if revalidate_after is not None else float(env("mcp_schema_revalidate_after", "86400"))
+        )
+        self._entries: dict[str, dict] = {}
+
+    def get(self, server_config: dict) -> list[dict] | None:
+        entry = self._entry(schema_key(server_config))
+        return entry["schemas"] if entry is not None else None
+
+    def is_stale(self, server_config: dict) -> bool:
+        entry = self._entry(schema_key(server_config))
+        return entry is None or time.time() - entry["validated_at"] > self.revalidate_after
+
+    def put(self, server_config: dict, schemas: list[dict]) -> bool:
+        r"""Store the schemas a connected server reported.
+
+        Returns True when they differ from the cached ones, i.e. the cached
+        tool set was invalidated.
+        """
+        key = schema_key(server_config)
+        previous = self._entry(key)
+        changed = previous is not None and previous["schemas"] != schemas
+        if changed:
+            logger.info("MCP server reported a different tool set, cache invalidated", extra={"key": key})
+        entry = {"schemas": schemas, "validated_at": time.time()}
+        self._entries[key] = entry
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path / f"{key}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path / f"{key}.json")
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to write MCP schema cache {self.path}: {e}")
+        return changed
+
+    def invalidate(self, server_config: dict) -> None:
+        key = schema_key(server_config)
+        self._entries.pop(key, None)
+        (self.path / f"{key}.json").unlink(missing_ok=True)
+
+    def _entry(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        file = self.path / f"{key}.json"
+        if not file.exists():
+            return None
+        try:
+            with open(file, encoding="utf-8") as f:
+                entry = json.load(f)
+            if not isinstance(entry.get("schemas"), list):
+                raise ValueError("schemas missing")
+            entry["validated_at"] = float(entry.get("validated_at", 0))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring corrupt MCP schema cache entry {file}: {e}")
+            return None
+        self._entries[key] = entry
+        return entry
@@ -0,0 +1,168 @@
+import hashlib
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+from camel.models import BaseModelBackend, ModelFactory
+from camel.types import ModelPlatformType
+from app.component.environment import env
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("model_cache")
+
+
+def _hash(value: str | None) -> str:
+    return hashlib.sha256((value or "").encode()).hexdigest()
+
+
+def _accepts_clients(model_platform: str) -> bool:
+    try:
+        model_class = ModelFactory._MODEL_PLATFORM_TO_CLASS_MAP.get(ModelPlatformType(model_platform))
+    except ValueError:
+        return False
+    if model_class is None:
+        return False
+    parameters = inspect.signature(model_class.__init__).parameters
+    return "client" in parameters and "async_client" in parameters
+
+
+class ModelBackendCache:
+    r"""Keyed cache of model backends shared by all agents of the process.
+
+    ``create`` takes the same arguments as ``ModelFactory.create``. Backends
+    are reused for identical platform, model, api key, url and config, which
+    is safe because agents already share backends when they are cloned.
+    Backends of the same upstream (platform, api key, url, timeout) that
+    differ only in their model config share one sync and one async HTTP
+    client, so concurrent agents multiplex over the same keep-alive
+    connections. At most ``model_backend_cache_size`` backends are kept
+    (least recently used evicted first).
+
+    When a different api key shows up for a platform and url, the entries of
+    the old key are dropped; ``invalidate`` drops entries explicitly. Model
+    logging and the OpenAI base url follow the current project's runtime
+    config (see ``use_runtime_config``) rather than os.environ.
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        self.max_size = max_size if max_size is not None else int(env("model_backend_cache_size", "32"))
+        self._backends: OrderedDict[tuple, BaseModelBackend] = OrderedDict()
+        # upstream key -> (sync client, async client)
+        self._clients: dict[tuple, tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        model_platform: str,
+        model_type: str,
+        api_key: str | None = None,
+        url: str | None = None,
+        model_config_dict: dict | None = None,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> BaseModelBackend:
+        if url is None and str(getattr(model_platform, "value", model_platform)) == ModelPlatformType.OPENAI.value:
+            url = env("OPENAI_API_BASE_URL")
+        # Backends read the log settings once, so each project's log dir gets its own backends
+        log_enabled = str(env("CAMEL_MODEL_LOG_ENABLED", "false")).lower() == "true"
+        log_dir = env("CAMEL_LOG_DIR", "camel_logs")
+        upstream = (str(model_platform), _hash(api_key), url, timeout, kwargs.get("max_retries"))
+        try:
+            key = (
+                *upstream,
+                str(model_type),
+                json.dumps(model_config_dict, sort_keys=True),
+                json.dumps(kwargs, sort_keys=True),
+                log_enabled,
+                log_dir,
+            )
+        except TypeError:
+            # Unserializable settings (e.g. a custom client) can't be keyed, don't cache
+            backend = ModelFactory.create(
+                model_platform=model_platform,
+                model_type=model_type,
+                api_key=api_key,
+                url=url,
+                model_config_dict=model_config_dict,
+                timeout=timeout,
+                **kwargs,
+            )
+            self._apply_log_settings(backend, log_enabled, log_dir)
+            return backend
+
+        with self._lock:
+            backend = self._backends.get(key)
+            if backend is not None:
+                self._backends.move_to_end(key)
+                return backend
+            self._drop_stale_keys(upstream)
+            clients = self._clients.get(upstream)
+
+        if clients is not None:
+            kwargs = {**kwargs, "client": clients[0], "async_client": clients[1]}
+        backend = ModelFactory.create(
+            model_platform=model_platform,
+            model_type=model_type,
+            api_key=api_key,
+            url=url,
+            model_config_dict=model_config_dict,
+            timeout=timeout,
+            **kwargs,
+        )
+        self._apply_log_settings(backend, log_enabled, log_dir)
+        logger.debug(
+            "Model backend created",
+            extra={"model_platform": str(model_platform), "model_type": str(model_type), "shared_client": clients is not None},
+        )
+
+        with self._lock:
+            backend = self._backends.setdefault(key, backend)
+            self._backends.move_to_end(key)
+            if (
+                upstream not in self._clients
+                and _accepts_clients(str(model_platform))
+                and getattr(backend, "_client", None) is not None
+                and getattr(backend, "_async_client", None) is not None
+            ):
+                self._clients[upstream] = (backend._client, backend._async_client)
+            while len(self._backends) > self.max_size:
+                evicted, _ = self._backends.popitem(last=False)
+                if not any(k[:5] == evicted[:5] for k in self._backends):
+                    self._clients.pop(evicted[:5], None)
+        return backend
+
+    @staticmethod
+    def _apply_log_settings(backend: BaseModelBackend, log_enabled: bool, log_dir: str) -> None:
+        # camel reads these from os.environ at construction; take the project's values instead
+        if hasattr(backend, "_log_dir"):
+            backend._log_enabled = log_enabled
+            backend._log_dir = log_dir
+
+    def invalidate(self, model_platform: str | None = None, url: str | None = None) -> None:
+        r"""Drop cached backends and clients, all of them or those of one platform/url."""
+        with self._lock:
+            for key in [
+                k for k in self._backends
+                if (model_platform is None or k[0] == str(model_platform)) and (url is None or k[2] == url)
+            ]:
+                del self._backends[key]
+            for upstream in [
+                u for u in self._clients
+                if (model_platform is None or u[0] == str(model_platform)) and (url is None or u[2] == url)
+            ]:
+                del self._clients[upstream]
+
+    def _drop_stale_keys(self, upstream: tuple) -> None:
+        # Same platform and url with another api key: the old key was replaced
+        platform, key_hash, url = upstream[:3]
+        stale = [k for k in self._backends if k[0] == platform and k[2] == url and k[1] != key_hash]
+        if stale:
+            logger.info("API key changed, dropping cached model backends", extra={"model_platform": platform, "count": len(stale)})
+        for k in stale:
+            del self._backends[k]
+        for u in [u for u in self._clients if u[0] == platform and u[2] == url and u[1] != key_hash]:
+            del self._clients[u]
+
+
+model_backend_cache = ModelBackendCache()
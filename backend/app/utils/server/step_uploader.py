@@ -0,0 +1,264 @@
+import asyncio
+import json
+import os
+import random
+from pathlib import Path
+import httpx
+from app.component.environment import env
+from app.utils.shard_router import shard_index
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("step_uploader")
+
+# Status codes that mean the request may succeed if tried again later
+RETRY_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class StepUploader:
+    r"""Process-wide uploader that ships chat steps to the server in batches.
+
+    Steps are buffered per task and flushed every ``flush_interval`` seconds or
+    as soon as a task has ``batch_size`` pending steps. Each flush posts one
+    array per task to the bulk endpoint over a single keep-alive
+    ``httpx.AsyncClient``, with at most ``max_concurrency`` requests in flight.
+    Transient failures are retried with exponential backoff; batches that still
+    fail are appended to an on-disk NDJSON spool. While the spool is not empty
+    new batches are appended behind it, so steps always reach the server in the
+    order they were produced once it is reachable again. Shard workers each
+    keep their own spool, suffixed with their shard index, which a restarted
+    worker of the same index replays.
+
+    Tunable with the ``step_upload_flush_interval``, ``step_upload_batch_size``,
+    ``step_upload_max_concurrency``, ``step_upload_max_retries`` and
+    ``step_upload_spool_path`` environment settings.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        flush_interval: float | None = None,
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        backoff_base: float = 0.5,
+        spool_path: str | Path | None = None,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.server_url = server_url.rstrip("/")
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(env("step_upload_flush_interval", "0.5"))
+        )
+        self.batch_size = batch_size if batch_size is not None else int(env("step_upload_batch_size", "100"))
+        self.max_concurrency = (
+            max_concurrency if max_concurrency is not None else int(env("step_upload_max_concurrency", "4"))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(env("step_upload_max_retries", "3"))
+        self.backoff_base = backoff_base
+        if spool_path is None:
+            spool_path = Path(env("step_upload_spool_path", os.path.expanduser("~/.eigent/cache/step_spool.ndjson")))
+            index = shard_index()
+            if index is not None:
+                spool_path = spool_path.with_name(f"{spool_path.stem}.shard-{index}{spool_path.suffix}")
+        self.spool_path = Path(spool_path)
+        self._client = client
+        self._buffers: dict[str, list[dict]] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._flusher: asyncio.Task | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._bulk_supported = True
+        self._closed = False
+
+    @property
+    def bulk_url(self) -> str:
+        return self.server_url + "/chat/steps/bulk"
+
+    @property
+    def single_url(self) -> str:
+        return self.server_url + "/chat/steps"
+
+    def add(self, task_id: str, step: str, data, timestamp: float) -> None:
+        r"""Queue a step for upload. Never blocks and never raises."""
+        buffer = self._buffers.setdefault(task_id, [])
+        buffer.append({"task_id": task_id, "step": step, "data": data, "timestamp": timestamp})
+        self._ensure_flusher()
+        if len(buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and not self._flusher.done():
+            return
+        # asyncio primitives are bound to the loop of the first use
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._closed = False
+        self._flusher = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Step upload flush failed: {type(e).__name__}: {e}", exc_info=True)
+
+    async def flush(self) -> None:
+        r"""Upload everything buffered so far, replaying the spool first."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._flush_lock:
+            batches = [rows for rows in self._buffers.values() if rows]
+            self._buffers = {}
+
+            if self._has_spool():
+                # Keep ordering: anything new goes behind the already spooled steps
+                if batches:
+                    await asyncio.to_thread(self._append_spool, [row for rows in batches for row in rows])
+                await self._replay_spool()
+                return
+
+            delivered = await asyncio.gather(*(self._send_limited(rows) for rows in batches))
+            failed = [row for rows, count in zip(batches, delivered) for row in rows[count:]]
+            if failed:
+                await asyncio.to_thread(self._append_spool, failed)
+
+    async def close(self) -> None:
+        r"""Flush pending steps (spooling what cannot be sent) and release the client."""
+        self._closed = True
+        if self._flusher is not None and not self._flusher.done():
+            self._wakeup.set()
+            try:
+                await self._flusher
+            except Exception:
+                pass
+        self._flusher = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60,
+                ),
+            )
+        return self._client
+
+    async def _send_limited(self, rows: list[dict]) -> int:
+        async with self._semaphore:
+            return await self._send(rows)
+
+    async def _send(self, rows: list[dict]) -> int:
+        r"""Post ``rows`` with retries and return how many leading rows were delivered."""
+        if self._bulk_supported:
+            delivered = await self._post(self.bulk_url, rows)
+            if delivered is not None:
+                return len(rows) if delivered else 0
+            logger.info("Server has no bulk step endpoint, falling back to single step uploads")
+            self._bulk_supported = False
+        for index, row in enumerate(rows):
+            if not await self._post(self.single_url, row):
+                return index
+        return len(rows)
+
+    async def _post(self, url: str, payload) -> bool | None:
+        r"""Returns ``None`` if the endpoint does not exist."""
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = await client.post(url, json=payload)
+            except httpx.TransportError as e:
+                logger.warning(f"Step upload to {url} failed (attempt {attempt + 1}): {type(e).__name__}: {e}")
+            else:
+                if res.status_code < 400:
+                    return True
+                if res.status_code in (404, 405) and url == self.bulk_url:
+                    return None
+                if res.status_code not in RETRY_STATUS:
+                    # The server rejected the data itself, resending it would fail forever
+                    logger.error(f"Step upload to {url} rejected with {res.status_code}: {res.text[:200]}")
+                    return True
+                logger.warning(f"Step upload to {url} got {res.status_code} (attempt {attempt + 1})")
+            if attempt < self.max_retries:
+                delay = self.backoff_base * (2**attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+        return False
+
+    def _has_spool(self) -> bool:
+        try:
+            return self.spool_path.stat().st_size > 0
+        except FileNotFoundError:
+            return False
+
+    def _append_spool(self, rows: list[dict]) -> None:
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        logger.warning(f"Spooled {len(rows)} steps to {self.spool_path}")
+
+    def _read_spool(self) -> list[dict]:
+        rows = []
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write, nothing to recover
+                    logger.warning(f"Skipping corrupt line in step spool {self.spool_path}")
+        return rows
+
+    def _rewrite_spool(self, rows: list[dict]) -> None:
+        if not rows:
+            self.spool_path.unlink(missing_ok=True)
+            return
+        tmp_path = self.spool_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+    async def _replay_spool(self) -> None:
+        rows = await asyncio.to_thread(self._read_spool)
+        sent = 0
+        while sent < len(rows):
+            batch = rows[sent : sent + self.batch_size]
+            delivered = await self._send(batch)
+            sent += delivered
+            if delivered < len(batch):
+                break
+        if sent:
+            logger.info(f"Replayed {sent} spooled steps, {len(rows) - sent} left")
+        await asyncio.to_thread(self._rewrite_spool, rows[sent:])
+
+
+_uploader: StepUploader | None = None
+
+
+def get_step_uploader(server_url: str) -> StepUploader:
+    r"""Return the process-wide uploader, recreating it if the server url changed."""
+    global _uploader
+    if _uploader is None or _uploader.server_url != server_url.rstrip("/"):
+        _uploader = StepUploader(server_url)
+    return _uploader
+
+
+async def close_step_uploader() -> None:
+    global _uploader
+    if _uploader is not None:
+        await _uploader.close()
+        _uploader = None
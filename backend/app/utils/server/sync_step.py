@@ -1,11 +1,10 @@
 import time
-import httpx
-import asyncio
-import os
 import json
+from app.model.chat import SseFrame
 from app.service.chat_service import Chat
 from app.component.environment import env
 from app.service.task import get_task_lock_if_exists
+from app.utils.server.step_uploader import get_step_uploader
 from utils import traceroot_wrapper as traceroot
 
 logger = traceroot.get_logger("sync_step")
@@ -14,63 +13,54 @@ logger = traceroot.get_logger("sync_step")
 def sync_step(func):
     async def wrapper(*args, **kwargs):
         server_url = env("SERVER_URL")
-        sync_url = server_url + "/chat/steps" if server_url else None
         async for value in func(*args, **kwargs):
             if not server_url:
                 yield value
                 continue
 
-            if isinstance(value, str) and value.startswith("data: "):
-                value_json_str = value[len("data: ") :].strip()
-            else:
-                value_json_str = value
-
-            try:
-                json_data = json.loads(value_json_str)
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON in sync_step: {e}. Value: {value_json_str}")
-                yield value
-                continue
+            task_id = _resolve_task_id(args)
+            if task_id:
+                uploader = get_step_uploader(server_url)
+                # A value can hold several coalesced SSE events, sync each one separately
+                for step, data in _events(value):
+                    uploader.add(task_id, step, data, time.time_ns() / 1_000_000_000)
+            yield value
 
-            if "step" not in json_data or "data" not in json_data:
-                logger.error(f"Missing 'step' or 'data' key in sync_step JSON. Keys: {list(json_data.keys())}")
-                yield value
-                continue
+    return wrapper
 
-            # Dynamic task_id extraction - prioritize runtime data over static args
-            chat: Chat = args[0] if args and hasattr(args[0], 'task_id') else None
-            task_id = None
 
-            if chat is not None:
-                task_lock = get_task_lock_if_exists(chat.project_id)
-                if task_lock is not None:
-                    task_id = task_lock.current_task_id \
-                        if hasattr(task_lock, 'current_task_id') and task_lock.current_task_id else chat.task_id
-                else:
-                    logger.warning(f"Task lock not found for project_id {chat.project_id}, using chat.task_id")
-                    task_id = chat.task_id
+def _resolve_task_id(args):
+    # Dynamic task_id extraction - prioritize runtime data over static args
+    chat: Chat = args[0] if args and hasattr(args[0], 'task_id') else None
+    if chat is None:
+        return None
 
-            if task_id:
-                asyncio.create_task(
-                    send_to_api(
-                        sync_url,
-                        {
-                            "task_id": task_id,
-                            "step": json_data["step"],
-                            "data": json_data["data"],
-                            "timestamp": time.time_ns() / 1_000_000_000,
-                        },
-                    )
-                )
-            yield value
+    task_lock = get_task_lock_if_exists(chat.project_id)
+    if task_lock is None:
+        logger.warning(f"Task lock not found for project_id {chat.project_id}, using chat.task_id")
+        return chat.task_id
+    return task_lock.current_task_id \
+        if hasattr(task_lock, 'current_task_id') and task_lock.current_task_id else chat.task_id
 
-    return wrapper
 
+def _events(value):
+    # Frames built by sse_json already carry their events, only plain strings need parsing
+    if isinstance(value, SseFrame):
+        return value.events
 
-async def send_to_api(url, data):
-    async with httpx.AsyncClient() as client:
+    events = []
+    for frame in value.split("\n\n") if isinstance(value, str) else [value]:
+        if not frame:
+            continue
+        if isinstance(frame, str) and frame.startswith("data: "):
+            frame = frame[len("data: ") :].strip()
         try:
-            res = await client.post(url, json=data)
-            # logger.info(res)
-        except Exception as e:
-            logger.error(f"Failed to sync step to {url}: {type(e).__name__}: {e}")
+            json_data = json.loads(frame)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON in sync_step: {e}. Value: {frame}")
+            continue
+        if "step" not in json_data or "data" not in json_data:
+            logger.error(f"Missing 'step' or 'data' key in sync_step JSON. Keys: {list(json_data.keys())}")
+            continue
+        events.append((json_data["step"], json_data["data"]))
+    return events
@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from app.component.environment import env
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("shard_router")
+
+# Set in the environment of worker processes, holds the worker's shard index
+SHARD_INDEX_ENV = "EIGENT_SHARD_INDEX"
+
+# Headers that belong to one connection and must not be forwarded
+HOP_BY_HOP = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+        "host",
+        "content-length",
+    }
+)
+
+
+def is_shard_worker() -> bool:
+    return SHARD_INDEX_ENV in os.environ
+
+
+def shard_index() -> int | None:
+    r"""Shard index of this worker process, None outside of shard workers."""
+    index = os.environ.get(SHARD_INDEX_ENV)
+    return int(index) if index is not None else None
+
+
+def shard_for(project_id: str, workers: int) -> int:
+    r"""Index of the worker owning ``project_id``.
+
+    Rendezvous hashing: every worker scores the project and the highest score
+    wins, so the owner only depends on the project and the worker count, and
+    changing the count only moves the projects of the added/removed workers.
+    """
+    return max(
+        range(workers),
+        key=lambda index: hashlib.sha256(f"{index}:{project_id}".encode()).digest(),
+    )
+
+
+def project_of(method: str, path: str, body: bytes) -> str | None:
+    r"""Project a request belongs to, None for requests not bound to a project.
+
+    ``POST /chat`` carries the project in its body, ``/chat/{id}/...`` and
+    ``/task/{id}/...`` in the path.
+    """
+    parts = path.strip("/").split("/")
+    if parts[0] not in ("chat", "task"):
+        return None
+    if len(parts) == 1:
+        if parts[0] != "chat" or method != "POST":
+            return None
+        try:
+            project_id = json.loads(body).get("project_id")
+        except (ValueError, AttributeError):
+            return None
+        return str(project_id) if project_id is not None else None
+    if parts == ["task", "stop-all"]:
+        return None
+    return parts[1]
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class ShardWorkers:
+    r"""The backend worker processes of the sharded mode.
+
+    Each worker is a plain ``uvicorn main:api`` on a free loopback port with
+    ``EIGENT_SHARD_INDEX`` set, so it serves the regular API for the projects
+    hashed to it. A worker that exited is restarted on its port the next time
+    a request is routed to it; the projects it held are lost, just like when
+    the single-process backend restarts.
+    """
+
+    def __init__(self, count: int, prefix: str = "", host: str = "127.0.0.1", start_timeout: float | None = None):
+        self.count = count
+        self.prefix = prefix
+        self.host = host
+        self.start_timeout = (
+            start_timeout if start_timeout is not None else float(env("backend_worker_start_timeout", "60"))
+        )
+        self.ports = [_free_port(host) for _ in range(count)]
+        self.urls = [f"http://{host}:{port}" for port in self.ports]
+        self._processes: list[subprocess.Popen | None] = [None] * count
+        self._locks = [asyncio.Lock() for _ in range(count)]
+
+    def _spawn(self, index: int) -> subprocess.Popen:
+        command = [
+            sys.executable, "-m", "uvicorn", "main:api",
+            "--host", self.host, "--port", str(self.ports[index]), "--loop", "asyncio",
+        ]
+        logger.info("Starting backend worker", extra={"shard": index, "port": self.ports[index]})
+        return subprocess.Popen(
+            command,
+            cwd=Path(__file__).resolve().parents[2],
+            env={**os.environ, SHARD_INDEX_ENV: str(index)},
+        )
+
+    async def _wait_ready(self, index: int) -> None:
+        deadline = time.monotonic() + self.start_timeout
+        async with httpx.AsyncClient(timeout=2) as client:
+            while True:
+                process = self._processes[index]
+                if process is None or process.poll() is not None:
+                    raise RuntimeError(f"Backend worker {index} exited during startup")
+                try:
+                    response = await client.get(f"{self.urls[index]}{self.prefix}/health")
+                    if response.status_code == 200:
+                        return
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Backend worker {index} did not become ready in {self.start_timeout}s")
+                await asyncio.sleep(0.2)
+
+    async def start(self) -> None:
+        for index in range(self.count):
+            self._processes[index] = self._spawn(index)
+        await asyncio.gather(*(self._wait_ready(index) for index in range(self.count)))
+        logger.info("All backend workers ready", extra={"workers": self.count})
+
+    async def ensure(self, index: int) -> None:
+        process = self._processes[index]
+        if process is not None and process.poll() is None:
+            return
+        async with self._locks[index]:
+            process = self._processes[index]
+            if process is not None and process.poll() is None:
+                return
+            logger.warning(
+                "Backend worker is not running, restarting",
+                extra={"shard": index, "returncode": process.returncode if process is not None else None},
+            )
+            self._processes[index] = self._spawn(index)
+            await self._wait_ready(index)
+
+    def stop(self, timeout: float = 10) -> None:
+        for process in self._processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning("Backend worker did not stop, killing it", extra={"shard": index})
+                process.kill()
+        self._processes = [None] * self.count
+
+
+def create_shard_app(workers: ShardWorkers, prefix: str = "", client: httpx.AsyncClient | None = None) -> FastAPI:
+    r"""Front app of the sharded mode.
+
+    Requests of a project (see ``project_of``) are forwarded to the worker
+    ``shard_for`` picks, everything else to worker 0, and ``DELETE
+    /task/stop-all`` to every worker. Responses, including the SSE stream of
+    ``POST /chat``, are streamed back as the worker produces them.
+    """
+    client = client or httpx.AsyncClient(timeout=httpx.Timeout(None, connect=10))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await workers.start()
+        try:
+            yield
+        finally:
+            await client.aclose()
+            await asyncio.to_thread(workers.stop)
+
+    app = FastAPI(title="Eigent Multi-Agent System API", lifespan=lifespan)
+    app.add_middleware(
+        CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+    )
+
+    async def forward(index: int, request: Request, body: bytes) -> httpx.Response:
+        await workers.ensure(index)
+        url = httpx.URL(workers.urls[index] + request.url.path, query=request.url.query.encode())
+        headers = [(k, v) for k, v in request.headers.raw if k.decode("latin-1").lower() not in HOP_BY_HOP]
+        upstream = client.build_request(request.method, url, headers=headers, content=body)
+        return await client.send(upstream, stream=True)
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"], include_in_schema=False)
+    async def route(request: Request, path: str):
+        body = await request.body()
+        route_path = request.url.path
+        if prefix and route_path.startswith(prefix):
+            route_path = route_path[len(prefix):]
+
+        if request.method == "DELETE" and route_path.rstrip("/") == "/task/stop-all":
+            responses = await asyncio.gather(
+                *(forward(index, request, body) for index in range(workers.count)), return_exceptions=True
+            )
+            status_code = 204
+            for index, response in enumerate(responses):
+                if isinstance(response, BaseException):
+                    logger.error(f"Stopping the tasks of backend worker {index} failed: {response!r}")
+                    status_code = 502
+                    continue
+                await response.aclose()
+                if response.status_code >= 400:
+                    status_code = response.status_code
+            return Response(status_code=status_code)
+
+        project_id = project_of(request.method, route_path, body)
+        index = shard_for(project_id, workers.count) if project_id is not None else 0
+        try:
+            response = await forward(index, request, body)
+        except httpx.TransportError as e:
+            logger.error(f"Backend worker {index} is unreachable: {e!r}")
+            return Response(status_code=502)
+
+        async def stream():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                # Closing the upstream stream lets the worker see the client went away
+                await response.aclose()
+
+        return StreamingResponse(
+            stream(),
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP},
+        )
+
+    return app
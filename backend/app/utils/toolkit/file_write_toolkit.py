@@ -5,7 +5,7 @@ from camel.toolkits import FileToolkit as BaseFileToolkit
 from app.component.environment import env
 from app.service.task import process_task
 from app.service.task import ActionWriteFileData, Agents, get_task_lock
-from app.utils.listen.toolkit_listen import auto_listen_toolkit, listen_toolkit, _safe_put_queue
+from app.utils.listen.toolkit_listen import auto_listen_toolkit, listen_toolkit
 from app.utils.toolkit.abstract_toolkit import AbstractToolkit
 
 
@@ -49,9 +49,8 @@ class FileToolkit(BaseFileToolkit, AbstractToolkit):
             # Capture ContextVar value before creating async task
             current_process_task_id = process_task.get("")
 
-            # Use _safe_put_queue to handle both sync and async contexts
-            _safe_put_queue(
-                task_lock,
+            # Hand off to the task loop, works from both sync and async contexts
+            task_lock.put_queue_threadsafe(
                 ActionWriteFileData(
                     process_task_id=current_process_task_id,
                     data=res.replace("Content successfully written to file: ", ""),
@@ -114,13 +114,11 @@ class HumanToolkit(BaseToolkit, AbstractToolkit):
             current_process_task_id = self.api_task_id
             logger.warning(f"[send_message_to_user] ContextVar process_task is empty, using api_task_id as fallback: '{current_process_task_id}'")
 
-        from app.utils.listen.toolkit_listen import _safe_put_queue
-
         notice_data = ActionNoticeData(
             process_task_id=current_process_task_id,
             data=f"{message_description}",
         )
-        _safe_put_queue(task_lock, notice_data)
+        task_lock.put_queue_threadsafe(notice_data)
 
         attachment_info = f" {message_attachment}" if message_attachment else ""
         return f"Message successfully sent to user: '{message_title} {message_description}{attachment_info}'"
@@ -2,7 +2,6 @@ from typing import Any, Dict, List, Literal
 from camel.toolkits import SearchToolkit as BaseSearchToolkit
 from camel.toolkits.function_tool import FunctionTool
 import httpx
-import os
 from app.component.environment import env, env_not_empty
 from app.service.task import Agents
 from app.utils.listen.toolkit_listen import auto_listen_toolkit, listen_toolkit
@@ -95,30 +94,95 @@ class SearchToolkit(BaseSearchToolkit, AbstractToolkit):
         # If user has configured their own Google API keys, use them
         if self._user_google_api_key and self._user_search_engine_id:
             logger.info("Using user-configured Google Search API")
-            # Temporarily set environment variables for this search
-            old_google_key = os.environ.get("GOOGLE_API_KEY")
-            old_search_id = os.environ.get("SEARCH_ENGINE_ID")
-
-            try:
-                os.environ["GOOGLE_API_KEY"] = self._user_google_api_key
-                os.environ["SEARCH_ENGINE_ID"] = self._user_search_engine_id
-                return super().search_google(query, search_type, number_of_result_pages, start_page)
-            finally:
-                # Restore original environment variables
-                if old_google_key is not None:
-                    os.environ["GOOGLE_API_KEY"] = old_google_key
-                elif "GOOGLE_API_KEY" in os.environ:
-                    del os.environ["GOOGLE_API_KEY"]
-
-                if old_search_id is not None:
-                    os.environ["SEARCH_ENGINE_ID"] = old_search_id
-                elif "SEARCH_ENGINE_ID" in os.environ:
-                    del os.environ["SEARCH_ENGINE_ID"]
+            # Keys are passed to the request directly, os.environ is shared by all projects
+            return self._search_google_with_keys(
+                self._user_google_api_key,
+                self._user_search_engine_id,
+                query,
+                search_type,
+                number_of_result_pages,
+                start_page,
+            )
         else:
             # Fallback to cloud search
             logger.info("Using cloud Google Search (no user configuration found)")
             return self.cloud_search_google(query, search_type, number_of_result_pages, start_page)
 
+    def _search_google_with_keys(
+        self,
+        google_api_key: str,
+        search_engine_id: str,
+        query: str,
+        search_type: str = "web",
+        number_of_result_pages: int = 10,
+        start_page: int = 1,
+    ) -> list[dict[str, Any]]:
+        """Same request and result shape as BaseSearchToolkit.search_google, with explicit keys."""
+        if not isinstance(start_page, int) or start_page < 1:
+            raise ValueError("start_page must be a positive integer")
+        if not isinstance(number_of_result_pages, int) or number_of_result_pages < 1:
+            raise ValueError("number_of_result_pages must be a positive integer")
+        if search_type not in ["web", "image"]:
+            raise ValueError("search_type must be either 'web' or 'image'")
+        # Google Custom Search API has a limit of 10 results per request
+        number_of_result_pages = min(number_of_result_pages, 10)
+
+        if self.exclude_domains:
+            query = f"{query} " + " ".join(f"-site:{domain}" for domain in self.exclude_domains)
+        params = {
+            "key": google_api_key,
+            "cx": search_engine_id,
+            "q": query,
+            "start": start_page,
+            "lr": "en",
+            "num": number_of_result_pages,
+        }
+        if search_type == "image":
+            params["searchType"] = "image"
+
+        try:
+            data = httpx.get("https://www.googleapis.com/customsearch/v1", params=params, timeout=self.timeout).json()
+        except Exception as e:
+            return [{"error": f"google search failed: {e!s}"}]
+        if "items" not in data:
+            if "error" in data:
+                logger.error(f"Google search failed - API response: {data['error']}")
+                return [{"error": f"Google search failed - API response: {data['error']}"}]
+            if "searchInformation" in data:
+                # No results is not an error
+                return []
+            logger.error(f"Unexpected Google API response format: {data}")
+            return [{"error": "Unexpected response format from Google API"}]
+
+        responses = []
+        for i, item in enumerate(data["items"], start=1):
+            if search_type == "image":
+                image_info = item.get("image", {})
+                response = {
+                    "result_id": i,
+                    "title": item.get("title"),
+                    "image_url": item.get("link"),
+                    "display_link": item.get("displayLink"),
+                    "context_url": image_info.get("contextLink", ""),
+                }
+                if image_info.get("width"):
+                    response["width"] = int(image_info["width"])
+                if image_info.get("height"):
+                    response["height"] = int(image_info["height"])
+            else:
+                metatags = item.get("pagemap", {}).get("metatags")
+                if not metatags:
+                    continue
+                response = {
+                    "result_id": i,
+                    "title": item.get("title"),
+                    "description": item.get("snippet"),
+                    "long_description": metatags[0].get("og:description", "N/A"),
+                    "url": item.get("link"),
+                }
+            responses.append(response)
+        return responses
+
     def cloud_search_google(
         self,
         query: str,
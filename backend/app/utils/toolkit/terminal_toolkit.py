@@ -1,13 +1,8 @@
-import asyncio
-import logging
 import os
 import platform
 import shutil
 import subprocess
-import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
 from camel.toolkits.terminal_toolkit import TerminalToolkit as BaseTerminalToolkit
 from camel.toolkits.terminal_toolkit.terminal_toolkit import _to_plain
 from app.component.environment import env
@@ -37,8 +32,6 @@ def get_terminal_base_venv_path() -> str:
 @auto_listen_toolkit(BaseTerminalToolkit)
 class TerminalToolkit(BaseTerminalToolkit, AbstractToolkit):
     agent_name: str = Agents.developer_agent
-    _thread_pool: Optional[ThreadPoolExecutor] = None
-    _thread_local = threading.local()
 
     def __init__(
         self,
@@ -70,12 +63,6 @@ class TerminalToolkit(BaseTerminalToolkit, AbstractToolkit):
             "agent_venv_dir": self._agent_venv_dir,
         })
 
-        if TerminalToolkit._thread_pool is None:
-            TerminalToolkit._thread_pool = ThreadPoolExecutor(
-                max_workers=1,
-                thread_name_prefix="terminal_toolkit"
-            )
-
         super().__init__(
             timeout=timeout,
             working_directory=working_directory,
@@ -254,8 +241,8 @@ class TerminalToolkit(BaseTerminalToolkit, AbstractToolkit):
         task_lock = get_task_lock(self.api_task_id)
         process_task_id = process_task.get("")
 
-        # Create the coroutine
-        coro = task_lock.put_queue(
+        # Output is written from shell reader threads, hand it to the task loop without blocking
+        task_lock.put_queue_threadsafe(
             ActionTerminalData(
                 action=Action.terminal,
                 process_task_id=process_task_id,
@@ -263,44 +250,6 @@ class TerminalToolkit(BaseTerminalToolkit, AbstractToolkit):
             )
         )
 
-        # Try to get the current event loop, if none exists, create a new one in a thread
-        try:
-            loop = asyncio.get_running_loop()
-            # If we're in an async context, schedule the coroutine
-            task = loop.create_task(coro)
-            if hasattr(task_lock, "add_background_task"):
-                task_lock.add_background_task(task)
-        except RuntimeError:
-            self._thread_pool.submit(self._run_coro_in_thread, coro,task_lock)
-
-    @staticmethod
-    def _run_coro_in_thread(coro,task_lock):
-        """
-        Execute coro in the thread pool, with each thread bound to a long-term event loop
-        """
-        if not hasattr(TerminalToolkit._thread_local, "loop"):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            TerminalToolkit._thread_local.loop = loop
-        else:
-            loop = TerminalToolkit._thread_local.loop
-
-        if loop.is_closed():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            TerminalToolkit._thread_local.loop = loop
-
-        try:
-            task = loop.create_task(coro)
-            if hasattr(task_lock, "add_background_task"):
-                task_lock.add_background_task(task)
-            loop.run_until_complete(task)
-        except Exception as e:
-            logging.error(
-                f"Failed to execute coroutine in thread pool: {str(e)}",
-                exc_info=True
-            )
-
     def shell_exec(
         self,
         command: str,
@@ -379,9 +328,3 @@ class TerminalToolkit(BaseTerminalToolkit, AbstractToolkit):
                     "path": initial_env_path,
                     "error": str(e)
                 })
-
-    @classmethod
-    def shutdown(cls):
-        if cls._thread_pool:
-            cls._thread_pool.shutdown(wait=True)
-            cls._thread_pool = None
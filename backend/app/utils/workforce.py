@@ -25,7 +25,9 @@ from app.service.task import (
     ActionTimeoutData,
     get_camel_task,
     get_task_lock,
+    get_task_lock_if_exists,
 )
+from app.service.task_registry import TaskRegistry
 from app.utils.single_agent_worker import SingleAgentWorker
 from utils import traceroot_wrapper as traceroot
 
@@ -257,6 +259,11 @@ class Workforce(BaseWorkforce):
             task.subtasks = [fallback_task]
             subtasks = [fallback_task]
 
+        registry = self._task_registry()
+        if registry is not None:
+            registry.add(task)
+            registry.add_all(subtasks, task)
+
         if on_stream_batch:
             try:
                 on_stream_batch(subtasks, True)
@@ -266,6 +273,24 @@ class Workforce(BaseWorkforce):
         logger.debug(f"[DECOMPOSE] handle_decompose_append_task completed, returned {len(subtasks)} subtasks")
         return subtasks
 
+    def add_task(self, *args, **kwargs) -> Task:
+        task = super().add_task(*args, **kwargs)
+        registry = self._task_registry()
+        if registry is not None:
+            registry.add(task)
+        return task
+
+    def remove_task(self, task_id: str) -> bool:
+        removed = super().remove_task(task_id)
+        registry = self._task_registry()
+        if removed and registry is not None:
+            registry.remove(task_id)
+        return removed
+
+    def _task_registry(self) -> TaskRegistry | None:
+        task_lock = get_task_lock_if_exists(self.api_task_id)
+        return task_lock.task_registry if task_lock is not None else None
+
     def _get_agent_id_from_node_id(self, node_id: str) -> str | None:
         """Map worker node_id to the actual agent_id for frontend communication.
 
@@ -292,7 +317,7 @@ class Workforce(BaseWorkforce):
             if self._task and item.task_id == self._task.id:
                 continue
             # Find task content
-            task_obj = get_camel_task(item.task_id, tasks)
+            task_obj = get_camel_task(item.task_id, tasks, task_lock.task_registry)
             if task_obj is None:
                 logger.warning(
                     f"[WF] WARN: Task {item.task_id} not found in tasks list during ASSIGN phase. This may indicate a task tree inconsistency."
@@ -0,0 +1,67 @@
+"""Lookups per second of ``env()`` with a user env file, from the parsed
+file cache versus re-parsing the file on every lookup as before.
+
+A temporary ``.env`` with ``--keys`` keys is set as the user env path, then
+``--lookups`` lookups alternate between a key of the file and one only in
+the process environment, like toolkits reading their settings do.
+
+    cd backend
+    python benchmarks/env_lookup.py
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+_backend_root = pathlib.Path(__file__).resolve().parent.parent
+for _path in (_backend_root, _backend_root.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from dotenv import dotenv_values  # noqa: E402
+from app.component.environment import env, get_current_env_path, set_user_env_path  # noqa: E402
+
+
+def env_uncached(key: str, default=None):
+    # What env() did before the cache: parse the user's file on every lookup
+    user_env_values = dotenv_values(get_current_env_path())
+    if key in user_env_values:
+        return user_env_values[key] or default
+    return os.getenv(key, default)
+
+
+def timed(lookup, keys: list[str], lookups: int) -> float:
+    start = time.perf_counter()
+    for i in range(lookups):
+        lookup(keys[i % len(keys)])
+    return lookups / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=40)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env_path = os.path.join(tmp, ".env")
+        with open(env_path, "w") as f:
+            for i in range(args.keys):
+                f.write(f"BENCH_KEY_{i}=value-{i}\n")
+        os.environ["BENCH_PROCESS_KEY"] = "process"
+        set_user_env_path(env_path)
+        keys = ["BENCH_KEY_0", "BENCH_PROCESS_KEY"]
+
+        before = timed(env_uncached, keys, args.lookups)
+        after = timed(env, keys, args.lookups)
+        print(f"{args.lookups} lookups, {args.keys} keys in the user env file")
+        print(f"{'parse per lookup':<20}{before:>12.0f} lookups/s")
+        print(f"{'parsed file cache':<20}{after:>12.0f} lookups/s")
+        set_user_env_path(None)
+
+
+if __name__ == "__main__":
+    main()
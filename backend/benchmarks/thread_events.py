@@ -0,0 +1,74 @@
+"""Events per second handed from a worker thread to a project's queue,
+through ``TaskLock.put_queue_threadsafe`` versus the previous per-event
+thread and event loop of ``_safe_put_queue``.
+
+A worker thread, standing in for a sync tool, sends ``--events`` notice
+events while the project's loop consumes them, and the run is timed until
+the last one is received.
+
+    cd backend
+    python benchmarks/thread_events.py
+"""
+
+import argparse
+import asyncio
+import pathlib
+import queue
+import sys
+import threading
+import time
+
+_backend_root = pathlib.Path(__file__).resolve().parent.parent
+for _path in (_backend_root, _backend_root.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from app.service.event_queue import EventQueue  # noqa: E402
+from app.service.task import ActionNoticeData, TaskLock  # noqa: E402
+
+
+def put_with_new_loop(task_lock: TaskLock, data: ActionNoticeData) -> None:
+    # What _safe_put_queue did outside of a loop: a thread and an event loop per event, waited for up to 1s
+    result = queue.Queue()
+
+    def run_in_thread():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(task_lock.put_queue(data))
+        finally:
+            loop.close()
+        result.put(None)
+
+    threading.Thread(target=run_in_thread).start()
+    result.get(timeout=1.0)
+
+
+async def run(events: int, put) -> float:
+    task_lock = TaskLock("bench", EventQueue(), {})
+
+    def produce():
+        for i in range(events):
+            put(task_lock, ActionNoticeData(process_task_id="1", data=f"event {i}"))
+
+    start = time.perf_counter()
+    producer = asyncio.create_task(asyncio.to_thread(produce))
+    for _ in range(events):
+        await task_lock.get_queue()
+    await producer
+    return events / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+
+    before = asyncio.run(run(args.events, put_with_new_loop))
+    after = asyncio.run(run(args.events, TaskLock.put_queue_threadsafe))
+    print(f"{args.events} events from a worker thread")
+    print(f"{'thread and loop per event':<28}{before:>12.0f} events/s")
+    print(f"{'put_queue_threadsafe':<28}{after:>12.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
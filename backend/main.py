@@ -22,6 +22,7 @@ if traceroot.is_enabled():
 # 2) Now safe to import modules that use traceroot.get_logger() at import-time
 from app.component.environment import env
 from app.router import register_routers
+from app.utils.shard_router import ShardWorkers, create_shard_app, is_shard_worker  # noqa: E402
 
 
 os.environ["PYTHONIOENCODING"] = "utf-8"
@@ -34,9 +35,16 @@ app_logger.info(f"Python encoding: {os.environ.get('PYTHONIOENCODING')}")
 app_logger.info(f"Environment: {os.environ.get('ENVIRONMENT', 'development')}")
 
 prefix = env("url_prefix", "")
-app_logger.info(f"Loading routers with prefix: '{prefix}'")
-register_routers(api, prefix)
-app_logger.info("All routers loaded successfully")
+backend_workers = int(env("backend_workers", "1"))
+sharded_front = backend_workers > 1 and not is_shard_worker()
+if sharded_front:
+    # Sharded mode: this process only routes, each project lives in one of the workers
+    app_logger.info(f"Routing projects to {backend_workers} backend worker processes")
+    api = create_shard_app(ShardWorkers(backend_workers, prefix), prefix)
+else:
+    app_logger.info(f"Loading routers with prefix: '{prefix}'")
+    register_routers(api, prefix)
+    app_logger.info("All routers loaded successfully")
 
 # Check if debug mode is enabled via environment variable
 if os.environ.get('ENABLE_PYTHON_DEBUG') == 'true':
@@ -68,9 +76,16 @@ async def write_pid_file():
     app_logger.info(f"PID file written: {os.getpid()}")
 
 
-# Create task to write PID
-pid_task = asyncio.create_task(write_pid_file())
-app_logger.info("PID write task created")
+# Create task to write PID, the PID file belongs to the front process in sharded mode
+if not is_shard_worker():
+    pid_task = asyncio.create_task(write_pid_file())
+    app_logger.info("PID write task created")
+
+# Hibernate idle projects, the front process of the sharded mode holds none
+if not sharded_front:
+    from app.service.task_eviction import task_lock_evictor
+
+    task_lock_evictor.start()
 
 # Graceful shutdown handler
 shutdown_event = asyncio.Event()
@@ -97,9 +112,29 @@ async def cleanup_resources():
         except Exception as e:
             app_logger.error(f"Error cleaning up task {task_id}: {e}")
 
+    from app.service.task_eviction import task_lock_evictor
+
+    await task_lock_evictor.close()
+
+    # Upload (or spool) steps still waiting to be synced to the server
+    from app.utils.server.step_uploader import close_step_uploader
+
+    try:
+        await close_step_uploader()
+    except Exception as e:
+        app_logger.error(f"Error flushing step uploads: {e}")
+
+    # Stop the shared MCP server processes
+    from app.utils.mcp_manager import mcp_manager
+
+    try:
+        await mcp_manager.close()
+    except Exception as e:
+        app_logger.error(f"Error closing MCP servers: {e}")
+
     # Remove PID file
     pid_file = dir / "run.pid"
-    if pid_file.exists():
+    if pid_file.exists() and not is_shard_worker():
         pid_file.unlink()
 
     app_logger.info("All resources cleaned up successfully")
@@ -121,7 +156,7 @@ def sync_cleanup():
     try:
         # Only perform synchronous cleanup tasks
         pid_file = dir / "run.pid"
-        if pid_file.exists():
+        if pid_file.exists() and not is_shard_worker():
             pid_file.unlink()
             app_logger.info("PID file removed during shutdown")
     except Exception as e:
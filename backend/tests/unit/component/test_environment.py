@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app.component import environment
+from app.component.environment import (
+    RuntimeConfig,
+    env,
+    reset_runtime_config,
+    set_user_env_path,
+    use_runtime_config,
+)
+from app.utils.model_cache import ModelBackendCache
+
+
+@pytest.fixture
+def user_env(tmp_path):
+    env_path = tmp_path / ".env"
+    env_path.write_text("file_save_path=/tmp/first\n")
+    set_user_env_path(str(env_path))
+    yield env_path
+    set_user_env_path(None)
+
+
+@pytest.mark.unit
+class TestEnv:
+    """Test cases for env lookups from the user's env file."""
+
+    def test_repeated_lookups_parse_once(self, user_env):
+        """The env file is parsed once while it is unchanged."""
+        environment._env_file_cache.clear()
+        with patch("dotenv.dotenv_values", return_value={"file_save_path": "/tmp/first"}) as parse:
+            for _ in range(5):
+                assert env("file_save_path") == "/tmp/first"
+
+        assert parse.call_count == 1
+
+    def test_changed_file_is_reparsed(self, user_env):
+        """Edits to the env file are picked up by the next lookup."""
+        assert env("file_save_path") == "/tmp/first"
+
+        user_env.write_text("file_save_path=/tmp/second/path\n")
+        stat = os.stat(user_env)
+        os.utime(user_env, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert env("file_save_path") == "/tmp/second/path"
+
+    def test_missing_key_falls_back_to_process_env(self, user_env, monkeypatch):
+        """Keys not in the user's file come from os.environ or the default."""
+        monkeypatch.setenv("only_in_process", "yes")
+
+        assert env("only_in_process") == "yes"
+        assert env("nowhere", "default") == "default"
+
+
+@pytest.fixture
+def stub_model_server():
+    """OpenAI-compatible chat completion server recording the api key of each request."""
+    seen_keys = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            api_key = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            seen_keys.append(api_key)
+            body = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub",
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": f"reply for {api_key}"},
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v1", seen_keys
+    server.shutdown()
+
+
+@pytest.mark.unit
+class TestRuntimeConfig:
+    """Test cases for per-project runtime configuration."""
+
+    def test_runtime_config_takes_precedence(self, monkeypatch):
+        """Values of the active project shadow os.environ and are reset afterwards."""
+        monkeypatch.setenv("browser_port", "9222")
+        token = use_runtime_config(RuntimeConfig({"browser_port": "9333"}))
+        try:
+            assert env("browser_port") == "9333"
+        finally:
+            reset_runtime_config(token)
+
+        assert env("browser_port") == "9222"
+
+    @pytest.mark.asyncio
+    async def test_projects_run_concurrently_with_isolated_settings(self, stub_model_server, tmp_path):
+        """Several projects in one process each see only their own settings and keys."""
+        url, seen_keys = stub_model_server
+        cache = ModelBackendCache(max_size=16)
+
+        async def run_project(index: int):
+            log_dir = str(tmp_path / f"project_{index}")
+            use_runtime_config(RuntimeConfig({
+                "file_save_path": f"/tmp/project_{index}",
+                "CAMEL_LOG_DIR": log_dir,
+                "CAMEL_MODEL_LOG_ENABLED": "false",
+            }))
+            backend = cache.create("openai-compatible-model", "gpt-4o-mini", api_key=f"key-{index}", url=url, timeout=30)
+            # Interleave with the other projects before and after the model call
+            await asyncio.sleep(0.01 * (5 - index))
+            response = await backend.arun([{"role": "user", "content": "hi"}])
+            await asyncio.sleep(0.01 * index)
+            return env("file_save_path"), backend._log_dir, response.choices[0].message.content
+
+        results = await asyncio.gather(*(asyncio.create_task(run_project(i)) for i in range(5)))
+
+        for index, (file_save_path, log_dir, reply) in enumerate(results):
+            assert file_save_path == f"/tmp/project_{index}"
+            assert log_dir == str(tmp_path / f"project_{index}")
+            assert reply == f"reply for key-{index}"
+        assert sorted(seen_keys) == [f"key-{i}" for i in range(5)]
+        assert env("file_save_path") != "/tmp/project_0"
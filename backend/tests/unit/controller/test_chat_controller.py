@@ -42,7 +42,7 @@ class TestChatController:
 
     @pytest.mark.asyncio
     async def test_post_chat_sets_environment_variables(self, sample_chat_data, mock_request, mock_task_lock):
-        """Test that environment variables are properly set."""
+        """Test that the project's environment settings are properly set."""
         chat_data = Chat(**sample_chat_data)
         
         with patch("app.controller.chat_controller.create_task_lock", return_value=mock_task_lock), \
@@ -59,11 +59,13 @@ class TestChatController:
             
             await post(chat_data, mock_request)
             
-            # Check environment variables were set
-            assert os.environ.get("OPENAI_API_KEY") == "test_key"
-            assert os.environ.get("OPENAI_API_BASE_URL") == "https://api.openai.com/v1"
-            assert os.environ.get("CAMEL_MODEL_LOG_ENABLED") == "true"
-            assert os.environ.get("browser_port") == "8080"
+            # Check the project's runtime config was set instead of os.environ
+            config = mock_task_lock.runtime_config.values
+            assert config.get("OPENAI_API_KEY") == "test_key"
+            assert config.get("OPENAI_API_BASE_URL") == "https://api.openai.com/v1"
+            assert config.get("CAMEL_MODEL_LOG_ENABLED") == "true"
+            assert config.get("browser_port") == "8080"
+            assert "OPENAI_API_KEY" not in os.environ
 
     def test_improve_chat_success(self, mock_task_lock):
         """Test successful chat improvement."""
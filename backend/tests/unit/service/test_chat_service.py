@@ -205,13 +205,13 @@ class TestCollectPreviousTaskContext:
         assert "Previous Task:" not in result
         assert "Previous Task Result:" not in result
 
-    @patch('app.service.chat_service.logger')
+    @patch('app.service.file_index.logger')
     def test_collect_previous_task_context_file_system_error(self, mock_logger, temp_dir):
         """Test collect_previous_task_context handles file system errors gracefully."""
         working_directory = str(temp_dir)
         
-        # Mock os.walk to raise an exception
-        with patch('os.walk', side_effect=PermissionError("Access denied")):
+        # Mock os.scandir to raise an exception
+        with patch('os.scandir', side_effect=PermissionError("Access denied")):
             result = collect_previous_task_context(
                 working_directory=working_directory,
                 previous_task_content="Test task",
@@ -874,11 +874,11 @@ class TestChatServiceErrorCases:
     """Test error cases and edge conditions for chat service."""
 
     def test_collect_previous_task_context_os_walk_exception(self, temp_dir):
-        """Test collect_previous_task_context handles os.walk exceptions."""
+        """Test collect_previous_task_context handles directory listing exceptions."""
         working_directory = str(temp_dir)
         
-        with patch('os.walk', side_effect=OSError("Permission denied")):
-            with patch('app.service.chat_service.logger') as mock_logger:
+        with patch('os.scandir', side_effect=OSError("Permission denied")):
+            with patch('app.service.file_index.logger') as mock_logger:
                 result = collect_previous_task_context(
                     working_directory=working_directory,
                     previous_task_content="Test task",
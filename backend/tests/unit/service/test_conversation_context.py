@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.service.conversation_context import ConversationContext, estimate_tokens
+from app.service.task import TaskLock
+
+
+@pytest.mark.unit
+class TestConversationContext:
+    """Test cases for the incremental conversation context."""
+
+    def test_tracks_running_length(self):
+        """Totals grow with each appended entry."""
+        conversation = ConversationContext()
+        conversation.append('assistant', 'hello')
+        conversation.append('task_result', {'task_content': 'do it', 'task_result': 'done', 'working_directory': '/w'})
+
+        rendered = "Assistant: hello\n\nPrevious Task: do it\nPrevious Task Result: done\n\n"
+        assert conversation.render() == rendered
+        assert conversation.total_length == len(rendered)
+        assert conversation.working_directories == ['/w']
+
+    def test_only_new_entries_are_rendered(self, monkeypatch):
+        """Entries rendered once are never rendered again."""
+        rendered = []
+
+        def fake_render(entry):
+            rendered.append(entry['content'])
+            return entry['content']
+
+        monkeypatch.setattr("app.service.conversation_context.render_entry", fake_render)
+        conversation = ConversationContext()
+        conversation.append('assistant', 'a')
+        conversation.render()
+        conversation.append('assistant', 'b')
+
+        assert conversation.render() == "ab"
+        assert rendered == ['a', 'b']
+
+    def test_render_windows_to_budget(self):
+        """Only the most recent entries that fit the token budget are rendered."""
+        conversation = ConversationContext(max_tokens=estimate_tokens("Assistant: bbbb\n\n") * 2)
+        for content in ['aaaa', 'bbbb', 'cccc']:
+            conversation.append('assistant', content)
+
+        text = conversation.render()
+
+        assert text.startswith("[1 earlier conversation entries omitted")
+        assert "aaaa" not in text
+        assert text.endswith("Assistant: bbbb\n\nAssistant: cccc\n\n")
+
+    def test_replacing_history_resets_cache(self):
+        """Assigning a new history list on the TaskLock rebuilds the context."""
+        task_lock = TaskLock("test_123", asyncio.Queue(), {})
+        task_lock.add_conversation('assistant', 'old')
+        assert task_lock.conversation.total_length > 0
+
+        task_lock.conversation_history = [{'role': 'assistant', 'content': 'new'}]
+
+        assert task_lock.conversation.render() == "Assistant: new\n\n"
+
+    def test_render_truncates_oversized_newest_entry(self):
+        """An over-budget newest entry is truncated instead of leaving the window empty."""
+        conversation = ConversationContext(max_tokens=5)
+        conversation.append('assistant', 'short')
+        conversation.append('assistant', 'x' * 100)
+
+        text = conversation.render()
+
+        assert text.startswith("[1 earlier conversation entries omitted")
+        assert "short" not in text
+        assert "Assistant: " + "x" * 9 + "\n[entry truncated" in text
+        assert "x" * 10 not in text
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from app.service.event_pipeline import EventPipeline
+from app.service.event_queue import EventQueue
+from app.service.task import (
+    Action,
+    ActionAskData,
+    ActionDecomposeTextData,
+    ActionEndData,
+    ActionTerminalData,
+    TaskLock,
+)
+
+
+def _events(frame: str) -> list[dict]:
+    return [json.loads(part[len("data: "):]) for part in frame.split("\n\n") if part]
+
+
+@pytest.mark.unit
+class TestEventPipeline:
+    """Test cases for the SSE coalescing pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_non_coalescible_action_passes_through(self):
+        """Latency-critical actions are returned immediately without a frame."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        await task_lock.put_queue(ActionEndData())
+
+        frame, item = await EventPipeline(flush_interval=0.05).next(task_lock)
+
+        assert frame == ""
+        assert item.action == Action.end
+
+    @pytest.mark.asyncio
+    async def test_merges_consecutive_terminal_chunks(self):
+        """Terminal chunks of the same process task are merged into one event."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        await task_lock.put_queue(ActionTerminalData(process_task_id="1", data="a"))
+        await task_lock.put_queue(ActionTerminalData(process_task_id="1", data="b"))
+        await task_lock.put_queue(ActionTerminalData(process_task_id="2", data="c"))
+
+        frame, item = await EventPipeline(flush_interval=0.01).next(task_lock)
+
+        assert item is None
+        assert _events(frame) == [
+            {"step": "terminal", "data": {"output": "ab", "process_task_id": "1"}},
+            {"step": "terminal", "data": {"output": "c", "process_task_id": "2"}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_merges_decompose_text_deltas(self):
+        """Decompose text deltas for the same task are concatenated."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        for chunk in ["Hel", "lo"]:
+            await task_lock.put_queue(
+                ActionDecomposeTextData(data={"project_id": "p", "task_id": "t", "content": chunk})
+            )
+
+        frame, _ = await EventPipeline(flush_interval=0.01).next(task_lock)
+
+        assert _events(frame) == [
+            {"step": "decompose_text", "data": {"project_id": "p", "task_id": "t", "content": "Hello"}}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_flushes_before_latency_critical_action(self):
+        """A pending batch is flushed as soon as a non-coalescible action arrives."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        await task_lock.put_queue(ActionTerminalData(process_task_id="1", data="out"))
+        await task_lock.put_queue(ActionAskData(data={"question": "q", "agent": "a"}))
+
+        frame, item = await EventPipeline(flush_interval=10).next(task_lock)
+
+        assert len(_events(frame)) == 1
+        assert item.action == Action.ask
+
+    @pytest.mark.asyncio
+    async def test_max_events_bounds_batch(self):
+        """The batch is flushed once max_events is reached."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        for i in range(3):
+            await task_lock.put_queue(ActionTerminalData(process_task_id=str(i), data="x"))
+
+        frame, item = await EventPipeline(flush_interval=10, max_events=2).next(task_lock)
+
+        assert item is None
+        assert len(_events(frame)) == 2
+        assert task_lock.queue.qsize() == 1
+
+    @pytest.mark.asyncio
+    async def test_passthrough_actions_opt_out(self):
+        """Actions configured as passthrough are not buffered."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        await task_lock.put_queue(ActionTerminalData(process_task_id="1", data="x"))
+
+        frame, item = await EventPipeline(flush_interval=10, passthrough_actions=[Action.terminal]).next(task_lock)
+
+        assert frame == ""
+        assert item.action == Action.terminal
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+from app.service.file_index import WorkingDirectoryIndex
+
+
+@pytest.mark.unit
+class TestWorkingDirectoryIndex:
+    """Test cases for the incremental working directory file index."""
+
+    def test_lists_files_with_same_filters_as_walk(self, temp_dir):
+        """Hidden, cache and temporary entries are left out."""
+        (temp_dir / "main.py").write_text("x")
+        (temp_dir / "temp.tmp").write_text("x")
+        (temp_dir / ".env").write_text("x")
+        (temp_dir / "node_modules" / "pkg").mkdir(parents=True)
+        (temp_dir / "node_modules" / "pkg" / "index.js").write_text("x")
+        (temp_dir / "src").mkdir()
+        (temp_dir / "src" / "app.py").write_text("x")
+
+        files = WorkingDirectoryIndex().files([str(temp_dir)])
+
+        assert sorted(files) == [str(temp_dir / "main.py"), str(temp_dir / "src" / "app.py")]
+
+    def test_rescan_picks_up_added_and_removed_entries(self, temp_dir):
+        """Changed directories are re-listed on the next lookup."""
+        index = WorkingDirectoryIndex()
+        (temp_dir / "old").mkdir()
+        (temp_dir / "old" / "a.txt").write_text("x")
+        assert list(index.files([str(temp_dir)])) == [str(temp_dir / "old" / "a.txt")]
+
+        shutil.rmtree(temp_dir / "old")
+        (temp_dir / "new" / "deep").mkdir(parents=True)
+        (temp_dir / "new" / "deep" / "b.txt").write_text("x")
+
+        assert list(index.files([str(temp_dir)])) == [str(temp_dir / "new" / "deep" / "b.txt")]
+
+    def test_unchanged_directories_are_not_relisted(self, temp_dir, monkeypatch):
+        """A lookup with no changes only stats directories."""
+        (temp_dir / "a.txt").write_text("x")
+        index = WorkingDirectoryIndex()
+        index.files([str(temp_dir)])
+
+        def fail(*args, **kwargs):
+            raise AssertionError("directory was listed again")
+
+        monkeypatch.setattr(os, "scandir", fail)
+        assert list(index.files([str(temp_dir)])) == [str(temp_dir / "a.txt")]
+
+    def test_record_write_adds_file(self, temp_dir):
+        """Files reported by write events show up without a rescan."""
+        index = WorkingDirectoryIndex()
+        index.files([str(temp_dir)])
+
+        index.record_write(str(temp_dir / "report.md"))
+        index.record_write(str(temp_dir / ".hidden"))
+
+        assert list(index._roots[str(temp_dir)].dir_files[str(temp_dir)]) == [str(temp_dir / "report.md")]
+
+    def test_render_summarizes_large_listings(self, temp_dir):
+        """Listings above max_files are rendered as per-directory counts and recent files."""
+        index = WorkingDirectoryIndex(max_files=2, recent_files=1)
+        files = {"/w/a/1.txt": 1.0, "/w/a/2.txt": 3.0, "/w/b/3.txt": 2.0}
+
+        lines = index.render(files, "Generated Files")
+
+        assert lines == [
+            "Generated Files (3 files in 2 directories, 1 most recent shown):",
+            "  - /w/a/2.txt",
+            "Files per directory:",
+            "  - /w/a: 2 files",
+            "  - /w/b: 1 files",
+        ]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.service.project_stream import ProjectStream, with_event_id
+
+
+async def _source(queue: asyncio.Queue):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        yield item
+
+
+async def _take(iterator, count: int) -> list[str]:
+    return [await iterator.__anext__() for _ in range(count)]
+
+
+@pytest.mark.unit
+class TestProjectStream:
+    """Test cases for the resumable project SSE stream."""
+
+    def test_with_event_id(self):
+        """Every event of a coalesced chunk carries the chunk's id."""
+        assert with_event_id(7, "data: a\n\ndata: b\n\n") == "id: 7\ndata: a\n\nid: 7\ndata: b\n\n"
+
+    @pytest.mark.asyncio
+    async def test_reconnect_replays_missed_events(self):
+        """A new subscriber gets the events after its Last-Event-ID, then live ones."""
+        queue = asyncio.Queue()
+        stream = ProjectStream("p", grace=60)
+        stream.start(_source(queue))
+
+        first = stream.subscribe()
+        queue.put_nowait("data: 1\n\n")
+        assert await _take(first, 1) == ["id: 1\ndata: 1\n\n"]
+        await first.aclose()
+
+        # Produced while nobody is connected
+        queue.put_nowait("data: 2\n\n")
+        queue.put_nowait("data: 3\n\n")
+        await asyncio.sleep(0)
+
+        second = stream.subscribe(last_event_id=1)
+        replayed = await second.__anext__()
+        assert replayed == "id: 2\ndata: 2\n\nid: 3\ndata: 3\n\n"
+        queue.put_nowait("data: 4\n\n")
+        assert await _take(second, 1) == ["id: 4\ndata: 4\n\n"]
+
+        queue.put_nowait(None)
+        assert [chunk async for chunk in second] == []
+        assert stream.done
+
+    @pytest.mark.asyncio
+    async def test_replay_buffer_is_bounded(self):
+        """Events older than the buffer are reported as lost."""
+        queue = asyncio.Queue()
+        stream = ProjectStream("p", buffer_size=2, grace=60)
+        stream.start(_source(queue))
+        for i in range(1, 5):
+            queue.put_nowait(f"data: {i}\n\n")
+        queue.put_nowait(None)
+        await asyncio.sleep(0.01)
+
+        chunks = [chunk async for chunk in stream.subscribe(last_event_id=1)]
+
+        assert chunks[0].startswith(": events 2 to 2")
+        assert chunks[1] == "id: 3\ndata: 3\n\nid: 4\ndata: 4\n\n"
+
+    @pytest.mark.asyncio
+    async def test_abandoned_after_grace(self):
+        """Without a reconnect within the grace period the stream is torn down."""
+        queue = asyncio.Queue()
+        abandoned = asyncio.Event()
+
+        async def on_abandoned():
+            abandoned.set()
+
+        stream = ProjectStream("p", on_abandoned=on_abandoned, grace=0.05)
+        stream.start(_source(queue))
+        subscriber = stream.subscribe()
+        queue.put_nowait("data: 1\n\n")
+        await _take(subscriber, 1)
+        await subscriber.aclose()
+
+        await asyncio.wait_for(abandoned.wait(), timeout=1)
+        assert await stream.is_disconnected()
+        queue.put_nowait(None)
+
+    @pytest.mark.asyncio
+    async def test_reconnect_within_grace_keeps_stream(self):
+        """Reconnecting in time cancels the teardown."""
+        queue = asyncio.Queue()
+        stream = ProjectStream("p", grace=0.05)
+        stream.start(_source(queue))
+        await stream.subscribe().aclose()
+
+        subscriber = stream.subscribe()
+        queue.put_nowait("data: 1\n\n")
+        await _take(subscriber, 1)
+        await asyncio.sleep(0.1)
+
+        assert not await stream.is_disconnected()
+        queue.put_nowait(None)
+        await subscriber.aclose()
@@ -6,6 +6,7 @@ import pytest
 
 from app.exception.exception import ProgramException
 from app.model.chat import Status, SupplementChat, McpServers, UpdateData, TaskContent
+from app.service.event_queue import EventQueue
 from app.service.task import (
     Action,
     ActionImproveData,
@@ -176,7 +177,7 @@ class TestTaskLock:
 
     def test_task_lock_creation(self):
         """Test TaskLock instance creation."""
-        queue = asyncio.Queue()
+        queue = EventQueue()
         human_input = {}
         task_lock = TaskLock("test_123", queue, human_input)
         
@@ -192,7 +193,7 @@ class TestTaskLock:
     @pytest.mark.asyncio
     async def test_task_lock_put_queue(self):
         """Test putting data into task lock queue."""
-        queue = asyncio.Queue()
+        queue = EventQueue()
         task_lock = TaskLock("test_123", queue, {})
         data = ActionStartData()
         
@@ -210,7 +211,7 @@ class TestTaskLock:
     @pytest.mark.asyncio
     async def test_task_lock_get_queue(self):
         """Test getting data from task lock queue."""
-        queue = asyncio.Queue()
+        queue = EventQueue()
         task_lock = TaskLock("test_123", queue, {})
         data = ActionStartData()
         
@@ -225,10 +226,29 @@ class TestTaskLock:
         assert task_lock.last_accessed > initial_time
         assert retrieved_data == data
 
+    @pytest.mark.asyncio
+    async def test_put_queue_threadsafe_from_worker_thread(self):
+        """Events from worker threads are delivered to the owning loop."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        data = ActionNoticeData(process_task_id="1", data="from thread")
+
+        await asyncio.to_thread(task_lock.put_queue_threadsafe, data)
+
+        assert await asyncio.wait_for(task_lock.get_queue(), timeout=1) == data
+
+    def test_put_queue_threadsafe_without_loop(self):
+        """Without any event loop the event is enqueued directly."""
+        task_lock = TaskLock("test_123", EventQueue(), {})
+        data = ActionNoticeData(process_task_id="1", data="no loop")
+
+        task_lock.put_queue_threadsafe(data)
+
+        assert task_lock.queue.get_nowait() == data
+
     @pytest.mark.asyncio
     async def test_task_lock_human_input_operations(self):
         """Test human input operations."""
-        task_lock = TaskLock("test_123", asyncio.Queue(), {})
+        task_lock = TaskLock("test_123", EventQueue(), {})
         agent_name = "test_agent"
         
         # Add human input listener
@@ -243,7 +263,7 @@ class TestTaskLock:
     @pytest.mark.asyncio
     async def test_task_lock_background_task_management(self):
         """Test background task management."""
-        task_lock = TaskLock("test_123", asyncio.Queue(), {})
+        task_lock = TaskLock("test_123", EventQueue(), {})
         
         async def dummy_task():
             await asyncio.sleep(0.1)
@@ -266,7 +286,7 @@ class TestTaskLock:
     @pytest.mark.asyncio
     async def test_task_lock_cleanup(self):
         """Test task lock cleanup functionality."""
-        task_lock = TaskLock("test_123", asyncio.Queue(), {})
+        task_lock = TaskLock("test_123", EventQueue(), {})
         
         # Create some background tasks
         async def long_running_task():
@@ -288,6 +308,104 @@ class TestTaskLock:
         assert task2.cancelled()
 
 
+@pytest.mark.unit
+class TestBoundedTaskQueue:
+    """Test cases for the bounded TaskLock queue policies."""
+
+    @pytest.mark.asyncio
+    async def test_terminal_output_merged_when_full(self):
+        """Terminal output is merged into the queued chunk of the same process task."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=2)
+        await task_lock.put_queue(ActionTerminalData(process_task_id="1", data="a"))
+        await task_lock.put_queue(ActionEndData())
+        await task_lock.put_queue(ActionTerminalData(process_task_id="1", data="b"))
+
+        assert task_lock.queue.qsize() == 2
+        assert (await task_lock.get_queue()).data == "ab"
+        assert task_lock.queue_stats()["merged"] == 1
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_toolkit_event(self):
+        """Toolkit events evict the oldest droppable event when full."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=2)
+        toolkit_data = {"agent_name": "a", "toolkit_name": "t", "process_task_id": "1", "method_name": "m"}
+        await task_lock.put_queue(ActionActivateToolkitData(data={**toolkit_data, "message": "first"}))
+        await task_lock.put_queue(ActionEndData())
+        await task_lock.put_queue(ActionActivateToolkitData(data={**toolkit_data, "message": "second"}))
+
+        assert task_lock.queue.qsize() == 2
+        assert (await task_lock.get_queue()).action == Action.end
+        assert (await task_lock.get_queue()).data["message"] == "second"
+        assert task_lock.dropped_events[Action.activate_toolkit] == 1
+
+    @pytest.mark.asyncio
+    async def test_never_drop_control_actions(self):
+        """Control actions are enqueued even beyond the bound."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=1)
+        await task_lock.put_queue(ActionEndData())
+        await task_lock.put_queue(ActionStopData())
+
+        assert task_lock.queue.qsize() == 2
+        assert task_lock.queue_stats()["dropped"] == 0
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_consumer(self):
+        """Block policy waits until the consumer makes room."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=1, queue_block_timeout=5)
+        await task_lock.put_queue(ActionEndData())
+        producer = asyncio.create_task(task_lock.put_queue(ActionNoticeData(process_task_id="1", data="n")))
+        await asyncio.sleep(0.01)
+        assert not producer.done()
+
+        await task_lock.get_queue()
+        await asyncio.wait_for(producer, timeout=1)
+
+        assert (await task_lock.get_queue()).action == Action.notice
+        assert task_lock.blocked_events == 1
+
+    @pytest.mark.asyncio
+    async def test_block_timeout_raises(self):
+        """Blocked producers fail after the timeout instead of exceeding the bound."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=1, queue_block_timeout=0.01)
+        await task_lock.put_queue(ActionEndData())
+
+        with pytest.raises(asyncio.QueueFull):
+            await task_lock.put_queue(ActionNoticeData(process_task_id="1", data="n"))
+
+        assert task_lock.queue.qsize() == 1
+        assert task_lock.queue_stats()["waiting"] == 0
+        assert task_lock.dropped_events[Action.notice] == 1
+
+    @pytest.mark.asyncio
+    async def test_never_drop_stays_behind_blocked_events(self):
+        """Control actions don't overtake producers waiting for room."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=1, queue_block_timeout=5)
+        await task_lock.put_queue(ActionNoticeData(process_task_id="1", data="first"))
+        producer = asyncio.create_task(task_lock.put_queue(ActionNoticeData(process_task_id="1", data="second")))
+        await asyncio.sleep(0.01)
+        await task_lock.put_queue(ActionEndData())
+
+        assert task_lock.queue.qsize() == 1
+        received = [await task_lock.get_queue() for _ in range(3)]
+        await asyncio.wait_for(producer, timeout=1)
+
+        assert [item.data for item in received[:2]] == ["first", "second"]
+        assert received[2].action == Action.end
+
+    @pytest.mark.asyncio
+    async def test_threadsafe_block_event_rejected_when_full(self):
+        """Worker threads never wait or spawn tasks, a full queue rejects their block events."""
+        task_lock = TaskLock("test_123", EventQueue(), {}, max_queue_size=1)
+        await task_lock.put_queue(ActionEndData())
+
+        await asyncio.to_thread(task_lock.put_queue_threadsafe, ActionNoticeData(process_task_id="1", data="n"))
+        await asyncio.sleep(0.01)
+
+        assert task_lock.queue.qsize() == 1
+        assert len(task_lock.background_tasks) == 0
+        assert task_lock.dropped_events[Action.notice] == 1
+
+
 @pytest.mark.unit
 class TestTaskLockManagement:
     """Test cases for task lock management functions."""
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.model.chat import Status
+from app.service.event_queue import EventQueue
+from app.service.task import TaskLock, task_locks
+from app.service.task_eviction import TaskLockEvictor, estimate_memory
+
+
+def _idle_lock(id: str, idle_seconds: float, history: int = 0) -> TaskLock:
+    task_lock = TaskLock(id, EventQueue(), {})
+    task_lock.status = Status.done
+    task_lock.waiting = True
+    task_lock.last_accessed = datetime.now() - timedelta(seconds=idle_seconds)
+    for i in range(history):
+        task_lock.add_conversation("assistant", f"answer {i} " + "x" * 100)
+    task_locks[id] = task_lock
+    return task_lock
+
+
+@pytest.mark.unit
+class TestTaskLockEvictor:
+    """Test cases for hibernating idle task locks."""
+
+    def setup_method(self):
+        task_locks.clear()
+
+    def teardown_method(self):
+        task_locks.clear()
+
+    def test_estimate_memory(self):
+        """History, agent memory and queued events are counted."""
+        task_lock = _idle_lock("p", 0, history=3)
+        task_lock.question_agent = MagicMock()
+        task_lock.question_agent.memory._chat_history_block.storage.memory_list = [
+            {"message": {"content": "y" * 50}}
+        ]
+        task_lock.queue.put_nowait(MagicMock(data="z" * 20))
+
+        assert estimate_memory(task_lock) == task_lock.conversation.total_length + 50 + 20
+
+    def test_idle_ttl(self, tmp_path):
+        """Only projects idle past the TTL are hibernated while under budget."""
+        evictor = TaskLockEvictor(memory_budget=10**9, idle_ttl=600, min_idle=0, spill_dir=tmp_path)
+        old = _idle_lock("old", 1200, history=1)
+        fresh = _idle_lock("fresh", 10, history=1)
+
+        assert evictor.check() == ["old"]
+        assert old.hibernated
+        assert not fresh.hibernated
+
+    def test_memory_budget_lru(self, tmp_path):
+        """Over budget, idle projects are hibernated least recently used first."""
+        evictor = TaskLockEvictor(memory_budget=300, idle_ttl=3600, min_idle=0, spill_dir=tmp_path)
+        _idle_lock("a", 300, history=2)
+        _idle_lock("b", 200, history=2)
+        _idle_lock("c", 100, history=2)
+
+        assert evictor.check() == ["a", "b"]
+
+    def test_busy_projects_are_kept(self, tmp_path):
+        """Processing projects and projects not parked on the queue are never hibernated."""
+        evictor = TaskLockEvictor(memory_budget=0, idle_ttl=0, min_idle=0, spill_dir=tmp_path)
+        _idle_lock("processing", 1000, history=1).status = Status.processing
+        _idle_lock("handling", 1000, history=1).waiting = False
+
+        assert evictor.check() == []
+
+    def test_hibernated_history_resumes(self, tmp_path):
+        """The spilled history is loaded back on first access."""
+        evictor = TaskLockEvictor(memory_budget=0, idle_ttl=0, min_idle=0, spill_dir=tmp_path)
+        task_lock = _idle_lock("p", 1000, history=2)
+        task_lock.question_agent = MagicMock()
+        entries = list(task_lock.conversation_history)
+
+        with patch.object(TaskLock, "_release_resources") as release:
+            evictor.check()
+
+        spill = evictor.spill_path("p")
+        assert spill.exists()
+        assert task_lock.question_agent is None
+        assert estimate_memory(task_lock) == 0
+        release.assert_called_once()
+
+        assert task_lock.conversation_history == entries
+        assert not task_lock.hibernated
+        assert not spill.exists()
+
+    @pytest.mark.asyncio
+    async def test_cleanup_removes_spill(self, tmp_path):
+        """Deleting a hibernated project drops its spilled history."""
+        evictor = TaskLockEvictor(memory_budget=0, idle_ttl=0, min_idle=0, spill_dir=tmp_path)
+        task_lock = _idle_lock("p", 1000, history=1)
+        evictor.check()
+
+        await task_lock.cleanup()
+
+        assert not evictor.spill_path("p").exists()
+
+    def test_failed_wake_keeps_project_hibernated(self, tmp_path):
+        """An unreadable spill raises instead of resuming with an empty history."""
+        evictor = TaskLockEvictor(memory_budget=0, idle_ttl=0, min_idle=0, spill_dir=tmp_path)
+        task_lock = _idle_lock("p", 1000, history=2)
+        with patch.object(TaskLock, "_release_resources"):
+            evictor.check()
+        evictor.spill_path("p").write_text("{not json")
+
+        with pytest.raises(ValueError):
+            task_lock.conversation_history
+
+        assert task_lock.hibernated
+        assert evictor.spill_path("p").exists()
+
+    @pytest.mark.asyncio
+    async def test_spill_dir_is_per_shard(self, tmp_path, monkeypatch):
+        """Each shard worker spills to and clears only its own directory."""
+        monkeypatch.setenv("task_hibernate_dir", str(tmp_path))
+        monkeypatch.setenv("EIGENT_SHARD_INDEX", "1")
+        other = tmp_path / "shard-0"
+        other.mkdir()
+        (other / "spill.json").write_text("[]")
+
+        evictor = TaskLockEvictor(interval=3600)
+        assert evictor.spill_dir == tmp_path / "shard-1"
+        evictor.spill_dir.mkdir()
+        evictor.start()
+        await evictor.close()
+
+        assert (other / "spill.json").exists()
+        assert not evictor.spill_dir.exists()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from camel.tasks import Task
+
+from app.model.chat import TaskContent
+from app.service.chat_service import add_sub_tasks, update_sub_tasks
+from app.service.task import TaskLock, get_camel_task
+from app.service.task_registry import TaskRegistry
+
+
+def _tree() -> Task:
+    root = Task(content="Root", id="root")
+    child1 = Task(content="Child 1", id="root.1")
+    child2 = Task(content="Child 2", id="root.2")
+    grandchild = Task(content="Grandchild", id="root.1.1")
+    child1.add_subtask(grandchild)
+    root.add_subtask(child1)
+    root.add_subtask(child2)
+    return root
+
+
+@pytest.mark.unit
+class TestTaskRegistry:
+    """Test cases for the per-project task registry."""
+
+    def test_add_registers_subtree(self):
+        """Adding a task registers it and all its subtasks with their parents."""
+        registry = TaskRegistry()
+        root = _tree()
+        registry.add(root)
+
+        assert len(registry) == 4
+        assert registry.get("root.1.1").content == "Grandchild"
+        assert registry.parent("root.1.1") is registry.get("root.1")
+        assert registry.parent("root") is None
+        assert [t.id for t in registry.children("root")] == ["root.1", "root.2"]
+
+    def test_remove_drops_subtree(self):
+        """Removing a task drops its whole subtree."""
+        registry = TaskRegistry()
+        registry.add(_tree())
+        registry.remove("root.1")
+
+        assert "root.1" not in registry
+        assert "root.1.1" not in registry
+        assert "root.2" in registry
+        registry.remove("missing")
+
+    def test_get_camel_task_uses_registry(self):
+        """With a registry, lookups don't walk the tasks and misses are registered."""
+        registry = TaskRegistry()
+        root = _tree()
+
+        assert get_camel_task("root.1.1", [root], registry) is root.subtasks[0].subtasks[0]
+        assert "root.1.1" in registry
+        # Served from the registry even though it's not in the given list
+        assert get_camel_task("root.1.1", [], registry) is not None
+        assert get_camel_task("nonexistent", [root], registry) is None
+
+    def test_sub_task_edits_maintain_registry(self):
+        """Edited, deleted and added subtasks are reflected in the registry."""
+        registry = TaskRegistry()
+        root = _tree()
+        registry.add(root)
+
+        update_sub_tasks(root.subtasks, {"root.1": TaskContent(id="root.1", content="Edited")}, registry=registry)
+        added = add_sub_tasks(root, [TaskContent(id="", content="New")], registry=registry)
+
+        assert registry.get("root.1").content == "Edited"
+        # Deleted, including the subtasks of kept tasks that weren't in the update
+        assert "root.1.1" not in registry
+        assert len(registry) == 3
+        assert registry.get(added[0].id) is added[0]
+        assert registry.parent(added[0].id) is root
+
+    @pytest.mark.asyncio
+    async def test_cleared_with_task_lock(self):
+        """The registry is emptied when the TaskLock is cleaned up."""
+        task_lock = TaskLock("project", asyncio.Queue(), {})
+        task_lock.task_registry.add(_tree())
+        await task_lock.cleanup()
+
+        assert len(task_lock.task_registry) == 0
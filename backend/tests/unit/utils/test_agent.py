@@ -28,6 +28,8 @@ from app.utils.agent import (
     get_mcp_tools
 )
 from app.model.chat import Chat, McpServers
+from app.utils.mcp_manager import McpConnectionManager
+from app.utils.mcp_schema_cache import McpSchemaCache
 from app.service.task import ActionActivateAgentData, ActionDeactivateAgentData
 
 
@@ -417,7 +419,7 @@ class TestAgentFactoryFunctions:
         task_locks[options.task_id] = mock_task_lock
 
         with patch('app.utils.agent.ListenChatAgent') as mock_listen_agent, \
-             patch('app.utils.agent.ModelFactory.create') as mock_model_factory, \
+             patch('app.utils.model_cache.ModelFactory.create') as mock_model_factory, \
              patch('app.utils.agent.HumanToolkit.get_can_use_tools', return_value=[]), \
              patch('asyncio.create_task') as mock_create_task:
 
@@ -711,7 +713,7 @@ class TestAgentFactoryFunctions:
         task_locks[options.task_id] = mock_task_lock
         
         with patch('app.utils.agent.ListenChatAgent') as mock_listen_agent, \
-             patch('app.utils.agent.ModelFactory.create') as mock_model_factory, \
+             patch('app.utils.model_cache.ModelFactory.create') as mock_model_factory, \
              patch('asyncio.create_task'), \
              patch('app.utils.agent.McpSearchToolkit') as mock_mcp_search_toolkit, \
              patch('app.utils.agent.get_mcp_tools') as mock_get_mcp_tools:
@@ -804,7 +806,7 @@ class TestToolkitFunctions:
         assert result == []
 
     @pytest.mark.asyncio
-    async def test_get_mcp_tools_success(self):
+    async def test_get_mcp_tools_success(self, tmp_path):
         """Test get_mcp_tools with valid MCP server configuration."""
         mcp_servers: McpServers = {
             "mcpServers": {
@@ -817,13 +819,16 @@ class TestToolkitFunctions:
         
         mock_tools = [MagicMock(), MagicMock()]
         
-        with patch('app.utils.agent.MCPToolkit') as mock_mcp_toolkit:
+        with patch('app.utils.mcp_manager.MCPToolkit') as mock_mcp_toolkit, \
+             patch('app.utils.agent.mcp_manager', McpConnectionManager(idle_ttl=60, schema_cache=McpSchemaCache(tmp_path))) as manager:
             mock_toolkit_instance = MagicMock()  # Use MagicMock instead of AsyncMock
             mock_toolkit_instance.connect = AsyncMock()
+            mock_toolkit_instance.disconnect = AsyncMock()
             mock_toolkit_instance.get_tools.return_value = mock_tools  # This should return the tools directly
             mock_mcp_toolkit.return_value = mock_toolkit_instance
             
             result = await get_mcp_tools(mcp_servers)
+            await manager.close()
             
             # get_mcp_tools should return the tools directly
             assert len(result) == 2
@@ -851,7 +856,7 @@ class TestToolkitFunctions:
             }
         }
         
-        with patch('app.utils.agent.MCPToolkit', side_effect=Exception("Connection failed")):
+        with patch('app.utils.mcp_manager.MCPToolkit', side_effect=Exception("Connection failed")):
             # Should handle connection failures gracefully
             with pytest.raises(Exception):
                 await get_mcp_tools(mcp_servers)
@@ -879,7 +884,7 @@ class TestAgentIntegration:
         task_locks[api_task_id] = mock_task_lock
         
         # Create agent
-        with patch('app.utils.agent.ModelFactory.create') as mock_model_factory, \
+        with patch('app.utils.model_cache.ModelFactory.create') as mock_model_factory, \
              patch('asyncio.create_task'), \
              patch('app.utils.agent.ListenChatAgent') as mock_listen_agent:
             mock_model = MagicMock()
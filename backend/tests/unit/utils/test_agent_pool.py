@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.utils.agent_pool import AgentPool
+
+
+def _agent(name: str = "developer_agent") -> MagicMock:
+    agent = MagicMock()
+    agent.agent_name = name
+    agent.api_task_id = "missing_project"
+    agent.tool_names = []
+    agent.clone.side_effect = lambda with_memory=False: _agent(name)
+    return agent
+
+
+@pytest.mark.unit
+class TestAgentPool:
+    """Test cases for the warm agent pool."""
+
+    def test_second_request_is_cloned_from_template(self):
+        """Only the first request builds, later ones clone the template."""
+        pool = AgentPool(ttl=60, max_templates=4)
+        build = MagicMock(side_effect=lambda: _agent())
+
+        first = pool.get_or_build(("p", "developer_agent"), build)
+        second = pool.get_or_build(("p", "developer_agent"), build)
+
+        assert build.call_count == 1
+        assert second is not first
+        assert pool.stats()["hits"] == 1
+        assert pool.stats()["misses"] == 1
+
+    def test_expired_template_is_rebuilt(self):
+        """Templates older than the TTL are not used."""
+        pool = AgentPool(ttl=0, max_templates=4)
+        build = MagicMock(side_effect=lambda: _agent())
+
+        pool.get_or_build(("p", "a"), build)
+        pool.get_or_build(("p", "a"), build)
+
+        assert build.call_count == 2
+
+    def test_least_recently_used_template_is_evicted(self):
+        """The pool keeps at most max_templates templates."""
+        pool = AgentPool(ttl=60, max_templates=1)
+        pool.get_or_build(("p", "a"), _agent)
+        pool.get_or_build(("p", "b"), _agent)
+
+        build = MagicMock(side_effect=lambda: _agent())
+        pool.get_or_build(("p", "a"), build)
+
+        assert build.call_count == 1
+
+    def test_evict_project(self):
+        """Evicting a project drops only its templates."""
+        pool = AgentPool(ttl=60, max_templates=4)
+        pool.get_or_build(("p1", "a"), _agent)
+        pool.get_or_build(("p2", "a"), _agent)
+
+        pool.evict_project("p1")
+
+        assert pool.stats()["templates"] == 1
+
+    @pytest.mark.asyncio
+    async def test_async_builder(self):
+        """Async factories are pooled the same way."""
+        pool = AgentPool(ttl=60, max_templates=4)
+        calls = 0
+
+        async def build():
+            nonlocal calls
+            calls += 1
+            return _agent()
+
+        await pool.aget_or_build(("p", "a"), build)
+        await pool.aget_or_build(("p", "a"), build)
+
+        assert calls == 1
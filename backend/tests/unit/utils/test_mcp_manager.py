@@ -0,0 +1,229 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from camel.toolkits import FunctionTool
+
+from app.utils.mcp_manager import McpConnectionManager, config_key
+from app.utils.mcp_schema_cache import McpSchemaCache
+
+SERVERS = {"mcpServers": {"notion": {"command": "npx", "args": ["notion-mcp"]}}}
+
+
+def _tool(name: str) -> FunctionTool:
+    async def call(query: str) -> str:
+        r"""Run the tool.
+
+        Args:
+            query (str): The query.
+        """
+        return f"{name}:{query}"
+
+    call.__name__ = name
+    return FunctionTool(call)
+
+
+def _toolkit(*args, tool_name: str = "search", **kwargs) -> MagicMock:
+    toolkit = MagicMock()
+    toolkit.is_connected = False
+
+    async def connect():
+        toolkit.is_connected = True
+        return toolkit
+
+    async def disconnect():
+        toolkit.is_connected = False
+
+    toolkit.connect = AsyncMock(side_effect=connect)
+    toolkit.disconnect = AsyncMock(side_effect=disconnect)
+    toolkit.get_tools.side_effect = lambda: [_tool(tool_name)]
+    toolkit.clients = []
+    return toolkit
+
+
+@pytest.mark.unit
+class TestMcpConnectionManager:
+    """Test cases for the shared MCP connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_same_config_connects_once(self, tmp_path):
+        """Tasks borrowing the same server share one connection."""
+        manager = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=False, schema_cache=McpSchemaCache(tmp_path))
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit) as factory:
+            first, _ = await manager.acquire(SERVERS, "p1")
+            second, _ = await manager.acquire(SERVERS, "p2")
+
+            assert factory.call_count == 1
+            assert len(first) == len(second) == 1
+            assert manager.stats() == {"servers": 1, "borrowed": 1}
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_released_servers_close_after_idle_ttl(self, tmp_path):
+        """Servers nobody borrows are disconnected by the maintenance check."""
+        manager = McpConnectionManager(idle_ttl=0, health_interval=60, lazy=False, schema_cache=McpSchemaCache(tmp_path))
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit):
+            await manager.acquire(SERVERS, "p1")
+            connection = next(iter(manager._connections.values()))
+            manager.release("p1")
+            await manager.check()
+
+            assert manager.stats()["servers"] == 0
+            connection.toolkit.disconnect.assert_awaited_once()
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_borrowed_servers_survive_check(self, tmp_path):
+        """Servers still borrowed are kept while they are healthy."""
+        manager = McpConnectionManager(idle_ttl=0, health_interval=60, lazy=False, schema_cache=McpSchemaCache(tmp_path))
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit) as factory:
+            await manager.acquire(SERVERS, "p1")
+            await manager.check()
+
+            assert manager.stats()["servers"] == 1
+            assert factory.call_count == 1
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_dead_server_is_restarted(self, tmp_path):
+        """A borrowed server whose connection dropped is reconnected."""
+        manager = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=False, schema_cache=McpSchemaCache(tmp_path))
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit):
+            await manager.acquire(SERVERS, "p1")
+            connection = next(iter(manager._connections.values()))
+            connection.toolkit.is_connected = False
+
+            await manager.check()
+
+            assert connection.toolkit.connect.await_count == 2
+            assert connection.alive
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_connect_is_not_cached(self, tmp_path):
+        """A server that fails to connect is reported and retried next time."""
+        manager = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=False, schema_cache=McpSchemaCache(tmp_path))
+        broken = _toolkit()
+        broken.connect = AsyncMock(side_effect=ConnectionError("spawn failed"))
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=[broken, _toolkit()]):
+            tools, failed = await manager.acquire(SERVERS, "p1")
+            assert tools == []
+            assert failed == {"notion": "spawn failed"}
+            assert manager.stats()["servers"] == 0
+
+            tools, failed = await manager.acquire(SERVERS, "p1")
+            assert len(tools) == 1
+            assert failed == {}
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_servers_connect_concurrently_with_partial_success(self, tmp_path):
+        """A slow server doesn't delay the others and a failing one is skipped."""
+        manager = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=False, schema_cache=McpSchemaCache(tmp_path))
+        started = []
+
+        def factory(config_dict, timeout):
+            name = next(iter(config_dict["mcpServers"]))
+            toolkit = _toolkit(tool_name=name)
+
+            async def connect():
+                started.append(name)
+                await asyncio.sleep(0.05)
+                if name == "broken":
+                    raise ConnectionError("timed out")
+                toolkit.is_connected = True
+
+            toolkit.connect = AsyncMock(side_effect=connect)
+            return toolkit
+
+        servers = {
+            "mcpServers": {
+                "a": {"command": "a"},
+                "broken": {"command": "broken"},
+                "b": {"command": "b"},
+            }
+        }
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=factory):
+            begin = time.monotonic()
+            tools, failed = await manager.acquire(servers, "p1")
+            elapsed = time.monotonic() - begin
+
+        assert sorted(tool.get_function_name() for tool in tools) == ["a", "b"]
+        assert failed == {"broken": "timed out"}
+        assert elapsed < 0.15
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_known_server_connects_on_first_tool_call(self, tmp_path):
+        """Servers with known schemas are only started when a tool is called."""
+        manager = McpConnectionManager(idle_ttl=0, health_interval=60, lazy=True, schema_cache=McpSchemaCache(tmp_path))
+        activations = []
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit) as factory:
+            await manager.acquire(SERVERS, "p1")
+            manager.release("p1")
+            await manager.check()
+            assert manager.stats()["servers"] == 0
+
+            tools, failed = await manager.acquire(
+                SERVERS, "p1", on_activate=lambda server, tool: activations.append((server, tool))
+            )
+            assert factory.call_count == 1
+            assert [tool.get_function_name() for tool in tools] == ["search"]
+
+            result = await tools[0].async_call(query="eigent")
+
+            assert result == "search:eigent"
+            assert factory.call_count == 2
+            assert activations == [("notion", "search")]
+            assert manager.stats() == {"servers": 1, "borrowed": 1}
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_cached_schemas_survive_restart(self, tmp_path):
+        """A new manager builds tools from the on-disk schemas without connecting."""
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit) as factory:
+            first = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=True, schema_cache=McpSchemaCache(tmp_path))
+            await first.acquire(SERVERS, "p1")
+            await first.close()
+
+            second = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=True, schema_cache=McpSchemaCache(tmp_path))
+            tools, _ = await second.acquire(SERVERS, "p1")
+
+            assert [tool.get_function_name() for tool in tools] == ["search"]
+            assert factory.call_count == 1
+            await second.close()
+
+    @pytest.mark.asyncio
+    async def test_stale_schemas_are_revalidated_in_background(self, tmp_path):
+        """Stale cached schemas are served and refreshed from the server."""
+        cache = McpSchemaCache(tmp_path, revalidate_after=0)
+        cache.put(SERVERS["mcpServers"]["notion"], [_tool("old_search").get_openai_tool_schema()])
+        manager = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=True, schema_cache=cache)
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit):
+            tools, _ = await manager.acquire(SERVERS, "p1")
+            assert [tool.get_function_name() for tool in tools] == ["old_search"]
+
+            await asyncio.gather(*manager._background)
+
+        assert [s["function"]["name"] for s in cache.get(SERVERS["mcpServers"]["notion"])] == ["search"]
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_revalidation_is_retried_after_ttl(self, tmp_path):
+        """A config is revalidated at most once per revalidate_after, then again."""
+        cache = McpSchemaCache(tmp_path, revalidate_after=60)
+        server_config = SERVERS["mcpServers"]["notion"]
+        manager = McpConnectionManager(idle_ttl=60, health_interval=60, lazy=True, schema_cache=cache)
+        with patch("app.utils.mcp_manager.MCPToolkit", side_effect=_toolkit) as factory:
+            manager._revalidate("notion", server_config)
+            manager._revalidate("notion", server_config)
+            await asyncio.gather(*manager._background)
+            assert factory.call_count == 1
+
+            await manager.close()
+            manager._revalidated[config_key(server_config)] -= 61
+            manager._revalidate("notion", server_config)
+            await asyncio.gather(*manager._background)
+            assert factory.call_count == 2
+        await manager.close()
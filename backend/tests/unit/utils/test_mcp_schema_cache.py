@@ -0,0 +1,50 @@
+import pytest
+
+from app.utils.mcp_schema_cache import McpSchemaCache, schema_key
+
+CONFIG = {"command": "npx", "args": ["-y", "notion-mcp@1.2.0"], "env": {"NOTION_TOKEN": "secret"}}
+SCHEMAS = [{"type": "function", "function": {"name": "search", "parameters": {}}}]
+
+
+@pytest.mark.unit
+class TestMcpSchemaCache:
+    """Test cases for the on-disk MCP tool schema cache."""
+
+    def test_round_trip_through_disk(self, tmp_path):
+        """Schemas written by one instance are read by the next."""
+        McpSchemaCache(tmp_path).put(CONFIG, SCHEMAS)
+
+        cache = McpSchemaCache(tmp_path)
+
+        assert cache.get(CONFIG) == SCHEMAS
+        assert not cache.is_stale(CONFIG)
+
+    def test_env_values_are_not_written(self, tmp_path):
+        """Only a hash of the env ends up in the cache."""
+        McpSchemaCache(tmp_path).put(CONFIG, SCHEMAS)
+
+        for file in tmp_path.iterdir():
+            assert "secret" not in file.read_text()
+
+    def test_key_changes_with_version_and_env(self):
+        """Another package version or env is another cache entry."""
+        assert schema_key(CONFIG) != schema_key({**CONFIG, "args": ["-y", "notion-mcp@1.3.0"]})
+        assert schema_key(CONFIG) != schema_key({**CONFIG, "env": {"NOTION_TOKEN": "other"}})
+
+    def test_different_tool_set_invalidates(self, tmp_path):
+        """put reports when the server's tool set changed."""
+        cache = McpSchemaCache(tmp_path)
+
+        assert cache.put(CONFIG, SCHEMAS) is False
+        assert cache.put(CONFIG, SCHEMAS) is False
+        assert cache.put(CONFIG, []) is True
+        assert cache.get(CONFIG) == []
+
+    def test_corrupt_entry_is_ignored(self, tmp_path):
+        """A broken cache file is treated as a miss."""
+        (tmp_path / f"{schema_key(CONFIG)}.json").write_text("{not json")
+
+        cache = McpSchemaCache(tmp_path)
+
+        assert cache.get(CONFIG) is None
+        assert cache.is_stale(CONFIG)
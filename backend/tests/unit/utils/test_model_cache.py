@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.model_cache import ModelBackendCache
+
+
+def _backend(**kwargs) -> MagicMock:
+    backend = MagicMock()
+    backend._client = kwargs.get("client") or MagicMock(name="client")
+    backend._async_client = kwargs.get("async_client") or MagicMock(name="async_client")
+    return backend
+
+
+@pytest.mark.unit
+class TestModelBackendCache:
+    """Test cases for the model backend cache."""
+
+    def test_identical_requests_share_backend(self):
+        """The same platform, model, key, url and config return one backend."""
+        cache = ModelBackendCache(max_size=4)
+        with patch("app.utils.model_cache.ModelFactory.create", side_effect=_backend) as create:
+            first = cache.create("openai", "gpt-4o", api_key="k", url=None, timeout=600)
+            second = cache.create("openai", "gpt-4o", api_key="k", url=None, timeout=600)
+
+        assert first is second
+        assert create.call_count == 1
+
+    def test_different_config_shares_http_clients(self):
+        """Backends of the same upstream reuse the first backend's clients."""
+        cache = ModelBackendCache(max_size=4)
+        with patch("app.utils.model_cache.ModelFactory.create", side_effect=_backend) as create:
+            first = cache.create("openai", "gpt-4o", api_key="k", timeout=600)
+            cache.create("openai", "gpt-4o", api_key="k", model_config_dict={"stream": True}, timeout=600)
+
+        assert create.call_args.kwargs["client"] is first._client
+        assert create.call_args.kwargs["async_client"] is first._async_client
+
+    def test_new_api_key_drops_old_backends(self):
+        """Entries of a replaced api key are invalidated."""
+        cache = ModelBackendCache(max_size=4)
+        with patch("app.utils.model_cache.ModelFactory.create", side_effect=_backend):
+            old = cache.create("openai", "gpt-4o", api_key="old", timeout=600)
+            new = cache.create("openai", "gpt-4o", api_key="new", timeout=600)
+            again = cache.create("openai", "gpt-4o", api_key="old", timeout=600)
+
+        assert new is not old
+        assert again is not old
+
+    def test_lru_eviction(self):
+        """At most max_size backends are kept."""
+        cache = ModelBackendCache(max_size=1)
+        with patch("app.utils.model_cache.ModelFactory.create", side_effect=_backend) as create:
+            cache.create("openai", "a", api_key="k")
+            cache.create("openai", "b", api_key="k")
+            cache.create("openai", "a", api_key="k")
+
+        assert create.call_count == 3
+
+    def test_invalidate(self):
+        """Explicit invalidation forces a new backend."""
+        cache = ModelBackendCache(max_size=4)
+        with patch("app.utils.model_cache.ModelFactory.create", side_effect=_backend) as create:
+            cache.create("openai", "gpt-4o", api_key="k")
+            cache.invalidate("openai")
+            cache.create("openai", "gpt-4o", api_key="k")
+
+        assert create.call_count == 2
@@ -0,0 +1,129 @@
+import json
+
+import httpx
+import pytest
+
+from app.utils.shard_router import create_shard_app, project_of, shard_for
+
+
+class _Workers:
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.urls = [f"http://worker{index}" for index in range(count)]
+        self.ensured: list[int] = []
+
+    async def start(self) -> None:
+        pass
+
+    async def ensure(self, index: int) -> None:
+        self.ensured.append(index)
+
+    def stop(self) -> None:
+        pass
+
+
+class _Stream(httpx.AsyncByteStream):
+    def __init__(self, *chunks: bytes) -> None:
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _upstream(seen: list[httpx.Request]) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.path == "/chat":
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                stream=_Stream(b"data: one\n\n", b"data: two\n\n"),
+            )
+        return httpx.Response(204, stream=_Stream())
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.unit
+class TestShardRouting:
+    """Test cases for picking the worker of a project."""
+
+    def test_shard_is_stable_and_in_range(self):
+        """A project always maps to the same worker."""
+        for project_id in ("a", "b", "project-123"):
+            index = shard_for(project_id, 4)
+            assert 0 <= index < 4
+            assert shard_for(project_id, 4) == index
+
+    def test_projects_spread_over_workers(self):
+        """Every worker gets a share of the projects."""
+        counts = [0] * 4
+        for i in range(400):
+            counts[shard_for(f"project-{i}", 4)] += 1
+        assert min(counts) > 50
+
+    def test_adding_a_worker_only_moves_its_projects(self):
+        """Growing from 4 to 5 workers only moves projects to the new worker."""
+        for i in range(200):
+            before, after = shard_for(f"p{i}", 4), shard_for(f"p{i}", 5)
+            assert after in (before, 4)
+
+    def test_project_of(self):
+        """The project comes from the body of POST /chat and the path otherwise."""
+        assert project_of("POST", "/chat", json.dumps({"project_id": "p1"}).encode()) == "p1"
+        assert project_of("POST", "/chat/p2/human-reply", b"{}") == "p2"
+        assert project_of("DELETE", "/chat/p3/remove-task/t1", b"") == "p3"
+        assert project_of("PUT", "/task/p4/take-control", b"{}") == "p4"
+        assert project_of("DELETE", "/task/stop-all", b"") is None
+        assert project_of("GET", "/health", b"") is None
+        assert project_of("POST", "/chat", b"not json") is None
+
+
+@pytest.mark.unit
+class TestShardApp:
+    """Test cases for the front app forwarding to the workers."""
+
+    @pytest.mark.asyncio
+    async def test_chat_stream_forwarded_to_owner(self):
+        """POST /chat goes to the project's worker and the SSE body streams back."""
+        seen: list[httpx.Request] = []
+        workers = _Workers(3)
+        app = create_shard_app(workers, client=_upstream(seen))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://front") as client:
+            response = await client.post("/chat", json={"project_id": "p1", "question": "hi"})
+            await client.post("/chat/p1/human-reply", json={"agent": "a", "reply": "r"})
+
+        owner = shard_for("p1", 3)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.content == b"data: one\n\ndata: two\n\n"
+        assert [request.url.host for request in seen] == [f"worker{owner}", f"worker{owner}"]
+        assert json.loads(seen[0].content)["project_id"] == "p1"
+
+    @pytest.mark.asyncio
+    async def test_unbound_requests_go_to_first_worker(self):
+        """Requests of no project are served by worker 0."""
+        seen: list[httpx.Request] = []
+        app = create_shard_app(_Workers(3), client=_upstream(seen))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://front") as client:
+            await client.get("/tools/available", params={"q": "1"})
+
+        assert seen[0].url.host == "worker0"
+        assert seen[0].url.path == "/tools/available"
+        assert seen[0].url.query == b"q=1"
+
+    @pytest.mark.asyncio
+    async def test_stop_all_broadcast(self):
+        """DELETE /task/stop-all reaches every worker."""
+        seen: list[httpx.Request] = []
+        app = create_shard_app(_Workers(3), prefix="/api", client=_upstream(seen))
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://front") as client:
+            response = await client.delete("/api/task/stop-all")
+
+        assert response.status_code == 204
+        assert sorted(request.url.host for request in seen) == ["worker0", "worker1", "worker2"]
+        assert all(request.url.path == "/api/task/stop-all" for request in seen)
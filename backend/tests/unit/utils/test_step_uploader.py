@@ -0,0 +1,122 @@
+import json
+
+import httpx
+import pytest
+
+from app.model.chat import SseFrame, sse_json
+from app.utils.server.step_uploader import StepUploader
+
+
+def _uploader(tmp_path, handler, **kwargs) -> StepUploader:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return StepUploader(
+        "http://server",
+        flush_interval=10,
+        batch_size=kwargs.pop("batch_size", 100),
+        max_retries=kwargs.pop("max_retries", 0),
+        backoff_base=0,
+        spool_path=tmp_path / "spool.ndjson",
+        client=client,
+        **kwargs,
+    )
+
+
+@pytest.mark.unit
+class TestStepUploader:
+    """Test cases for batched step uploads."""
+
+    @pytest.mark.asyncio
+    async def test_flush_posts_one_batch_per_task(self, tmp_path):
+        """Buffered steps are sent as one bulk request per task."""
+        requests = []
+
+        def handler(request: httpx.Request):
+            requests.append((request.url.path, json.loads(request.content)))
+            return httpx.Response(200, json=[])
+
+        uploader = _uploader(tmp_path, handler)
+        uploader.add("t1", "terminal", {"output": "a"}, 1.0)
+        uploader.add("t1", "terminal", {"output": "b"}, 2.0)
+        uploader.add("t2", "end", "done", 3.0)
+        await uploader.close()
+
+        assert sorted((path, [row["step"] for row in rows]) for path, rows in requests) == [
+            ("/chat/steps/bulk", ["end"]),
+            ("/chat/steps/bulk", ["terminal", "terminal"]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self, tmp_path):
+        """5xx responses are retried before giving up."""
+        statuses = [503, 200]
+
+        def handler(request: httpx.Request):
+            return httpx.Response(statuses.pop(0))
+
+        uploader = _uploader(tmp_path, handler, max_retries=1)
+        uploader.add("t1", "end", "done", 1.0)
+        await uploader.close()
+
+        assert statuses == []
+        assert not (tmp_path / "spool.ndjson").exists()
+
+    @pytest.mark.asyncio
+    async def test_spools_during_outage_and_replays_in_order(self, tmp_path):
+        """Steps that cannot be sent are spooled and replayed before new ones."""
+        server_up = False
+        received = []
+
+        def handler(request: httpx.Request):
+            if not server_up:
+                raise httpx.ConnectError("down", request=request)
+            received.extend(row["data"] for row in json.loads(request.content))
+            return httpx.Response(200, json=[])
+
+        uploader = _uploader(tmp_path, handler)
+        uploader.add("t1", "terminal", 1, 1.0)
+        await uploader.flush()
+        uploader.add("t1", "terminal", 2, 2.0)
+        await uploader.flush()
+        assert (tmp_path / "spool.ndjson").read_text().count("\n") == 2
+
+        server_up = True
+        uploader.add("t1", "terminal", 3, 3.0)
+        await uploader.close()
+
+        assert received == [1, 2, 3]
+        assert not (tmp_path / "spool.ndjson").exists()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_single_uploads_without_bulk_endpoint(self, tmp_path):
+        """Older servers without the bulk endpoint still receive every step."""
+        paths = []
+
+        def handler(request: httpx.Request):
+            paths.append(request.url.path)
+            if request.url.path.endswith("/bulk"):
+                return httpx.Response(404)
+            return httpx.Response(200)
+
+        uploader = _uploader(tmp_path, handler)
+        uploader.add("t1", "terminal", 1, 1.0)
+        uploader.add("t1", "terminal", 2, 2.0)
+        await uploader.close()
+
+        assert paths == ["/chat/steps/bulk", "/chat/steps", "/chat/steps"]
+
+    def test_spool_is_per_shard(self, tmp_path, monkeypatch):
+        """Shard workers don't share a spool file."""
+        monkeypatch.setenv("step_upload_spool_path", str(tmp_path / "spool.ndjson"))
+        assert StepUploader("http://server").spool_path == tmp_path / "spool.ndjson"
+
+        monkeypatch.setenv("EIGENT_SHARD_INDEX", "2")
+        assert StepUploader("http://server").spool_path == tmp_path / "spool.shard-2.ndjson"
+
+
+@pytest.mark.unit
+def test_sse_frame_keeps_events():
+    """Joined SSE frames keep the events they were built from."""
+    frame = SseFrame.join([sse_json("a", {"x": 1}), sse_json("b", "y")])
+
+    assert frame == 'data: {"step": "a", "data": {"x": 1}}\n\ndata: {"step": "b", "data": "y"}\n\n'
+    assert frame.events == [("a", {"x": 1}), ("b", "y")]
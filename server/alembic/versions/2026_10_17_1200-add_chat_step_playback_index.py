@@ -0,0 +1,29 @@
+"""add_chat_step_playback_index
+
+Revision ID: add_chat_step_playback_index
+Revises: add_timestamp_to_chat_step
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_chat_step_playback_index"
+down_revision: Union[str, None] = "add_timestamp_to_chat_step"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add (task_id, timestamp, id) index used by keyset paginated playback."""
+    op.create_index(
+        "ix_chat_step_task_id_timestamp_id", "chat_step", ["task_id", "timestamp", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Remove playback index from chat_step table."""
+    op.drop_index("ix_chat_step_task_id_timestamp_id", table_name="chat_step")
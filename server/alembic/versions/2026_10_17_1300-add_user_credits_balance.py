@@ -0,0 +1,64 @@
+"""add_user_credits_balance
+
+Revision ID: add_user_credits_balance
+Revises: add_chat_step_playback_index
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy_utils import ChoiceType
+
+from app.model.user.user_credits_record import CreditsChannel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_user_credits_balance"
+down_revision: Union[str, None] = "add_chat_step_playback_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add user_credits_balance table and fill it from the unused credits records."""
+    op.create_table(
+        "user_credits_balance",
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=True),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("channel", ChoiceType(choices=CreditsChannel, impl=sa.SmallInteger()), nullable=False),
+        sa.Column("expire_at", sa.DateTime(), nullable=True),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_user_credits_balance_user_id"), "user_credits_balance", ["user_id"], unique=False)
+    op.create_index(
+        "ix_user_credits_balance_bucket", "user_credits_balance", ["user_id", "channel", "expire_at"], unique=True
+    )
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO user_credits_balance (user_id, channel, expire_at, amount)
+            SELECT user_id, channel, expire_at, SUM(amount - balance)
+            FROM user_credits_record
+            WHERE channel != :consume AND used = false
+              AND (expire_at IS NULL OR expire_at > CURRENT_TIMESTAMP)
+            GROUP BY user_id, channel, expire_at
+            """
+        ).bindparams(consume=CreditsChannel.consume.value)
+    )
+
+
+def downgrade() -> None:
+    """Remove user_credits_balance table."""
+    op.drop_index("ix_user_credits_balance_bucket", table_name="user_credits_balance")
+    op.drop_index(op.f("ix_user_credits_balance_user_id"), table_name="user_credits_balance")
+    op.drop_table("user_credits_balance")
@@ -0,0 +1,17 @@
+import click
+from app.command import cli
+from app.component.database import session_make
+from app.model.user.user_credits_record import UserCreditsBalance
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("command_credits")
+
+
+@cli.command("reconcile-credits")
+@click.option("--user-id", type=int, default=None, help="Only reconcile this user")
+def reconcile_credits(user_id: int | None):
+    """Recompute the credits balance buckets from the credits records."""
+    with session_make() as session:
+        fixed = UserCreditsBalance.reconcile(session, user_id)
+    logger.info("Credits balance reconciled", extra={"user_id": user_id, "fixed_buckets": fixed})
+    click.echo(f"Reconciled credits balance, {fixed} bucket(s) fixed")
@@ -1,9 +1,11 @@
 from fastapi import Depends, Header
 from fastapi_babel import _
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.component import code
+from app.component.auth_cache import key_cache, user_cache
 from fastapi.security import OAuth2PasswordBearer
-from app.component.database import session
+from app.component.database import async_session, session
 from app.component.environment import env, env_not_empty
 from datetime import timedelta, datetime
 import jwt
@@ -55,6 +57,27 @@ class Auth:
         return encoded_jwt
 
 
+def get_user(user_id: int, session: Session) -> User | None:
+    """The user of a token, from the auth cache when possible, attached to ``session``."""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return session.merge(cached, load=False)
+    user = session.get(User, user_id)
+    if user is not None:
+        user_cache.put(user_id, user)
+    return user
+
+
+async def aget_user(user_id: int, session: AsyncSession) -> User | None:
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return await session.merge(cached, load=False)
+    user = await session.get(User, user_id)
+    if user is not None:
+        user_cache.put(user_id, user)
+    return user
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{env('url_prefix', '')}/dev_login", auto_error=False)
 
 
@@ -66,8 +89,7 @@ async def auth(
         return None
     try:
         model = Auth.decode_token(token)
-        user = session.get(User, model.id)
-        model._user = user
+        model._user = get_user(model.id, session)
         return model
     except Exception:
         return None
@@ -78,13 +100,25 @@ async def auth_must(
     session: Session = Depends(session),
 ) -> Auth:
     model = Auth.decode_token(token)
-    user = session.get(User, model.id)
-    model._user = user
+    model._user = get_user(model.id, session)
+    return model
+
+
+async def async_auth_must(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(async_session),
+) -> Auth:
+    model = Auth.decode_token(token)
+    model._user = await aget_user(model.id, session)
     return model
 
 
 async def key_must(headers: ApiKey = Header(), session: Session = Depends(session)):
+    cached = key_cache.get(headers.api_key)
+    if cached is not None:
+        return session.merge(cached, load=False)
     model = session.exec(select(Key).where(Key.value == headers.api_key)).one_or_none()
     if model is None:
         raise TokenException(code.token_invalid, _(f"Could not validate key credentials: {headers.api_key}"))
+    key_cache.put(headers.api_key, model)
     return model
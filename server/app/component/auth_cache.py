@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from sqlmodel import SQLModel
+from app.component.environment import env
+from app.model.user.key import Key
+from app.model.user.user import User
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("server_auth_cache")
+
+T = TypeVar("T", bound=SQLModel)
+
+
+class AuthCache(Generic[T]):
+    r"""In-process LRU cache of the rows authentication resolves on every
+    request, with a TTL so changes made by other processes show up within
+    ``auth_cache_ttl`` seconds.
+
+    Entries are detached copies that never belong to a session. Callers merge
+    them into their request session (``merge(row, load=False)``, no query) to
+    get an instance they can modify and save.
+    """
+
+    def __init__(self, name: str, ttl: float | None = None, max_size: int | None = None) -> None:
+        self.name = name
+        self.ttl = ttl if ttl is not None else float(env("auth_cache_ttl", "60"))
+        self.max_size = max_size if max_size is not None else int(env("auth_cache_size", "10000"))
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+        # Sync routes resolve their dependencies in the threadpool
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, row: T) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        snapshot = type(row)(**row.model_dump())
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, **fields: Any) -> None:
+        with self._lock:
+            for key, (_, row) in list(self._entries.items()):
+                if all(getattr(row, name) == value for name, value in fields.items()):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# User rows by id, API keys by value
+user_cache: AuthCache[User] = AuthCache("user")
+key_cache: AuthCache[Key] = AuthCache("key")
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.invalidate(user_id)
+
+
+def invalidate_key(value: str) -> None:
+    key_cache.invalidate(value)
+
+
+def invalidate_user_on_commit(session: Session, user_id: int) -> None:
+    # For user rows updated by a statement, which the mapper events don't see
+    changed = (User, user_id, None)
+    _invalidate(changed)
+    session.info.setdefault("auth_cache_changed", []).append(changed)
+
+
+def auth_cache_stats() -> dict:
+    return {"user": user_cache.stats(), "key": key_cache.stats()}
+
+
+def _invalidate(changed: tuple[type, int, str | None]) -> None:
+    model, id, value = changed
+    if model is User:
+        invalidate_user(id)
+    else:
+        # The value itself may be what changed
+        key_cache.invalidate_where(id=id)
+        invalidate_key(value)
+
+
+# Any change to a user or key flushed by this process drops its cache entry,
+# e.g. profile and password updates, credit changes and key revocation. It's
+# dropped again on commit, in case a request cached the row in between.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+@event.listens_for(Key, "after_update")
+@event.listens_for(Key, "after_delete")
+def _row_changed(mapper, connection, target: User | Key) -> None:
+    # Kept by value, the instance is expired by the time the commit hook runs
+    changed = (type(target), target.id, getattr(target, "value", None))
+    _invalidate(changed)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_cache_changed", []).append(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session: Session) -> None:
+    for changed in session.info.pop("auth_cache_changed", []):
+        _invalidate(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _session_rolled_back(session: Session) -> None:
+    session.info.pop("auth_cache_changed", None)
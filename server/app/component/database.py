@@ -1,4 +1,7 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.component.environment import env, env_or_fail
 from utils import traceroot_wrapper as traceroot
 
@@ -19,6 +22,38 @@ engine = create_engine(
 logger.info("Database engine initialized successfully")
 
 
+def async_database_url(url: str) -> str:
+    """The url of an async driver for the same database: PostgreSQL urls get
+    asyncpg, urls already naming an async driver are kept. Raises ValueError
+    for databases without a supported async driver."""
+    parsed = make_url(url)
+    if parsed.get_dialect().is_async:
+        return url
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    raise ValueError(
+        f"database_url uses the sync driver {parsed.drivername}, which has no supported async counterpart; "
+        "use PostgreSQL or a url naming an async driver"
+    )
+
+
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Engine of the async route handlers, so queries don't block the event loop.
+    Created on first use, an unsupported database_url fails the async handlers
+    instead of the server startup."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(env_or_fail("database_url")),
+            echo=True if env("debug") == "on" else False,
+            pool_size=36,
+        )
+    return _async_engine
+
+
 def session_make():
     logger.debug("Creating new database session")
     session = Session(engine)
@@ -32,3 +67,15 @@ def session():
         logger.debug("Database session context established")
         yield session
         logger.debug("Database session context closed")
+
+
+def async_session_make() -> AsyncSession:
+    # Loaded attributes stay usable after commit, refreshing them would need an await
+    return AsyncSession(get_async_engine(), expire_on_commit=False)
+
+
+async def async_session():
+    logger.debug("Creating async database session context")
+    async with async_session_make() as session:
+        yield session
+        logger.debug("Async database session context closed")
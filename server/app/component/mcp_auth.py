@@ -0,0 +1,45 @@
+import os
+from camel.toolkits.mcp_toolkit import MCPToolkit
+from app.component.environment import env
+from utils import traceroot_wrapper as traceroot
+
+logger = traceroot.get_logger("server_mcp_auth")
+
+
+async def pre_instantiate_mcp_toolkit(config_dict: dict) -> bool:
+    """
+    Pre-instantiate MCP toolkit to complete authentication process
+
+    Args:
+        config_dict: MCP server configuration dictionary
+
+    Returns:
+        bool: Whether successfully instantiated and connected
+    """
+    try:
+        # Ensure unified auth directory for all mcp servers
+        for server_config in config_dict.get("mcpServers", {}).values():
+            if "env" not in server_config:
+                server_config["env"] = {}
+            # Set global auth directory to persist authentication across tasks
+            if "MCP_REMOTE_CONFIG_DIR" not in server_config["env"]:
+                server_config["env"]["MCP_REMOTE_CONFIG_DIR"] = env(
+                    "MCP_REMOTE_CONFIG_DIR",
+                    os.path.expanduser("~/.mcp-auth")
+                )
+
+        # Create MCP toolkit and attempt to connect
+        mcp_toolkit = MCPToolkit(config_dict=config_dict, timeout=30)
+        await mcp_toolkit.connect()
+
+        # Get tools list to ensure connection is successful
+        tools = mcp_toolkit.get_tools()
+        logger.info("MCP toolkit pre-instantiated", extra={"tools_count": len(tools)})
+
+        # Disconnect, authentication info is already saved
+        await mcp_toolkit.disconnect()
+        return True
+
+    except Exception as e:
+        logger.warning("MCP toolkit pre-instantiation failed", extra={"error": str(e)}, exc_info=True)
+        return False
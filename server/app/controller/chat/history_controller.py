@@ -4,12 +4,14 @@ from fastapi_pagination.ext.sqlmodel import paginate
 from app.model.chat.chat_history import ChatHistoryOut, ChatHistoryIn, ChatHistory, ChatHistoryUpdate, ChatStatus
 from app.model.chat.chat_history_grouped import ProjectGroup, GroupedHistoryResponse
 from fastapi_babel import _
+from sqlalchemy import and_, distinct, func, literal_column, or_
 from sqlmodel import Session, select, desc, case
 from app.component.auth import Auth, auth_must
 from app.component.database import session
 from utils import traceroot_wrapper as traceroot
 from typing import Optional, Dict, List
 from collections import defaultdict
+from datetime import datetime
 
 logger = traceroot.get_logger("server_chat_history")
 
@@ -60,103 +62,160 @@ def list_chat_history(session: Session = Depends(session), auth: Auth = Depends(
     return result
 
 
+def _project_key():
+    # Use project_id if available, fallback to task_id
+    return func.coalesce(func.nullif(ChatHistory.project_id, literal_column("''")), ChatHistory.task_id)
+
+
+def _newest_first(created_at, id) -> tuple:
+    return (
+        desc(case((created_at.is_(None), 0), else_=1)),  # Non-null created_at first
+        desc(created_at),  # Then by created_at descending
+        desc(id),  # Finally by id descending for records with same/null created_at
+    )
+
+
+def _encode_cursor(latest_at: datetime | None, latest_id: int) -> str:
+    return f"{latest_at.isoformat() if latest_at else ''}|{latest_id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        latest_at, latest_id = cursor.rsplit("|", 1)
+        return (datetime.fromisoformat(latest_at) if latest_at else None), int(latest_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _project_groups_stmt(user_id: int):
+    """Per-project aggregates of the user's histories, with the project's latest task, newest project first."""
+    key = _project_key()
+    stats = (
+        select(
+            key.label("project_id"),
+            func.count().label("task_count"),
+            func.coalesce(func.sum(ChatHistory.tokens), 0).label("total_tokens"),
+            func.count(case((ChatHistory.status == ChatStatus.done, 1))).label("total_completed_tasks"),
+            func.count(case((ChatHistory.status == ChatStatus.ongoing, 1))).label("total_ongoing_tasks"),
+        )
+        .where(ChatHistory.user_id == user_id)
+        .group_by(key)
+        .subquery()
+    )
+    ranked = (
+        select(
+            key.label("project_id"),
+            ChatHistory.id,
+            ChatHistory.created_at,
+            ChatHistory.project_name,
+            ChatHistory.question,
+            func.row_number()
+            .over(partition_by=key, order_by=_newest_first(ChatHistory.created_at, ChatHistory.id))
+            .label("rank"),
+        )
+        .where(ChatHistory.user_id == user_id)
+        .subquery()
+    )
+    latest = select(ranked).where(ranked.c.rank == 1).subquery()
+    return (
+        select(
+            stats,
+            latest.c.id.label("latest_id"),
+            latest.c.created_at.label("latest_at"),
+            latest.c.project_name,
+            latest.c.question,
+        )
+        .join(latest, latest.c.project_id == stats.c.project_id)
+        .order_by(*_newest_first(latest.c.created_at, latest.c.id))
+    ), latest
+
+
 @router.get("/histories/grouped", name="get grouped chat history")
 @traceroot.trace()
 def list_grouped_chat_history(
     include_tasks: Optional[bool] = Query(True, description="Whether to include individual tasks in groups"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Projects per page, all projects when not set"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     session: Session = Depends(session), 
     auth: Auth = Depends(auth_must)
 ) -> GroupedHistoryResponse:
-    """List chat histories grouped by project_id for current user."""
+    """List chat histories grouped by project_id for current user, newest project first."""
     user_id = auth.user.id
-    
-    # Get all histories for the user, ordered by creation time
-    stmt = (
-        select(ChatHistory)
-        .where(ChatHistory.user_id == user_id)
-        .order_by(
-            desc(case((ChatHistory.created_at.is_(None), 0), else_=1)),  # Non-null created_at first
-            desc(ChatHistory.created_at),  # Then by created_at descending
-            desc(ChatHistory.id)  # Finally by id descending for records with same/null created_at
-        )
-    )
-    
-    histories = session.exec(stmt).all()
-    
-    # Group histories by project_id
-    project_map: Dict[str, Dict] = defaultdict(lambda: {
-        'project_id': '',
-        'project_name': None,
-        'total_tokens': 0,
-        'task_count': 0,
-        'latest_task_date': '',
-        'last_prompt': None,
-        'tasks': [],
-        'total_completed_tasks': 0,
-        'total_ongoing_tasks': 0,
-        'average_tokens_per_task': 0
-    })
-    
-    for history in histories:
-        # Use project_id if available, fallback to task_id
-        project_id = history.project_id if history.project_id else history.task_id
-        project_data = project_map[project_id]
-        
-        # Initialize project data
-        if not project_data['project_id']:
-            project_data['project_id'] = project_id
-            project_data['project_name'] = history.project_name or f"Project {project_id}"
-            project_data['latest_task_date'] = history.created_at.isoformat() if history.created_at else ''
-            project_data['last_prompt'] = history.question  # Set the most recent question
-        
-        # Convert to ChatHistoryOut format
-        history_out = ChatHistoryOut(**history.model_dump())
-        
-        # Add task to project if requested
-        if include_tasks:
-            project_data['tasks'].append(history_out)
-        
-        # Update project statistics
-        project_data['task_count'] += 1
-        project_data['total_tokens'] += history.tokens or 0
-
-        # Count completed and failed tasks
-        # ChatStatus.ongoing = 1, ChatStatus.done = 2
-        if history.status == ChatStatus.done:
-            project_data['total_completed_tasks'] += 1
-        elif history.status == ChatStatus.ongoing:
-            project_data['total_ongoing_tasks'] += 1
+
+    stmt, latest = _project_groups_stmt(user_id)
+    if cursor:
+        latest_at, latest_id = _decode_cursor(cursor)
+        if latest_at is None:
+            stmt = stmt.where(latest.c.created_at.is_(None), latest.c.id < latest_id)
         else:
-            # Only count as failed if not ongoing and not done
-            project_data['total_failed_tasks'] += 1
-        
-        # Update latest task date and last prompt
-        if history.created_at:
-            task_date = history.created_at.isoformat()
-            if not project_data['latest_task_date'] or task_date > project_data['latest_task_date']:
-                project_data['latest_task_date'] = task_date
-                project_data['last_prompt'] = history.question
-    
-    # Convert to ProjectGroup objects and sort
-    projects = []
-    for project_data in project_map.values():
-        # Sort tasks within each project by creation date (oldest first)
-        if include_tasks:
-            project_data['tasks'].sort(key=lambda x: (x.created_at is None, x.created_at or ''), reverse=False)
-        
-        project_group = ProjectGroup(**project_data)
-        projects.append(project_group)
-    
-    # Sort projects by latest task date (newest first)
-    projects.sort(key=lambda x: x.latest_task_date, reverse=True)
-    
-    response = GroupedHistoryResponse(projects=projects)
-    
+            stmt = stmt.where(
+                or_(
+                    latest.c.created_at < latest_at,
+                    and_(latest.c.created_at == latest_at, latest.c.id < latest_id),
+                    latest.c.created_at.is_(None),
+                )
+            )
+    if limit:
+        stmt = stmt.limit(limit + 1)
+    rows = session.exec(stmt).all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].latest_at, rows[-1].latest_id)
+
+    # Tasks of the projects on this page only, oldest first
+    tasks: Dict[str, List[ChatHistoryOut]] = defaultdict(list)
+    if include_tasks and rows:
+        key = _project_key()
+        histories = session.exec(
+            select(key, ChatHistory)
+            .where(ChatHistory.user_id == user_id)
+            .where(key.in_([row.project_id for row in rows]))
+            .order_by(case((ChatHistory.created_at.is_(None), 1), else_=0), ChatHistory.created_at, desc(ChatHistory.id))
+        )
+        for project_id, history in histories:
+            tasks[project_id].append(ChatHistoryOut(**history.model_dump()))
+
+    projects = [
+        ProjectGroup(
+            project_id=row.project_id,
+            project_name=row.project_name or f"Project {row.project_id}",
+            total_tokens=row.total_tokens,
+            task_count=row.task_count,
+            latest_task_date=row.latest_at.isoformat() if row.latest_at else "",
+            last_prompt=row.question,
+            tasks=tasks[row.project_id],
+            total_completed_tasks=row.total_completed_tasks,
+            total_ongoing_tasks=row.total_ongoing_tasks,
+        )
+        for row in rows
+    ]
+
+    if limit:
+        # Totals cover all of the user's projects, not just this page
+        total_projects, total_tasks, total_tokens = session.exec(
+            select(
+                func.count(distinct(_project_key())),
+                func.count(),
+                func.coalesce(func.sum(ChatHistory.tokens), 0),
+            ).where(ChatHistory.user_id == user_id)
+        ).one()
+        response = GroupedHistoryResponse(
+            projects=projects,
+            total_projects=total_projects,
+            total_tasks=total_tasks,
+            total_tokens=total_tokens,
+            next_cursor=next_cursor,
+        )
+    else:
+        response = GroupedHistoryResponse(projects=projects)
+
     logger.debug("Grouped chat histories listed", extra={
         "user_id": user_id, 
         "total_projects": response.total_projects,
         "total_tasks": response.total_tasks,
-        "include_tasks": include_tasks
+        "include_tasks": include_tasks,
+        "page_projects": len(projects),
     })
     
     return response
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlmodel import Session, asc, select
-from app.component.database import session
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.component.database import async_session, session
 import json
 import asyncio
 from itsdangerous import SignatureExpired, BadTimeSignature
 from starlette.responses import StreamingResponse
 from app.model.chat.chat_share import ChatHistoryShareOut, ChatShare, ChatShareIn
-from app.model.chat.chat_step import ChatStep
+from app.model.chat.chat_step import ChatStep, parse_last_event_id, playback_event
 from app.model.chat.chat_history import ChatHistory
 from utils import traceroot_wrapper as traceroot
 
@@ -43,10 +45,16 @@ def get_share_info(token: str, session: Session = Depends(session)):
 
 @router.get("/share/playback/{token}", name="Playback shared chat via SSE")
 @traceroot.trace()
-async def share_playback(token: str, session: Session = Depends(session), delay_time: float = 0):
+async def share_playback(
+    token: str,
+    session: AsyncSession = Depends(async_session),
+    delay_time: float = 0,
+    last_event_id: Optional[str] = Header(default=None),
+):
     """
     Playbacks the chat history via a sharing token (SSE).
     delay_time: control sse interval, max 5 seconds
+    Last-Event-ID: resume after the step with this id
     """
     if delay_time > 5:
         logger.debug("Delay time capped", extra={"requested": delay_time, "capped": 5})
@@ -60,33 +68,26 @@ async def share_playback(token: str, session: Session = Depends(session), delay_
     except BadTimeSignature:
         logger.warning("Shared chat playback failed: invalid token", extra={"token_prefix": token[:10]})
         raise HTTPException(status_code=400, detail="Share link is invalid.")
+    after_id = parse_last_event_id(last_event_id)
 
     async def event_generator():
+        count = 0
         try:
-            stmt = select(ChatStep).where(ChatStep.task_id == task_id).order_by(asc(ChatStep.id))
-            steps = session.exec(stmt).all()
+            async for step in ChatStep.aiter_playback(task_id, session, after_id=after_id):
+                if count == 0:
+                    logger.info("Shared chat playback started", extra={"task_id": task_id, "after_id": after_id, "delay_time": delay_time})
+                count += 1
+                yield playback_event(step)
 
-            if not steps:
+                if delay_time > 0 and step.step != "create_agent":
+                    await asyncio.sleep(delay_time)
+
+            if count == 0 and after_id is None:
                 logger.warning("No steps found for playback", extra={"task_id": task_id})
                 yield f"data: {json.dumps({'error': 'No steps found for this task.'})}\n\n"
                 return
 
-            logger.info("Shared chat playback started", extra={"task_id": task_id, "step_count": len(steps), "delay_time": delay_time})
-            
-            for idx, step in enumerate(steps, start=1):
-                step_data = {
-                    "id": step.id,
-                    "task_id": step.task_id,
-                    "step": step.step,
-                    "data": step.data,
-                    "created_at": step.created_at.isoformat() if step.created_at else None,
-                }
-                yield f"data: {json.dumps(step_data)}\n\n"
-                
-                if delay_time > 0 and step.step != "create_agent":
-                    await asyncio.sleep(delay_time)
-            
-            logger.info("Shared chat playback completed", extra={"task_id": task_id, "step_count": len(steps)})
+            logger.info("Shared chat playback completed", extra={"task_id": task_id, "step_count": count})
         except Exception as e:
             logger.error("Shared chat playback error", extra={"task_id": task_id, "error": str(e)}, exc_info=True)
             yield f"data: {json.dumps({'error': 'Playback error occurred.'})}\n\n"
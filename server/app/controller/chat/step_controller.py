@@ -1,25 +1,41 @@
 import asyncio
 import json
-from typing import List, Optional
-from fastapi import Depends, HTTPException, Query, Response, APIRouter
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from fastapi import Depends, Header, HTTPException, Query, Request, Response, APIRouter
 from fastapi.responses import StreamingResponse
-from sqlmodel import Session, asc, select
-from sqlalchemy.sql.expression import case
-from app.component.database import session
-from app.component.auth import Auth, auth_must
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.component.database import async_session
+from app.component.auth import Auth, async_auth_must
 from fastapi_babel import _
-from app.model.chat.chat_step import ChatStep, ChatStepOut, ChatStepIn
+from app.model.chat.chat_step import (
+    ChatStep,
+    ChatStepOut,
+    ChatStepIn,
+    ChatStepBulkItemOut,
+    parse_last_event_id,
+    playback_event,
+)
 from utils import traceroot_wrapper as traceroot
 
 logger = traceroot.get_logger("server_chat_step")
 
 router = APIRouter(prefix="/chat", tags=["Chat Step Management"])
 
+# Rows per multi-row INSERT statement, keeps the bound parameter count well below driver limits
+BULK_INSERT_CHUNK = 500
+
 
 @router.get("/steps", name="list chat steps", response_model=List[ChatStepOut])
 @traceroot.trace()
 async def list_chat_steps(
-    task_id: str, step: Optional[str] = None, session: Session = Depends(session), auth: Auth = Depends(auth_must)
+    task_id: str,
+    step: Optional[str] = None,
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
     """List chat steps for a task with optional step type filtering."""
     user_id = auth.user.id
@@ -29,7 +45,7 @@ async def list_chat_steps(
     if step is not None:
         query = query.where(ChatStep.step == step)
     
-    chat_steps = session.exec(query).all()
+    chat_steps = (await session.exec(query)).all()
     logger.debug("Chat steps listed", extra={"user_id": user_id, "task_id": task_id, "step_type": step, "count": len(chat_steps)})
     return chat_steps
 
@@ -37,44 +53,36 @@ async def list_chat_steps(
 @router.get("/steps/playback/{task_id}", name="Playback Chat Step via SSE")
 @traceroot.trace()
 async def share_playback(
-    task_id: str, delay_time: float = 0, session: Session = Depends(session), auth: Auth = Depends(auth_must)
+    task_id: str,
+    delay_time: float = 0,
+    last_event_id: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
-    """Playback chat steps via SSE stream."""
+    """Playback chat steps via SSE stream, resuming after ``Last-Event-ID`` if given."""
     user_id = auth.user.id
     if delay_time > 5:
         logger.debug("Delay time capped", extra={"user_id": user_id, "task_id": task_id, "requested": delay_time, "capped": 5})
         delay_time = 5
+    after_id = parse_last_event_id(last_event_id)
 
     async def event_generator():
+        count = 0
         try:
-            stmt = select(ChatStep).where(ChatStep.task_id == task_id).order_by(
-                asc(case((ChatStep.timestamp.is_(None), 1), else_=0)),
-                asc(ChatStep.timestamp),
-                asc(ChatStep.id)
-            )
-            steps = session.exec(stmt).all()
+            async for step in ChatStep.aiter_playback(task_id, session, after_id=after_id):
+                if count == 0:
+                    logger.info("Chat step playback started", extra={"user_id": user_id, "task_id": task_id, "after_id": after_id, "delay_time": delay_time})
+                count += 1
+                yield playback_event(step)
+                if delay_time > 0:
+                    await asyncio.sleep(delay_time)
 
-            if not steps:
+            if count == 0 and after_id is None:
                 logger.warning("No steps found for playback", extra={"user_id": user_id, "task_id": task_id})
                 yield f"data: {json.dumps({'error': 'No steps found for this task.'})}\n\n"
                 return
 
-            logger.info("Chat step playback started", extra={"user_id": user_id, "task_id": task_id, "step_count": len(steps), "delay_time": delay_time})
-            
-            for step in steps:
-                step_data = {
-                    "id": step.id,
-                    "task_id": step.task_id,
-                    "step": step.step,
-                    "data": step.data,
-                    "created_at": step.created_at.isoformat() if step.created_at else None,
-                }
-                yield f"data: {json.dumps(step_data)}\n\n"
-                if delay_time > 0:
-                    await asyncio.sleep(delay_time)
-
-            
-            logger.info("Chat step playback completed", extra={"user_id": user_id, "task_id": task_id, "step_count": len(steps)})
+            logger.info("Chat step playback completed", extra={"user_id": user_id, "task_id": task_id, "step_count": count})
         except Exception as e:
             logger.error("Chat step playback error", extra={"user_id": user_id, "task_id": task_id, "error": str(e)}, exc_info=True)
             yield f"data: {json.dumps({'error': 'Playback error occurred.'})}\n\n"
@@ -84,10 +92,12 @@ async def share_playback(
 
 @router.get("/steps/{step_id}", name="get chat step", response_model=ChatStepOut)
 @traceroot.trace()
-async def get_chat_step(step_id: int, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def get_chat_step(
+    step_id: int, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)
+):
     """Get specific chat step."""
     user_id = auth.user.id
-    chat_step = session.get(ChatStep, step_id)
+    chat_step = await session.get(ChatStep, step_id)
     
     if not chat_step:
         logger.warning("Chat step not found", extra={"user_id": user_id, "step_id": step_id})
@@ -99,7 +109,7 @@ async def get_chat_step(step_id: int, session: Session = Depends(session), auth:
 
 @router.post("/steps", name="create chat step")
 @traceroot.trace()
-async def create_chat_step(step: ChatStepIn, session: Session = Depends(session)):
+async def create_chat_step(step: ChatStepIn, session: AsyncSession = Depends(async_session)):
     """Create new chat step. TODO: Implement request source validation."""
     try:
         chat_step = ChatStep(
@@ -109,24 +119,124 @@ async def create_chat_step(step: ChatStepIn, session: Session = Depends(session)
             timestamp=step.timestamp
         )
         session.add(chat_step)
-        session.commit()
-        session.refresh(chat_step)
+        await session.commit()
+        await session.refresh(chat_step)
         logger.info("Chat step created", extra={"step_id": chat_step.id, "task_id": step.task_id, "step_type": step.step})
         return {"code": 200, "msg": "success"}
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Chat step creation failed", extra={"task_id": step.task_id, "step_type": step.step, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/steps/bulk", name="create chat steps in bulk")
+@traceroot.trace()
+async def create_chat_steps_bulk(request: Request, session: AsyncSession = Depends(async_session)):
+    """Create many chat steps at once from a JSON array or an NDJSON stream
+    (``Content-Type: application/x-ndjson``). Valid items are written with one
+    multi-row INSERT per chunk; the response reports the status of every item.
+    TODO: Implement request source validation."""
+    results: list[ChatStepBulkItemOut] = []
+    chunk: list[tuple[int, dict]] = []
+
+    async for index, item in _iter_bulk_items(request):
+        if isinstance(item, str):
+            results.append(ChatStepBulkItemOut(index=index, status="error", error=item))
+            continue
+        now = datetime.now()
+        chunk.append(
+            (
+                index,
+                {
+                    "task_id": item.task_id,
+                    "step": item.step,
+                    "data": item.data,
+                    "timestamp": item.timestamp,
+                    "created_at": now,
+                    "updated_at": now,
+                },
+            )
+        )
+        if len(chunk) >= BULK_INSERT_CHUNK:
+            results.extend(await _insert_chunk(session, chunk))
+            chunk = []
+    if chunk:
+        results.extend(await _insert_chunk(session, chunk))
+
+    results.sort(key=lambda r: r.index)
+    inserted = sum(1 for r in results if r.status == "ok")
+    logger.info("Chat steps created in bulk", extra={"inserted": inserted, "failed": len(results) - inserted})
+    return {
+        "code": 200,
+        "msg": "success",
+        "inserted": inserted,
+        "failed": len(results) - inserted,
+        "items": results,
+    }
+
+
+async def _iter_bulk_items(request: Request) -> AsyncIterator[tuple[int, ChatStepIn | str]]:
+    """Yield ``(index, ChatStepIn)`` for valid items and ``(index, error)`` for invalid ones."""
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        index = 0
+        buffer = b""
+        async for body_chunk in request.stream():
+            buffer += body_chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, _parse_bulk_item(line)
+                    index += 1
+        if buffer.strip():
+            yield index, _parse_bulk_item(buffer)
+        return
+
+    try:
+        payload = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of chat steps")
+    for index, raw in enumerate(payload):
+        yield index, _validate_bulk_item(raw)
+
+
+def _parse_bulk_item(line: bytes) -> ChatStepIn | str:
+    try:
+        return _validate_bulk_item(json.loads(line))
+    except json.JSONDecodeError as e:
+        return f"Invalid JSON: {e}"
+
+
+def _validate_bulk_item(raw) -> ChatStepIn | str:
+    try:
+        return ChatStepIn.model_validate(raw)
+    except ValidationError as e:
+        return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+async def _insert_chunk(session: AsyncSession, chunk: list[tuple[int, dict]]) -> list[ChatStepBulkItemOut]:
+    try:
+        await session.exec(insert(ChatStep).values([row for _, row in chunk]))
+        await session.commit()
+        return [ChatStepBulkItemOut(index=index, status="ok") for index, _ in chunk]
+    except Exception as e:
+        await session.rollback()
+        logger.error("Chat step bulk insert failed", extra={"rows": len(chunk), "error": str(e)}, exc_info=True)
+        return [ChatStepBulkItemOut(index=index, status="error", error="Insert failed") for index, _ in chunk]
+
+
 @router.put("/steps/{step_id}", name="update chat step", response_model=ChatStepOut)
 @traceroot.trace()
 async def update_chat_step(
-    step_id: int, chat_step_update: ChatStep, session: Session = Depends(session), auth: Auth = Depends(auth_must)
+    step_id: int,
+    chat_step_update: ChatStep,
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
     """Update chat step."""
     user_id = auth.user.id
-    db_chat_step = session.get(ChatStep, step_id)
+    db_chat_step = await session.get(ChatStep, step_id)
     
     if not db_chat_step:
         logger.warning("Chat step not found for update", extra={"user_id": user_id, "step_id": step_id})
@@ -137,33 +247,35 @@ async def update_chat_step(
         for key, value in update_data.items():
             setattr(db_chat_step, key, value)
         session.add(db_chat_step)
-        session.commit()
-        session.refresh(db_chat_step)
+        await session.commit()
+        await session.refresh(db_chat_step)
         logger.info("Chat step updated", extra={"user_id": user_id, "step_id": step_id, "task_id": db_chat_step.task_id, "fields_updated": list(update_data.keys())})
         return db_chat_step
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Chat step update failed", extra={"user_id": user_id, "step_id": step_id, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.delete("/steps/{step_id}", name="delete chat step")
 @traceroot.trace()
-async def delete_chat_step(step_id: int, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def delete_chat_step(
+    step_id: int, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)
+):
     """Delete chat step."""
     user_id = auth.user.id
-    db_chat_step = session.get(ChatStep, step_id)
+    db_chat_step = await session.get(ChatStep, step_id)
     
     if not db_chat_step:
         logger.warning("Chat step not found for deletion", extra={"user_id": user_id, "step_id": step_id})
         raise HTTPException(status_code=404, detail=_("Chat step not found"))
 
     try:
-        session.delete(db_chat_step)
-        session.commit()
+        await session.delete(db_chat_step)
+        await session.commit()
         logger.info("Chat step deleted", extra={"user_id": user_id, "step_id": step_id, "task_id": db_chat_step.task_id})
         return Response(status_code=204)
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Chat step deletion failed", extra={"user_id": user_id, "step_id": step_id, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
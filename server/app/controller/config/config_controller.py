@@ -1,8 +1,9 @@
 from typing import List, Optional
 from fastapi import Depends, HTTPException, Query, Response, APIRouter
-from sqlmodel import Session, select, or_
-from app.component.database import session
-from app.component.auth import Auth, auth_must
+from sqlmodel import select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.component.database import async_session
+from app.component.auth import Auth, async_auth_must
 from fastapi_babel import _
 from app.model.config.config import Config, ConfigCreate, ConfigUpdate, ConfigInfo, ConfigOut
 from utils import traceroot_wrapper as traceroot
@@ -15,7 +16,9 @@ router = APIRouter(tags=["Config Management"])
 @router.get("/configs", name="list configs", response_model=list[ConfigOut])
 @traceroot.trace()
 async def list_configs(
-    config_group: Optional[str] = None, session: Session = Depends(session), auth: Auth = Depends(auth_must)
+    config_group: Optional[str] = None,
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
     """List user's configurations with optional group filtering."""
     user_id = auth.user.id
@@ -24,7 +27,7 @@ async def list_configs(
     if config_group is not None:
         query = query.where(Config.config_group == config_group)
     
-    configs = session.exec(query).all()
+    configs = (await session.exec(query)).all()
     logger.debug("Configs listed", extra={"user_id": user_id, "config_group": config_group, "count": len(configs)})
     return configs
 
@@ -33,15 +36,15 @@ async def list_configs(
 @traceroot.trace()
 async def get_config(
     config_id: int,
-    session: Session = Depends(session),
-    auth: Auth = Depends(auth_must),
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
     query = select(Config).where(Config.user_id == auth.user.id)
 
     if config_id is not None:
         query = query.where(Config.id == config_id)
 
-    config = session.exec(query).first()
+    config = (await session.exec(query)).first()
 
     if not config:
         logger.warning("Config not found")
@@ -53,7 +56,9 @@ async def get_config(
 
 @router.post("/configs", name="create config", response_model=ConfigOut)
 @traceroot.trace()
-async def create_config(config: ConfigCreate, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def create_config(
+    config: ConfigCreate, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)
+):
     """Create new configuration."""
     user_id = auth.user.id
     
@@ -62,8 +67,8 @@ async def create_config(config: ConfigCreate, session: Session = Depends(session
         raise HTTPException(status_code=400, detail=_("Invalid config name or group"))
 
     # Check if configuration already exists
-    existing_config = session.exec(
-        select(Config).where(Config.user_id == user_id, Config.config_name == config.config_name)
+    existing_config = (
+        await session.exec(select(Config).where(Config.user_id == user_id, Config.config_name == config.config_name))
     ).first()
 
     if existing_config:
@@ -78,12 +83,12 @@ async def create_config(config: ConfigCreate, session: Session = Depends(session
             config_group=config.config_group,
         )
         session.add(db_config)
-        session.commit()
-        session.refresh(db_config)
+        await session.commit()
+        await session.refresh(db_config)
         logger.info("Config created", extra={"user_id": user_id, "config_id": db_config.id, "config_group": config.config_group, "config_name": config.config_name})
         return db_config
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Config creation failed", extra={"user_id": user_id, "config_name": config.config_name, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -91,11 +96,14 @@ async def create_config(config: ConfigCreate, session: Session = Depends(session
 @router.put("/configs/{config_id}", name="update config", response_model=ConfigOut)
 @traceroot.trace()
 async def update_config(
-    config_id: int, config_update: ConfigUpdate, session: Session = Depends(session), auth: Auth = Depends(auth_must)
+    config_id: int,
+    config_update: ConfigUpdate,
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
     """Update configuration."""
     user_id = auth.user.id
-    db_config = session.exec(select(Config).where(Config.id == config_id, Config.user_id == user_id)).first()
+    db_config = (await session.exec(select(Config).where(Config.id == config_id, Config.user_id == user_id))).first()
 
     if not db_config:
         logger.warning("Config not found for update", extra={"user_id": user_id, "config_id": config_id})
@@ -107,11 +115,13 @@ async def update_config(
         raise HTTPException(status_code=400, detail=_("Invalid configuration group"))
 
     # Check for conflicts with other configurations
-    existing_config = session.exec(
-        select(Config).where(
-            Config.user_id == user_id,
-            Config.config_name == config_update.config_name,
-            Config.id != config_id,
+    existing_config = (
+        await session.exec(
+            select(Config).where(
+                Config.user_id == user_id,
+                Config.config_name == config_update.config_name,
+                Config.id != config_id,
+            )
         )
     ).first()
 
@@ -124,34 +134,36 @@ async def update_config(
         db_config.config_value = config_update.config_value
         db_config.config_group = config_update.config_group
         session.add(db_config)
-        session.commit()
-        session.refresh(db_config)
+        await session.commit()
+        await session.refresh(db_config)
         logger.info("Config updated", extra={"user_id": user_id, "config_id": config_id, "config_group": config_update.config_group})
         return db_config
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Config update failed", extra={"user_id": user_id, "config_id": config_id, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.delete("/configs/{config_id}", name="delete config")
 @traceroot.trace()
-async def delete_config(config_id: int, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def delete_config(
+    config_id: int, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)
+):
     """Delete configuration."""
     user_id = auth.user.id
-    db_config = session.exec(select(Config).where(Config.id == config_id, Config.user_id == user_id)).first()
+    db_config = (await session.exec(select(Config).where(Config.id == config_id, Config.user_id == user_id))).first()
 
     if not db_config:
         logger.warning("Config not found for deletion", extra={"user_id": user_id, "config_id": config_id})
         raise HTTPException(status_code=404, detail=_("Configuration not found"))
 
     try:
-        session.delete(db_config)
-        session.commit()
+        await session.delete(db_config)
+        await session.commit()
         logger.info("Config deleted", extra={"user_id": user_id, "config_id": config_id, "config_name": db_config.config_name})
         return Response(status_code=204)
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Config deletion failed", extra={"user_id": user_id, "config_id": config_id, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
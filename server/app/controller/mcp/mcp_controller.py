@@ -1,18 +1,17 @@
-import os
 from typing import Dict
 from fastapi import Depends, HTTPException, APIRouter
 from fastapi_babel import _
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlmodel import paginate
-from sqlmodel import Session, col, select
+from fastapi_pagination.ext.sqlmodel import apaginate
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload, with_loader_criteria
-from app.component.auth import Auth, auth_must
-from app.component.database import session
+from app.component.auth import Auth, async_auth_must
+from app.component.database import async_session
 from app.model.mcp.mcp import Mcp, McpOut, McpType
 from app.model.mcp.mcp_env import McpEnv, Status as McpEnvStatus
 from app.model.mcp.mcp_user import McpImportType, McpUser, Status
-from camel.toolkits.mcp_toolkit import MCPToolkit
-from app.component.environment import env
+from app.component.mcp_auth import pre_instantiate_mcp_toolkit
 from utils import traceroot_wrapper as traceroot
 
 logger = traceroot.get_logger("server_mcp_controller")
@@ -27,53 +26,14 @@ from app.component.validator.McpServer import (
 router = APIRouter(tags=["Mcp Servers"])
 
 
-async def pre_instantiate_mcp_toolkit(config_dict: dict) -> bool:
-    """
-    Pre-instantiate MCP toolkit to complete authentication process
-
-    Args:
-        config_dict: MCP server configuration dictionary
-
-    Returns:
-        bool: Whether successfully instantiated and connected
-    """
-    try:
-        # Ensure unified auth directory for all mcp servers
-        for server_config in config_dict.get("mcpServers", {}).values():
-            if "env" not in server_config:
-                server_config["env"] = {}
-            # Set global auth directory to persist authentication across tasks
-            if "MCP_REMOTE_CONFIG_DIR" not in server_config["env"]:
-                server_config["env"]["MCP_REMOTE_CONFIG_DIR"] = env(
-                    "MCP_REMOTE_CONFIG_DIR",
-                    os.path.expanduser("~/.mcp-auth")
-                )
-
-        # Create MCP toolkit and attempt to connect
-        mcp_toolkit = MCPToolkit(config_dict=config_dict, timeout=30)
-        await mcp_toolkit.connect()
-
-        # Get tools list to ensure connection is successful
-        tools = mcp_toolkit.get_tools()
-        logger.info("MCP toolkit pre-instantiated", extra={"tools_count": len(tools)})
-
-        # Disconnect, authentication info is already saved
-        await mcp_toolkit.disconnect()
-        return True
-
-    except Exception as e:
-        logger.warning("MCP toolkit pre-instantiation failed", extra={"error": str(e)}, exc_info=True)
-        return False
-
-
 @router.get("/mcps", name="mcp list")
 @traceroot.trace()
 async def gets(
     keyword: str | None = None,
     category_id: int | None = None,
     mine: int | None = None,
-    session: Session = Depends(session),
-    auth: Auth = Depends(auth_must),
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ) -> Page[McpOut]:
     """List MCP servers with optional filtering."""
     user_id = auth.user.id
@@ -100,7 +60,7 @@ async def gets(
             )
         )
     
-    result = paginate(session, stmt)
+    result = await apaginate(session, stmt)
     total = result.total if hasattr(result, 'total') else 0
     logger.debug("MCP list retrieved", extra={"user_id": user_id, "keyword": keyword, "category_id": category_id, "mine": mine, "total": total})
     return result
@@ -108,11 +68,11 @@ async def gets(
 
 @router.get("/mcp", name="mcp detail", response_model=McpOut)
 @traceroot.trace()
-async def get(id: int, session: Session = Depends(session)):
+async def get(id: int, session: AsyncSession = Depends(async_session)):
     """Get MCP server details."""
     try:
         stmt = select(Mcp).where(Mcp.no_delete(), Mcp.id == id).options(selectinload(Mcp.category), selectinload(Mcp.envs))
-        model = session.exec(stmt).one()
+        model = (await session.exec(stmt)).one()
         logger.debug("MCP detail retrieved", extra={"mcp_id": id, "mcp_key": model.key})
         return model
     except Exception as e:
@@ -122,16 +82,16 @@ async def get(id: int, session: Session = Depends(session)):
 
 @router.post("/mcp/install", name="mcp install")
 @traceroot.trace()
-async def install(mcp_id: int, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def install(mcp_id: int, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)):
     """Install MCP server for user."""
     user_id = auth.user.id
     
-    mcp = session.get_one(Mcp, mcp_id)
+    mcp = await session.get_one(Mcp, mcp_id)
     if not mcp:
         logger.warning("MCP install failed: MCP not found", extra={"user_id": user_id, "mcp_id": mcp_id})
         raise HTTPException(status_code=404, detail=_("Mcp not found"))
     
-    exists = session.exec(select(McpUser).where(McpUser.mcp_id == mcp.id, McpUser.user_id == user_id)).first()
+    exists = (await session.exec(select(McpUser).where(McpUser.mcp_id == mcp.id, McpUser.user_id == user_id))).first()
     if exists:
         logger.warning("MCP install failed: already installed", extra={"user_id": user_id, "mcp_id": mcp_id, "mcp_key": mcp.key})
         raise HTTPException(status_code=400, detail=_("mcp is installed"))
@@ -168,10 +128,11 @@ async def install(mcp_id: int, session: Session = Depends(session), auth: Auth =
             env=install_command["env"],
             server_url=None,
         )
-        mcp_user.save()
+        await mcp_user.asave(session)
         logger.info("MCP installed", extra={"user_id": user_id, "mcp_id": mcp_id, "mcp_key": mcp.key})
         return mcp_user
     except Exception as e:
+        await session.rollback()
         logger.error("MCP installation failed", extra={"user_id": user_id, "mcp_id": mcp_id, "mcp_key": mcp.key, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
@@ -179,7 +140,10 @@ async def install(mcp_id: int, session: Session = Depends(session), auth: Auth =
 @router.post("/mcp/import/{mcp_type}", name="mcp import")
 @traceroot.trace()
 async def import_mcp(
-    mcp_type: McpImportType, mcp_data: dict, session: Session = Depends(session), auth: Auth = Depends(auth_must)
+    mcp_type: McpImportType,
+    mcp_data: dict,
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ):
     """Import MCP servers (local or remote)."""
     user_id = auth.user.id
@@ -226,9 +190,10 @@ async def import_mcp(
                     env=data.env,
                     server_url=None,
                 )
-                mcp_user.save()
+                await mcp_user.asave(session)
                 imported_count += 1
             except Exception as e:
+                await session.rollback()
                 logger.error("Failed to import local MCP", extra={"user_id": user_id, "mcp_name": name, "error": str(e)}, exc_info=True)
         
         logger.info("Local MCPs imported", extra={"user_id": user_id, "count": imported_count})
@@ -254,9 +219,10 @@ async def import_mcp(
                 mcp_name=data.server_name,
                 server_url=data.server_url,
             )
-            mcp_user.save()
+            await mcp_user.asave(session)
             logger.info("Remote MCP imported", extra={"user_id": user_id, "server_name": data.server_name, "server_url": data.server_url})
             return mcp_user
         except Exception as e:
+            await session.rollback()
             logger.error("Remote MCP import failed", extra={"user_id": user_id, "server_name": data.server_name, "error": str(e)}, exc_info=True)
             raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
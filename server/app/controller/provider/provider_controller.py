@@ -2,13 +2,14 @@ from typing import List, Optional
 from fastapi import Depends, HTTPException, Query, Response, APIRouter
 from fastapi_babel import _
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlmodel import paginate
+from fastapi_pagination.ext.sqlmodel import apaginate
 from sqlalchemy import update
-from sqlmodel import Session, select, col
+from sqlmodel import select, col
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.component.database import session
-from app.component.auth import Auth, auth_must
+from app.component.database import async_session
+from app.component.auth import Auth, async_auth_must
 from app.model.provider.provider import Provider, ProviderIn, ProviderOut, ProviderPreferIn
 from utils import traceroot_wrapper as traceroot
 
@@ -22,8 +23,8 @@ router = APIRouter(tags=["Provider Management"])
 async def gets(
     keyword: str | None = None,
     prefer: Optional[bool] = Query(None, description="Filter by prefer status"),
-    session: Session = Depends(session),
-    auth: Auth = Depends(auth_must),
+    session: AsyncSession = Depends(async_session),
+    auth: Auth = Depends(async_auth_must),
 ) -> Page[ProviderOut]:
     """List user's providers with optional filtering."""
     user_id = auth.user.id
@@ -34,16 +35,16 @@ async def gets(
         stmt = stmt.where(Provider.prefer == prefer)
     stmt = stmt.order_by(col(Provider.created_at).desc(), col(Provider.id).desc())
     logger.debug("Providers listed", extra={"user_id": user_id, "keyword": keyword, "prefer_filter": prefer})
-    return paginate(session, stmt)
+    return await apaginate(session, stmt)
 
 
 @router.get("/provider", name="get provider detail", response_model=ProviderOut)
 @traceroot.trace()
-async def get(id: int, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def get(id: int, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)):
     """Get provider details."""
     user_id = auth.user.id
     stmt = select(Provider).where(Provider.user_id == user_id, Provider.no_delete(), Provider.id == id)
-    model = session.exec(stmt).one_or_none()
+    model = (await session.exec(stmt)).one_or_none()
     if not model:
         logger.warning("Provider not found", extra={"user_id": user_id, "provider_id": id})
         raise HTTPException(status_code=404, detail=_("Provider not found"))
@@ -53,12 +54,12 @@ async def get(id: int, session: Session = Depends(session), auth: Auth = Depends
 
 @router.post("/provider", name="create provider", response_model=ProviderOut)
 @traceroot.trace()
-async def post(data: ProviderIn, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def post(data: ProviderIn, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)):
     """Create a new provider."""
     user_id = auth.user.id
     try:
         model = Provider(**data.model_dump(), user_id=user_id)
-        model.save(session)
+        await model.asave(session)
         logger.info("Provider created", extra={"user_id": user_id, "provider_id": model.id, "provider_name": data.provider_name})
         return model
     except Exception as e:
@@ -68,11 +69,13 @@ async def post(data: ProviderIn, session: Session = Depends(session), auth: Auth
 
 @router.put("/provider/{id}", name="update provider", response_model=ProviderOut)
 @traceroot.trace()
-async def put(id: int, data: ProviderIn, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def put(
+    id: int, data: ProviderIn, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)
+):
     """Update provider details."""
     user_id = auth.user.id
-    model = session.exec(
-        select(Provider).where(Provider.user_id == user_id, Provider.no_delete(), Provider.id == id)
+    model = (
+        await session.exec(select(Provider).where(Provider.user_id == user_id, Provider.no_delete(), Provider.id == id))
     ).one_or_none()
     if not model:
         logger.warning("Provider not found for update", extra={"user_id": user_id, "provider_id": id})
@@ -85,8 +88,8 @@ async def put(id: int, data: ProviderIn, session: Session = Depends(session), au
         model.endpoint_url = data.endpoint_url
         model.encrypted_config = data.encrypted_config
         model.is_vaild = data.is_vaild
-        model.save(session)
-        session.refresh(model)
+        await model.asave(session)
+        await session.refresh(model)
         logger.info("Provider updated", extra={"user_id": user_id, "provider_id": id, "provider_name": data.provider_name})
         return model
     except Exception as e:
@@ -96,18 +99,18 @@ async def put(id: int, data: ProviderIn, session: Session = Depends(session), au
 
 @router.delete("/provider/{id}", name="delete provider")
 @traceroot.trace()
-async def delete(id: int, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def delete(id: int, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)):
     """Delete a provider."""
     user_id = auth.user.id
-    model = session.exec(
-        select(Provider).where(Provider.user_id == user_id, Provider.no_delete(), Provider.id == id)
+    model = (
+        await session.exec(select(Provider).where(Provider.user_id == user_id, Provider.no_delete(), Provider.id == id))
     ).one_or_none()
     if not model:
         logger.warning("Provider not found for deletion", extra={"user_id": user_id, "provider_id": id})
         raise HTTPException(status_code=404, detail=_("Provider not found"))
     
     try:
-        model.delete(session)
+        await model.adelete(session)
         logger.info("Provider deleted", extra={"user_id": user_id, "provider_id": id})
         return Response(status_code=204)
     except Exception as e:
@@ -117,24 +120,28 @@ async def delete(id: int, session: Session = Depends(session), auth: Auth = Depe
 
 @router.post("/provider/prefer", name="set provider prefer")
 @traceroot.trace()
-async def set_prefer(data: ProviderPreferIn, session: Session = Depends(session), auth: Auth = Depends(auth_must)):
+async def set_prefer(
+    data: ProviderPreferIn, session: AsyncSession = Depends(async_session), auth: Auth = Depends(async_auth_must)
+):
     """Set preferred provider for user."""
     user_id = auth.user.id
     provider_id = data.provider_id
     
     try:
         # 1. Set all current user's providers prefer to false
-        session.exec(update(Provider).where(Provider.user_id == user_id, Provider.no_delete()).values(prefer=False))
+        await session.exec(
+            update(Provider).where(Provider.user_id == user_id, Provider.no_delete()).values(prefer=False)
+        )
         # 2. Set the prefer of the specified provider_id to true
-        session.exec(
+        await session.exec(
             update(Provider)
             .where(Provider.user_id == user_id, Provider.no_delete(), Provider.id == provider_id)
             .values(prefer=True)
         )
-        session.commit()
+        await session.commit()
         logger.info("Preferred provider set", extra={"user_id": user_id, "provider_id": provider_id})
         return {"success": True}
     except SQLAlchemyError as e:
-        session.rollback()
+        await session.rollback()
         logger.error("Failed to set preferred provider", extra={"user_id": user_id, "provider_id": provider_id, "error": str(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
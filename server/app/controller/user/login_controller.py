@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Form
 from fastapi_babel import _
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.component import code
 from app.component.auth import Auth
-from app.component.database import session
+from app.component.database import async_session
 from app.component.encrypt import password_verify
 from app.component.stack_auth import StackAuth
 from app.exception.exception import UserException
@@ -26,13 +26,13 @@ router = APIRouter(tags=["Login/Registration"])
 @router.post("/login", name="login by email or password")
 @traceroot.trace()
 async def by_password(
-    data: LoginByPasswordIn, session: Session = Depends(session)
+    data: LoginByPasswordIn, session: AsyncSession = Depends(async_session)
 ) -> LoginResponse:
     """
     User login with email and password
     """
     email = data.email
-    user = User.by(User.email == email, s=session).one_or_none()
+    user = (await User.aby(User.email == email, s=session)).one_or_none()
 
     if not user:
         logger.warning("Login failed: user not found", extra={"email": email})
@@ -53,7 +53,7 @@ async def by_password(
 async def dev_login(
     username: str = Form(...),  # OAuth2 uses 'username' but we accept email
     password: str = Form(...),
-    session: Session = Depends(session),
+    session: AsyncSession = Depends(async_session),
 ) -> dict:
     """
     OAuth2 password flow compatible login endpoint for Swagger UI.
@@ -61,7 +61,7 @@ async def dev_login(
     """
     # Use username as email (OAuth2 standard uses 'username' field)
     email = username
-    user = User.by(User.email == email, s=session).one_or_none()
+    user = (await User.aby(User.email == email, s=session)).one_or_none()
 
     if not user:
         logger.warning("OAuth2 login failed: user not found", extra={"email": email})
@@ -87,7 +87,7 @@ async def by_stack_auth(
     token: str,
     type: str = "signup",
     invite_code: str | None = None,
-    session: Session = Depends(session),
+    session: AsyncSession = Depends(async_session),
 ):
     try:
         stack_id = await StackAuth.user_id(token)
@@ -98,7 +98,7 @@ async def by_stack_auth(
         )
         raise HTTPException(500, detail=_("Authentication failed"))
 
-    user = User.by(User.stack_id == stack_id, s=session).one_or_none()
+    user = (await User.aby(User.stack_id == stack_id, s=session)).one_or_none()
 
     if not user:
         if type != "signup":
@@ -108,7 +108,7 @@ async def by_stack_auth(
             )
             raise UserException(code.error, _("User not found"))
 
-        with session as s:
+        async with session as s:
             try:
                 user = User(
                     username=info["username"] if "username" in info else None,
@@ -118,8 +118,8 @@ async def by_stack_auth(
                     stack_id=stack_id,
                 )
                 s.add(user)
-                s.commit()
-                s.refresh(user)
+                await s.commit()
+                await s.refresh(user)
                 logger.info(
                     "New user registered via stack",
                     extra={
@@ -132,7 +132,7 @@ async def by_stack_auth(
                     token=Auth.create_access_token(user.id), email=user.email
                 )
             except Exception as e:
-                s.rollback()
+                await s.rollback()
                 logger.error(
                     "Stack auth registration failed",
                     extra={"stack_id": stack_id, "error": str(e)},
@@ -156,30 +156,30 @@ async def by_stack_auth(
 
 @router.post("/register", name="register by email/password")
 @traceroot.trace()
-async def register(data: RegisterIn, session: Session = Depends(session)):
+async def register(data: RegisterIn, session: AsyncSession = Depends(async_session)):
     email = data.email
 
-    if User.by(User.email == email, s=session).one_or_none():
+    if (await User.aby(User.email == email, s=session)).one_or_none():
         logger.warning(
             "Registration failed: email already exists", extra={"email": email}
         )
         raise UserException(code.error, _("Email already registered"))
 
-    with session as s:
+    async with session as s:
         try:
             user = User(
                 email=email,
                 password=data.password,
             )
             s.add(user)
-            s.commit()
-            s.refresh(user)
+            await s.commit()
+            await s.refresh(user)
             logger.info(
                 "User registered successfully",
                 extra={"user_id": user.id, "email": email},
             )
         except Exception as e:
-            s.rollback()
+            await s.rollback()
             logger.error(
                 "User registration failed",
                 extra={"email": email, "error": str(e)},
@@ -2,13 +2,14 @@ from datetime import datetime
 from typing import Any
 from sqlalchemy import delete
 from sqlmodel import Field, SQLModel, Session, col, func, TIMESTAMP, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.component import code
 from sqlalchemy.sql.expression import ColumnExpressionArgument
 from sqlalchemy.sql.base import ExecutableOption
 from sqlalchemy.orm import declared_attr
 from fastapi_babel import _
 from app.exception.exception import UserException
-from app.component.database import engine
+from app.component.database import async_session_make, engine
 from convert_case import snake_case
 from utils import traceroot_wrapper as traceroot
 
@@ -29,6 +30,31 @@ class AbstractModel(SQLModel):
         offset: int | None = None,
         options: ExecutableOption | list[ExecutableOption] | None = None,
         s: Session,
+    ):
+        stmt = cls._by_stmt(*whereclause, order_by=order_by, limit=limit, offset=offset, options=options)
+        return s.exec(stmt, execution_options={"prebuffer_rows": True})
+
+    @classmethod
+    async def aby(
+        cls,
+        *whereclause: ColumnExpressionArgument[bool] | bool,
+        order_by: Any | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        options: ExecutableOption | list[ExecutableOption] | None = None,
+        s: AsyncSession,
+    ):
+        stmt = cls._by_stmt(*whereclause, order_by=order_by, limit=limit, offset=offset, options=options)
+        return await s.exec(stmt, execution_options={"prebuffer_rows": True})
+
+    @classmethod
+    def _by_stmt(
+        cls,
+        *whereclause: ColumnExpressionArgument[bool] | bool,
+        order_by: Any | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        options: ExecutableOption | list[ExecutableOption] | None = None,
     ):
         logger.debug("Executing query by conditions", extra={
             "model_class": cls.__name__,
@@ -46,7 +72,7 @@ class AbstractModel(SQLModel):
             stmt = stmt.offset(offset)
         if options is not None:
             stmt = stmt.options(*(options if isinstance(options, list) else [options]))
-        return s.exec(stmt, execution_options={"prebuffer_rows": True})
+        return stmt
 
     @classmethod
     def exists(
@@ -64,6 +90,16 @@ class AbstractModel(SQLModel):
         })
         return result
 
+    @classmethod
+    async def aexists(
+        cls,
+        *whereclause: ColumnExpressionArgument[bool] | bool,
+        s: AsyncSession,
+    ) -> bool:
+        logger.debug("Checking if record exists", extra={"model_class": cls.__name__})
+        res = (await s.exec(select(func.count("*")).where(*whereclause))).first()
+        return res is not None and res > 0
+
     @classmethod
     def count(
         cls,
@@ -73,6 +109,15 @@ class AbstractModel(SQLModel):
         res = s.exec(select(func.count("*")).where(*whereclause)).first()
         return res if res is not None else 0
 
+    @classmethod
+    async def acount(
+        cls,
+        *whereclause: ColumnExpressionArgument[bool] | bool,
+        s: AsyncSession,
+    ) -> int:
+        res = (await s.exec(select(func.count("*")).where(*whereclause))).first()
+        return res if res is not None else 0
+
     @classmethod
     def exists_must(
         cls,
@@ -82,6 +127,15 @@ class AbstractModel(SQLModel):
         if not cls.exists(*whereclause, s=s):
             raise UserException(code.not_found, _("There is no data that meets the conditions"))
 
+    @classmethod
+    async def aexists_must(
+        cls,
+        *whereclause: ColumnExpressionArgument[bool] | bool,
+        s: AsyncSession,
+    ):
+        if not await cls.aexists(*whereclause, s=s):
+            raise UserException(code.not_found, _("There is no data that meets the conditions"))
+
     @classmethod
     def delete_by(
         cls,
@@ -97,6 +151,20 @@ class AbstractModel(SQLModel):
             "rows_affected": result.rowcount
         })
 
+    @classmethod
+    async def adelete_by(
+        cls,
+        *whereclause: ColumnExpressionArgument[bool],
+        s: AsyncSession,
+    ):
+        logger.info("Deleting records by conditions", extra={"model_class": cls.__name__})
+        result = await s.exec(delete(cls).where(*whereclause))
+        await s.commit()
+        logger.info("Records deleted", extra={
+            "model_class": cls.__name__,
+            "rows_affected": result.rowcount
+        })
+
     def save(self, s: Session | None = None):
         model_id = getattr(self, 'id', None)
         is_new = model_id is None
@@ -120,6 +188,29 @@ class AbstractModel(SQLModel):
             "was_new_record": is_new
         })
 
+    async def asave(self, s: AsyncSession | None = None):
+        model_id = getattr(self, 'id', None)
+        is_new = model_id is None
+        logger.info("Saving model", extra={
+            "model_class": self.__class__.__name__,
+            "model_id": model_id,
+            "is_new_record": is_new
+        })
+
+        if s is None:
+            async with async_session_make() as s:
+                s.add(self)
+                await s.commit()
+        else:
+            s.add(self)
+            await s.commit()
+
+        logger.info("Model saved successfully", extra={
+            "model_class": self.__class__.__name__,
+            "model_id": getattr(self, 'id', None),
+            "was_new_record": is_new
+        })
+
     def delete(self, s: Session):
         model_id = getattr(self, 'id', None)
         is_soft_delete = isinstance(self, DefaultTimes)
@@ -143,6 +234,29 @@ class AbstractModel(SQLModel):
             "was_soft_delete": is_soft_delete
         })
 
+    async def adelete(self, s: AsyncSession):
+        model_id = getattr(self, 'id', None)
+        is_soft_delete = isinstance(self, DefaultTimes)
+
+        logger.info("Deleting model", extra={
+            "model_class": self.__class__.__name__,
+            "model_id": model_id,
+            "is_soft_delete": is_soft_delete
+        })
+
+        if isinstance(self, DefaultTimes):
+            self.deleted_at = datetime.now()
+            await self.asave(s)
+        else:
+            await s.delete(self)
+            await s.commit()
+
+        logger.info("Model deleted successfully", extra={
+            "model_class": self.__class__.__name__,
+            "model_id": model_id,
+            "was_soft_delete": is_soft_delete
+        })
+
     def update_fields(self, update_dict: dict):
         for k, v in update_dict.items():
             setattr(self, k, v)
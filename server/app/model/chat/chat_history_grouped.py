@@ -34,13 +34,18 @@ class GroupedHistoryResponse(BaseModel):
     total_projects: int = 0
     total_tasks: int = 0
     total_tokens: int = 0
+    # Cursor of the next page of projects, None on the last page
+    next_cursor: Optional[str] = None
 
     @model_validator(mode="after")
     def calculate_totals(self):
-        """Calculate total projects, tasks, and tokens"""
-        self.total_projects = len(self.projects)
-        self.total_tasks = sum(project.task_count for project in self.projects)
-        self.total_tokens = sum(project.total_tokens for project in self.projects)
+        """Calculate total projects, tasks, and tokens, unless given (paginated responses count all projects)"""
+        if "total_projects" not in self.model_fields_set:
+            self.total_projects = len(self.projects)
+        if "total_tasks" not in self.model_fields_set:
+            self.total_tasks = sum(project.task_count for project in self.projects)
+        if "total_tokens" not in self.model_fields_set:
+            self.total_tokens = sum(project.total_tokens for project in self.projects)
         return self
 
 
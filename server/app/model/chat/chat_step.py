@@ -1,46 +1,120 @@
-from sqlmodel import SQLModel, Field, JSON
-from app.model.abstract.model import AbstractModel, DefaultTimes
-from pydantic import BaseModel
-from typing import Any
-from pydantic import field_validator
-import json
-
-
-class ChatStep(AbstractModel, DefaultTimes, table=True):
-    id: int = Field(default=None, primary_key=True)
-    task_id: str = Field(index=True)
-    step: str
-    data: str = Field(sa_type=JSON)
-    timestamp: float | None = Field(default=None, nullable=True)
-
-    @field_validator("data", mode="before")
-    @classmethod
-    def serialize_data(cls, v):
-        if isinstance(v, (dict, list)):
-            return json.dumps(v, ensure_ascii=False)
-        return v
-
-    @field_validator("data", mode="after")
-    @classmethod
-    def deserialize_data(cls, v):
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except Exception:
-                return v
-        return v
-
-
-class ChatStepIn(BaseModel):
-    task_id: str
-    step: str
-    data: Any
-    timestamp: float | None = None
-
-
-class ChatStepOut(BaseModel):
-    id: int
-    task_id: str
-    step: str
-    data: Any
-    timestamp: float | None = None
+from sqlalchemy import Index, Row, tuple_
+from sqlmodel import SQLModel, Field, JSON, asc, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.model.abstract.model import AbstractModel, DefaultTimes
+from pydantic import BaseModel
+from typing import Any, AsyncIterator, Literal
+from pydantic import field_validator
+import json
+
+
+class ChatStep(AbstractModel, DefaultTimes, table=True):
+    __table_args__ = (Index("ix_chat_step_task_id_timestamp_id", "task_id", "timestamp", "id"),)
+
+    id: int = Field(default=None, primary_key=True)
+    task_id: str = Field(index=True)
+    step: str
+    data: str = Field(sa_type=JSON)
+    timestamp: float | None = Field(default=None, nullable=True)
+
+    @field_validator("data", mode="before")
+    @classmethod
+    def serialize_data(cls, v):
+        if isinstance(v, (dict, list)):
+            return json.dumps(v, ensure_ascii=False)
+        return v
+
+    @field_validator("data", mode="after")
+    @classmethod
+    def deserialize_data(cls, v):
+        if isinstance(v, str):
+            try:
+                return json.loads(v)
+            except Exception:
+                return v
+        return v
+
+    @classmethod
+    async def aiter_playback(
+        cls, task_id: str, s: AsyncSession, after_id: int | None = None, page_size: int = 500
+    ) -> AsyncIterator[Row]:
+        """Yield the steps of a task in playback order (timestamp, then id,
+        steps without timestamp last) one keyset page at a time, so only a page
+        of rows is ever held in memory. ``after_id`` resumes after that step.
+
+        Steps with a timestamp are paged first, then those without one, so each
+        page is a range scan of the (task_id, timestamp, id) index."""
+        cursor: tuple[float | None, int] | None = None
+        if after_id is not None:
+            stmt = select(cls.id, cls.timestamp).where(cls.task_id == task_id, cls.id == after_id)
+            last = (await s.exec(stmt)).first()
+            if last is not None:
+                cursor = (last.timestamp, last.id)
+
+        columns = (cls.id, cls.task_id, cls.step, cls.data, cls.timestamp, cls.created_at)
+        # Phase is "timed" while steps with a timestamp remain, then "untimed"
+        phase = "untimed" if cursor is not None and cursor[0] is None else "timed"
+        while True:
+            stmt = select(*columns).where(cls.task_id == task_id)
+            if phase == "timed":
+                stmt = stmt.where(cls.timestamp.is_not(None)).order_by(asc(cls.timestamp), asc(cls.id))
+                if cursor is not None:
+                    stmt = stmt.where(tuple_(cls.timestamp, cls.id) > tuple_(*cursor))
+            else:
+                # Ordering by the null timestamp too lets the index order be used, no sort
+                stmt = stmt.where(cls.timestamp.is_(None)).order_by(asc(cls.timestamp), asc(cls.id))
+                if cursor is not None and cursor[0] is None:
+                    stmt = stmt.where(cls.id > cursor[1])
+            rows = (await s.exec(stmt.limit(page_size))).all()
+            # Give the connection back to the pool while the page is being streamed
+            await s.close()
+            for row in rows:
+                yield row
+            if len(rows) == page_size:
+                cursor = (rows[-1].timestamp, rows[-1].id)
+            elif phase == "timed":
+                phase, cursor = "untimed", None
+            else:
+                return
+
+
+def parse_last_event_id(last_event_id: str | None) -> int | None:
+    """Playback events use the step id as SSE event id, anything else is ignored."""
+    if not last_event_id:
+        return None
+    try:
+        return int(last_event_id)
+    except ValueError:
+        return None
+
+
+def playback_event(step) -> str:
+    step_data = {
+        "id": step.id,
+        "task_id": step.task_id,
+        "step": step.step,
+        "data": step.data,
+        "created_at": step.created_at.isoformat() if step.created_at else None,
+    }
+    return f"id: {step.id}\ndata: {json.dumps(step_data)}\n\n"
+
+
+class ChatStepIn(BaseModel):
+    task_id: str
+    step: str
+    data: Any
+    timestamp: float | None = None
+
+
+class ChatStepOut(BaseModel):
+    id: int
+    task_id: str
+    step: str
+    data: Any
+    timestamp: float | None = None
+
+
+class ChatStepBulkItemOut(BaseModel):
+    index: int
+    status: Literal["ok", "error"]
+    error: str | None = None
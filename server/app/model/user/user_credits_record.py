@@ -3,7 +3,7 @@ from typing import Optional
 from pydantic import BaseModel
 from sqlmodel import Relationship, SQLModel, Field, Column, col, select, Session
 from sqlalchemy_utils import ChoiceType
-from sqlalchemy import Boolean, SmallInteger, text
+from sqlalchemy import Boolean, Index, SmallInteger, bindparam, event, func, inspect, text
 from app.model.abstract.model import AbstractModel, DefaultTimes
 from datetime import date, datetime, timedelta
 from app.model.user.key import ModelType
@@ -59,61 +59,47 @@ class UserCreditsRecord(AbstractModel, DefaultTimes, table=True):
     @classmethod
     def get_permanent_credits(cls, user_id: int) -> int:
         """
-        获取可用的token总量，直接用SQL聚合sum
+        获取可用的积分总量，从 UserCreditsBalance 的各个分桶汇总
         Returns:
-            int: 可用的token总量
+            int: 可用的积分总量
         """
-        session = session_make()
-        from sqlalchemy import func
-
-        statement = (
-            select(func.sum(UserCreditsRecord.amount))
-            .where(UserCreditsRecord.user_id == user_id)
-            .where(
-                UserCreditsRecord.channel.in_(
-                    [
-                        CreditsChannel.register,
-                        CreditsChannel.invite,
-                        CreditsChannel.paid,
-                        CreditsChannel.addon,
-                        CreditsChannel.monthly,
-                    ]
+        with session_make() as session:
+            statement = (
+                select(func.sum(UserCreditsBalance.amount))
+                .where(UserCreditsBalance.user_id == user_id)
+                .where(col(UserCreditsBalance.channel).in_(PERMANENT_CHANNELS))
+                .where(
+                    (col(UserCreditsBalance.expire_at).is_(None)) | (col(UserCreditsBalance.expire_at) > datetime.now())
                 )
             )
-            .where(UserCreditsRecord.used == False)
-            .where((UserCreditsRecord.expire_at.is_(None)) | (col(UserCreditsRecord.expire_at) > datetime.now()))
-        )
-        result = session.exec(statement).first()
-        return result or 0
+            return session.exec(statement).first() or 0
 
     @classmethod
     def get_temp_credits(cls, user_id: int) -> tuple[int, date]:
         """
-        1. 获取可用的临时token总量，需要通过credits 然后根据model_type来计算
+        1. 获取可用的临时积分总量（每日积分分桶的剩余量）
         2. 每天只允许赠送一次临时的量
 
         Returns:
-            int: 可用的临时token总量
+            int: 可用的临时积分总量
         """
-        session = session_make()
-        statement = (
-            select(UserCreditsRecord)
-            .where(UserCreditsRecord.user_id == user_id)
-            .where(UserCreditsRecord.channel == CreditsChannel.daily)
-            .where(UserCreditsRecord.used == False)
-            .where(UserCreditsRecord.expire_at.is_not(None))
-            .where(col(UserCreditsRecord.expire_at) > datetime.now())
-        )
-        record: UserCreditsRecord = session.exec(statement).first()
-        if record is None:
+        with session_make() as session:
+            bucket = session.exec(
+                select(UserCreditsBalance)
+                .where(UserCreditsBalance.user_id == user_id)
+                .where(UserCreditsBalance.channel == CreditsChannel.daily)
+                .where(col(UserCreditsBalance.expire_at) > datetime.now())
+                .order_by(col(UserCreditsBalance.expire_at))
+            ).first()
+        if bucket is None:
             return 0, None
-        return record.amount - record.balance, record.expire_at
+        return bucket.amount, bucket.expire_at
 
     @classmethod
     def consume_credits(cls, user_id: int, amount: int, session: Session, source_id: int = 0, remark: str = ""):
         """
-        消耗积分，优先消耗每日积分（daily），再消耗monthly、paid、addon等。
-        消耗时更新UserCreditsRecord的balance字段，记录已消耗积分数。
+        消耗积分，优先消耗每日积分（daily），再按过期时间消耗monthly、paid、addon等。
+        消耗时更新UserCreditsRecord的balance字段，记录已消耗积分数，UserCreditsBalance 在同一事务中同步扣减。
         同时生成积分消耗记录，更新用户积分credits字段（不包括每日积分）。
         避免重复生成积分消耗记录和重复扣减积分。
         """
@@ -153,83 +139,8 @@ class UserCreditsRecord(AbstractModel, DefaultTimes, table=True):
         """
         内部积分消耗逻辑，处理实际的积分扣减
         """
-        from app.model.user.user import User
-
-        remain = amount
-        now = datetime.now()
-        consumed_from_daily = 0
-        consumed_from_other = 0
-
-        # 优先消耗daily
-        statement = (
-            select(UserCreditsRecord)
-            .where(UserCreditsRecord.user_id == user_id)
-            .where(UserCreditsRecord.channel == CreditsChannel.daily)
-            .where(UserCreditsRecord.used == False)
-            .where(UserCreditsRecord.expire_at.is_not(None))
-            .where(col(UserCreditsRecord.expire_at) > now)
-            .order_by(UserCreditsRecord.expire_at)
-        )
-        daily_records = session.exec(statement).first()
-        if daily_records:
-            can_consume = daily_records.amount - daily_records.balance
-            use = min(remain, can_consume)
-            daily_records.balance += use
-            session.add(daily_records)
-            remain -= use
-            consumed_from_daily = use
-            if remain == 0:
-                # 生成积分消耗记录
-                consume_record = UserCreditsRecord(
-                    user_id=user_id,
-                    amount=-amount,
-                    channel=CreditsChannel.consume,
-                    source_id=source_id,
-                    remark=remark or f"Consumed {amount} credits (daily: {consumed_from_daily})",
-                )
-                session.add(consume_record)
-                session.commit()
-                return
-
-        # 若daily不够，继续消耗monthly/paid/addon
-        if remain > 0:
-            statement = (
-                select(UserCreditsRecord)
-                .where(UserCreditsRecord.user_id == user_id)
-                .where(
-                    UserCreditsRecord.channel.in_(
-                        [
-                            CreditsChannel.monthly,
-                            CreditsChannel.paid,
-                            CreditsChannel.addon,
-                            CreditsChannel.register,
-                            CreditsChannel.invite,
-                        ]
-                    )
-                )
-                .where(UserCreditsRecord.used == False)
-                .where((UserCreditsRecord.expire_at.is_(None)) | (col(UserCreditsRecord.expire_at) > now))
-                .order_by(UserCreditsRecord.expire_at)
-            )
-            other_records = session.exec(statement).all()
-            for record in other_records:
-                can_consume = record.amount - record.balance
-                if can_consume <= 0:
-                    continue
-                use = min(remain, can_consume)
-                record.balance += use
-                session.add(record)
-                remain -= use
-                consumed_from_other += use
-                if remain == 0:
-                    break
-
-        # 更新用户积分字段（只扣除非每日积分消耗的部分）
-        if consumed_from_other > 0:
-            user = session.exec(select(User).where(User.id == user_id)).first()
-            if user:
-                user.credits -= consumed_from_other
-                session.add(user)
+        consumed_from_daily, consumed_from_other, remain = cls._deduct(user_id, amount, session)
+        detail = f"daily: {consumed_from_daily}" + (f", other: {consumed_from_other}" if consumed_from_other else "")
 
         # 生成积分消耗记录
         consume_record = UserCreditsRecord(
@@ -237,7 +148,7 @@ class UserCreditsRecord(AbstractModel, DefaultTimes, table=True):
             amount=-amount,
             channel=CreditsChannel.consume,
             source_id=source_id,
-            remark=remark or f"Consumed {amount} credits (daily: {consumed_from_daily}, other: {consumed_from_other})",
+            remark=remark or f"Consumed {amount} credits ({detail})",
         )
         session.add(consume_record)
         session.commit()
@@ -253,108 +164,374 @@ class UserCreditsRecord(AbstractModel, DefaultTimes, table=True):
         内部积分消耗逻辑（更新模式），处理实际的积分扣减但不生成新的消耗记录
         用于更新现有消耗记录时的额外积分消耗
         """
+        _, consumed_from_other, remain = cls._deduct(user_id, amount, session)
+        logger.info(f"consumed_from_other: {consumed_from_other}")
+
+        # 不生成新的消耗记录，因为现有记录已经在主函数中更新了
+
+        if remain > 0:
+            raise Exception(f"Insufficient credits: need {amount}, remain {remain}")
+
+    @classmethod
+    def _deduct(cls, user_id: int, amount: int, session: Session) -> tuple[int, int, int]:
+        """
+        扣减积分：PostgreSQL 上用一条SQL语句（CONSUME_SQL）完成，其他数据库逐条更新积分记录（_deduct_by_records）。
+        先以 SKIP LOCKED 只锁定足够的积分记录，跳过其他并发扣减正在使用的记录；不够时回滚该尝试，
+        再等待锁定全部可用记录重新扣减，因此不会重复消费，也不会因并发而误报积分不足。
+        Returns:
+            tuple[int, int, int]: 每日积分消耗量、其他积分消耗量、未能扣减的剩余量
+        """
+        if session.get_bind().dialect.name != "postgresql":
+            return cls._deduct_by_records(user_id, amount, session)
+        from app.component.auth_cache import invalidate_user_on_commit
+
+        session.flush()
+        params = {
+            "user_id": user_id,
+            "amount": amount,
+            "now": datetime.now(),
+            "daily": CreditsChannel.daily.value,
+            "channels": [CreditsChannel.daily.value, *(channel.value for channel in PERMANENT_CHANNELS)],
+        }
+        # The attempt runs in a savepoint so its locks are released when it falls short
+        attempt = session.begin_nested()
+        consumed_from_daily, consumed_from_other = session.execute(CONSUME_SQL_SKIP_LOCKED, params).one()
+        if consumed_from_daily + consumed_from_other < amount:
+            attempt.rollback()
+            consumed_from_daily, consumed_from_other = session.execute(CONSUME_SQL, params).one()
+        else:
+            attempt.commit()
+        if consumed_from_other:
+            invalidate_user_on_commit(session, user_id)
+        return consumed_from_daily, consumed_from_other, amount - consumed_from_daily - consumed_from_other
+
+    @classmethod
+    def _deduct_by_records(cls, user_id: int, amount: int, session: Session) -> tuple[int, int, int]:
+        """
+        按分桶扣减积分：先锁定用户行（SELECT ... FOR UPDATE），同一用户的并发扣减串行执行，避免重复消费；
+        再读取该用户的余额分桶，只加载有剩余的积分记录并更新其balance字段。
+        Returns:
+            tuple[int, int, int]: 每日积分消耗量、其他积分消耗量、未能扣减的剩余量
+        """
         from app.model.user.user import User
 
-        remain = amount
+        user = session.exec(select(User).where(User.id == user_id).with_for_update()).first()
         now = datetime.now()
+        buckets = session.exec(
+            select(UserCreditsBalance)
+            .where(UserCreditsBalance.user_id == user_id)
+            .where(col(UserCreditsBalance.channel).in_([CreditsChannel.daily, *PERMANENT_CHANNELS]))
+            .where(UserCreditsBalance.amount > 0)
+            .where((col(UserCreditsBalance.expire_at).is_(None)) | (col(UserCreditsBalance.expire_at) > now))
+            .order_by(col(UserCreditsBalance.expire_at))
+        ).all()
+        # 优先消耗最早过期的daily分桶，再按过期时间消耗monthly/paid/addon/register/invite
+        daily = [bucket for bucket in buckets if bucket.channel == CreditsChannel.daily][:1]
+        others = [bucket for bucket in buckets if bucket.channel != CreditsChannel.daily]
+
+        remain = amount
         consumed_from_daily = 0
         consumed_from_other = 0
+        for bucket in daily + others:
+            if remain == 0:
+                break
+            use = cls._deduct_bucket(user_id, bucket.channel, bucket.expire_at, min(remain, bucket.amount), session)
+            remain -= use
+            if bucket.channel == CreditsChannel.daily:
+                consumed_from_daily += use
+            else:
+                consumed_from_other += use
 
-        # 优先消耗daily
-        statement = (
+        # 更新用户积分字段（只扣除非每日积分消耗的部分）
+        if consumed_from_other > 0 and user:
+            user.credits -= consumed_from_other
+            session.add(user)
+        return consumed_from_daily, consumed_from_other, remain
+
+    @classmethod
+    def _deduct_bucket(
+        cls, user_id: int, channel: CreditsChannel, expire_at: datetime | None, amount: int, session: Session
+    ) -> int:
+        # Only the records of the bucket that still have credits left
+        records = session.exec(
             select(UserCreditsRecord)
             .where(UserCreditsRecord.user_id == user_id)
-            .where(UserCreditsRecord.channel == CreditsChannel.daily)
+            .where(UserCreditsRecord.channel == channel)
+            .where(_expire_at_is(col(UserCreditsRecord.expire_at), expire_at))
             .where(UserCreditsRecord.used == False)
-            .where(UserCreditsRecord.expire_at.is_not(None))
-            .where(col(UserCreditsRecord.expire_at) > now)
-            .order_by(UserCreditsRecord.expire_at)
+            .where(col(UserCreditsRecord.amount) > col(UserCreditsRecord.balance))
+            .order_by(col(UserCreditsRecord.id))
         )
-        daily_records = session.exec(statement).first()
-        if daily_records:
-            can_consume = daily_records.amount - daily_records.balance
-            use = min(remain, can_consume)
-            daily_records.balance += use
-            session.add(daily_records)
+        remain = amount
+        for record in records:
+            use = min(remain, record.amount - record.balance)
+            record.balance += use
+            session.add(record)
             remain -= use
-            consumed_from_daily = use
             if remain == 0:
-                # 不生成新的消耗记录，只更新现有记录
-                return
+                break
+        return amount - remain
 
-        # 若daily不够，继续消耗monthly/paid/addon
-        if remain > 0:
+    @classmethod
+    def get_daily_balance_sum(cls, user_id: int) -> int:
+        """
+        获取用户所有每日积分（daily channel）的balance字段之和
+        """
+        with session_make() as session:
+            statement = (
+                select(func.sum(UserCreditsRecord.balance))
+                .where(UserCreditsRecord.user_id == user_id)
+                .where(UserCreditsRecord.channel == CreditsChannel.daily)
+            )
+            return session.exec(statement).first() or 0
+
+    @classmethod
+    def get_daily_balance(cls, user_id: int) -> int:
+        """
+        获取用户当前的每日积分数据
+        """
+        with session_make() as session:
             statement = (
                 select(UserCreditsRecord)
                 .where(UserCreditsRecord.user_id == user_id)
-                .where(
-                    UserCreditsRecord.channel.in_(
-                        [
-                            CreditsChannel.monthly,
-                            CreditsChannel.paid,
-                            CreditsChannel.addon,
-                            CreditsChannel.register,
-                            CreditsChannel.invite,
-                        ]
-                    )
-                )
+                .where(UserCreditsRecord.channel == CreditsChannel.daily)
                 .where(UserCreditsRecord.used == False)
-                .where((UserCreditsRecord.expire_at.is_(None)) | (col(UserCreditsRecord.expire_at) > now))
-                .order_by(UserCreditsRecord.expire_at)
             )
-            other_records = session.exec(statement).all()
-            for record in other_records:
-                can_consume = record.amount - record.balance
-                if can_consume <= 0:
-                    continue
-                use = min(remain, can_consume)
-                record.balance += use
-                session.add(record)
-                remain -= use
-                consumed_from_other += use
-                if remain == 0:
-                    break
-        logger.info(f"consumed_from_other: {consumed_from_other}")
-        # 更新用户积分字段（只扣除非每日积分消耗的部分）
-        if consumed_from_other > 0:
-            user = session.exec(select(User).where(User.id == user_id)).first()
-            if user:
-                user.credits -= consumed_from_other
-                session.add(user)
+            return session.exec(statement).first()
 
-        # 不生成新的消耗记录，因为现有记录已经在主函数中更新了
 
-        if remain > 0:
-            raise Exception(f"Insufficient credits: need {amount}, remain {remain}")
+class UserCreditsBalance(AbstractModel, DefaultTimes, table=True):
+    """
+    积分余额分桶：每个用户每个渠道每个过期时间一行，amount 为该分桶下未使用积分记录的剩余量之和
+    （sum(amount - balance)）。积分记录写入时在同一事务中同步更新，读取余额无需扫描积分记录。
+    """
 
-    @classmethod
-    def get_daily_balance_sum(cls, user_id: int) -> int:
-        """
-        获取用户所有每日积分（daily channel）的balance字段之和
-        """
-        session = session_make()
-        statement = (
-            select(UserCreditsRecord.balance)
-            .where(UserCreditsRecord.user_id == user_id)
-            .where(UserCreditsRecord.channel == CreditsChannel.daily)
-        )
-        balances = session.exec(statement).all()
-        return sum(balances) if balances else 0
+    __table_args__ = (Index("ix_user_credits_balance_bucket", "user_id", "channel", "expire_at", unique=True),)
+
+    id: int = Field(default=None, primary_key=True)
+    user_id: int = Field(index=True, foreign_key="user.id")
+    channel: CreditsChannel = Field(sa_column=Column(ChoiceType(CreditsChannel, SmallInteger()), nullable=False))
+    expire_at: datetime | None = Field(default=None, nullable=True, description="Expiration time of the bucket")
+    amount: int = Field(default=0, description="Credits left in the bucket")
 
     @classmethod
-    def get_daily_balance(cls, user_id: int) -> int:
+    def reconcile(cls, session: Session, user_id: int | None = None) -> int:
         """
-        获取用户当前的每日积分数据
+        根据积分记录重新计算余额分桶，修正偏差并清理已过期的分桶。
+        不指定 user_id 时处理所有用户，每个用户单独提交。
+        Returns:
+            int: 修正的分桶数量
         """
-        session = session_make()
-        statement = (
-            select(UserCreditsRecord)
-            .where(UserCreditsRecord.user_id == user_id)
-            .where(UserCreditsRecord.channel == CreditsChannel.daily)
-            .where(UserCreditsRecord.used == False)
+        from app.model.user.user import User
+
+        if user_id is None:
+            user_ids = session.exec(select(UserCreditsRecord.user_id).distinct()).all()
+            user_ids += session.exec(
+                select(UserCreditsBalance.user_id).distinct().where(col(UserCreditsBalance.user_id).not_in(user_ids))
+            ).all()
+        else:
+            user_ids = [user_id]
+
+        fixed = 0
+        for uid in user_ids:
+            # Deductions update the buckets, holding their locks no deduction happens while we compare
+            buckets = session.exec(
+                select(UserCreditsBalance)
+                .where(UserCreditsBalance.user_id == uid)
+                .order_by(col(UserCreditsBalance.id))
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            ).all()
+            session.exec(select(User.id).where(User.id == uid).with_for_update())
+            now = datetime.now()
+            expected = {
+                (CreditsChannel(channel), expire_at): total
+                for channel, expire_at, total in session.exec(
+                    select(
+                        UserCreditsRecord.channel,
+                        UserCreditsRecord.expire_at,
+                        func.sum(UserCreditsRecord.amount - UserCreditsRecord.balance),
+                    )
+                    .where(UserCreditsRecord.user_id == uid)
+                    .where(UserCreditsRecord.channel != CreditsChannel.consume)
+                    .where(UserCreditsRecord.used == False)
+                    .where((col(UserCreditsRecord.expire_at).is_(None)) | (col(UserCreditsRecord.expire_at) > now))
+                    .group_by(UserCreditsRecord.channel, UserCreditsRecord.expire_at)
+                )
+            }
+            for bucket in buckets:
+                total = expected.pop((CreditsChannel(bucket.channel), bucket.expire_at), None)
+                if total is None:
+                    if bucket.amount != 0 and (bucket.expire_at is None or bucket.expire_at > now):
+                        fixed += 1
+                    session.delete(bucket)
+                elif bucket.amount != total:
+                    logger.warning(
+                        "Credits balance drifted from records",
+                        extra={"user_id": uid, "channel": bucket.channel, "balance": bucket.amount, "records": total},
+                    )
+                    bucket.amount = total
+                    session.add(bucket)
+                    fixed += 1
+            for (channel, expire_at), total in expected.items():
+                if total == 0:
+                    continue
+                session.add(UserCreditsBalance(user_id=uid, channel=channel, expire_at=expire_at, amount=total))
+                fixed += 1
+            session.commit()
+        return fixed
+
+
+PERMANENT_CHANNELS = [
+    CreditsChannel.register,
+    CreditsChannel.invite,
+    CreditsChannel.paid,
+    CreditsChannel.addon,
+    CreditsChannel.monthly,
+]
+
+
+def _consume_sql(skip_locked: bool):
+    # Candidates are the unused, unexpired records with credits left: those of
+    # the earliest expiring daily grant first, then the others by expiry.
+    # Skipping locked rows only the records needed are locked, judged by the
+    # statement snapshot; waiting all candidates are, in id order so that
+    # concurrent statements can't deadlock. The deduction is then computed
+    # from the locked rows, which hold their latest values.
+    candidates = """
+        SELECT id, channel, expire_at, amount - balance AS left_amount
+        FROM user_credits_record
+        WHERE user_id = :user_id
+          AND used = false
+          AND amount > balance
+          AND channel IN :channels
+          AND (expire_at IS NULL OR expire_at > :now)
+          AND (channel <> :daily OR expire_at = (
+              SELECT MIN(expire_at) FROM user_credits_record
+              WHERE user_id = :user_id AND channel = :daily AND used = false
+                AND amount > balance AND expire_at > :now
+          ))
+    """
+    if skip_locked:
+        locked = f"""
+        needed AS (
+            SELECT id FROM (
+                SELECT id, SUM(left_amount) OVER (ORDER BY channel <> :daily, expire_at, id) - left_amount AS before
+                FROM ({candidates}) c
+            ) c
+            WHERE before < :amount
+        ),
+        locked AS (
+            SELECT id, channel, expire_at, amount - balance AS left_amount
+            FROM user_credits_record
+            WHERE id IN (SELECT id FROM needed) AND used = false AND amount > balance
+            ORDER BY id
+            FOR UPDATE SKIP LOCKED
+        ),"""
+    else:
+        locked = f"""
+        locked AS (
+            {candidates}
+            ORDER BY id
+            FOR UPDATE
+        ),"""
+    return text(
+        f"""
+        WITH {locked}
+        taken AS (
+            SELECT id, channel, expire_at,
+                   LEAST(left_amount, :amount - (SUM(left_amount) OVER (ORDER BY channel <> :daily, expire_at, id) - left_amount)) AS take
+            FROM locked
+        ),
+        records AS (
+            UPDATE user_credits_record r SET balance = r.balance + t.take, updated_at = now()
+            FROM taken t
+            WHERE r.id = t.id AND t.take > 0
+        ),
+        buckets AS (
+            UPDATE user_credits_balance b SET amount = b.amount - s.take, updated_at = now()
+            FROM (SELECT channel, expire_at, SUM(take) AS take FROM taken WHERE take > 0 GROUP BY channel, expire_at) s
+            WHERE b.user_id = :user_id AND b.channel = s.channel AND b.expire_at IS NOT DISTINCT FROM s.expire_at
+        ),
+        users AS (
+            UPDATE "user" u SET credits = u.credits - o.take, updated_at = now()
+            FROM (SELECT SUM(take) AS take FROM taken WHERE take > 0 AND channel <> :daily) o
+            WHERE u.id = :user_id AND o.take IS NOT NULL
         )
-        record = session.exec(statement).first()
-        return record
+        SELECT COALESCE(SUM(take) FILTER (WHERE channel = :daily), 0),
+               COALESCE(SUM(take) FILTER (WHERE channel <> :daily), 0)
+        FROM taken
+        WHERE take > 0
+        """
+    ).bindparams(bindparam("channels", expanding=True))
+
+
+# Daily first then by expiry deduction from the records, their buckets and
+# User.credits in one statement, see UserCreditsRecord._deduct
+CONSUME_SQL_SKIP_LOCKED = _consume_sql(skip_locked=True)
+CONSUME_SQL = _consume_sql(skip_locked=False)
+
+
+def _expire_at_is(column, expire_at: datetime | None):
+    return column.is_(None) if expire_at is None else column == expire_at
+
+
+def _bucket_part(channel, expire_at, amount, balance, used) -> tuple[tuple[CreditsChannel, datetime | None], int]:
+    # A record's share of its bucket: what's left of it while it's unused
+    channel = CreditsChannel(channel)
+    if channel == CreditsChannel.consume or used:
+        return (channel, expire_at), 0
+    return (channel, expire_at), (amount or 0) - (balance or 0)
+
+
+def _previous(target: UserCreditsRecord, name: str):
+    history = inspect(target).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+def _apply_to_bucket(connection, user_id: int, channel: CreditsChannel, expire_at: datetime | None, delta: int) -> None:
+    from app.model.user.user import User
+
+    if delta == 0:
+        return
+    table = UserCreditsBalance.__table__
+    where = (table.c.user_id == user_id, table.c.channel == channel, _expire_at_is(table.c.expire_at, expire_at))
+    update = table.update().where(*where).values(amount=table.c.amount + delta)
+    if connection.execute(update).rowcount:
+        return
+    # Locks are taken records, then buckets, then the user, like CONSUME_SQL.
+    # The user lock serializes grants creating the same bucket.
+    connection.execute(select(User.__table__.c.id).where(User.__table__.c.id == user_id).with_for_update())
+    if connection.execute(update).rowcount == 0:
+        connection.execute(table.insert().values(user_id=user_id, channel=channel, expire_at=expire_at, amount=delta))
+
+
+# Grants, consumption, expiry and removal of records move the balance of their
+# bucket in the same flush, so it commits or rolls back together with them.
+@event.listens_for(UserCreditsRecord, "after_insert")
+def _record_inserted(mapper, connection, target: UserCreditsRecord) -> None:
+    key, part = _bucket_part(target.channel, target.expire_at, target.amount, target.balance, target.used)
+    _apply_to_bucket(connection, target.user_id, *key, part)
+
+
+@event.listens_for(UserCreditsRecord, "after_update")
+def _record_updated(mapper, connection, target: UserCreditsRecord) -> None:
+    old_key, old_part = _bucket_part(
+        *(_previous(target, name) for name in ("channel", "expire_at", "amount", "balance", "used"))
+    )
+    key, part = _bucket_part(target.channel, target.expire_at, target.amount, target.balance, target.used)
+    old_user_id = _previous(target, "user_id")
+    if (old_user_id, old_key) == (target.user_id, key):
+        _apply_to_bucket(connection, target.user_id, *key, part - old_part)
+    else:
+        _apply_to_bucket(connection, old_user_id, *old_key, -old_part)
+        _apply_to_bucket(connection, target.user_id, *key, part)
+
+
+@event.listens_for(UserCreditsRecord, "after_delete")
+def _record_deleted(mapper, connection, target: UserCreditsRecord) -> None:
+    key, part = _bucket_part(target.channel, target.expire_at, target.amount, target.balance, target.used)
+    _apply_to_bucket(connection, target.user_id, *key, -part)
 
 
 class UserCreditsRecordWithChatOut(BaseModel):